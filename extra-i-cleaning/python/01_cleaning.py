@@ -1,9 +1,21 @@
 from __future__ import annotations
 
+from contextlib import nullcontext
 from pathlib import Path
+import io
 import re
+import sys
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
 import pandas as pd
 
+# Shared reader lives in <root>/python (csv_reader.py)
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "python"))
+from csv_reader import CsvScan, read_csv_chunks, read_csv_fast, scan_csv  # noqa: E402
+from instrument import RunLog, peak_rss_mb, reset_peak_rss, rss_mb  # noqa: E402
+
 
 # ----------------------------
 # Config
@@ -21,37 +33,52 @@ RAW_DATE_FORMAT = "%m-%d-%Y"
 # Output date format (ISO) for Postgres-friendly CSVs
 OUTPUT_DATE_FORMAT = "%Y-%m-%d"
 
+# Distinct date strings sampled to detect the format before any full pass
+DATE_SAMPLE_SIZE = 200
+
+# Streaming mode: rows per chunk (None = whole table in memory)
+CHUNKSIZE: int | None = None
+
+# Worker processes (1 = clean tables sequentially in this process)
+JOBS = 1
+
+# Compact representation: text columns become `category` below these limits
+CATEGORY_MAX_UNIQUE = 1000
+CATEGORY_MAX_RATIO = 0.5
+
 
 # ----------------------------
-# Encoding helpers
+# pandas options
 # ----------------------------
-def detect_encoding_by_bom(csv_path: Path) -> str | None:
-    with open(csv_path, "rb") as f:
-        first4 = f.read(4)
-
-    if first4.startswith(b"\xef\xbb\xbf"):
-        return "utf-8-sig"
-    if first4.startswith(b"\xff\xfe") or first4.startswith(b"\xfe\xff"):
-        return "utf-16"
-    if first4.startswith(b"\xff\xfe\x00\x00") or first4.startswith(b"\x00\x00\xfe\xff"):
-        return "utf-32"
-    return None
+def copy_on_write():
+    """
+    Copy-on-write for one cleaning job only (the stages mutate/reassign columns
+    instead of copying whole frames); not set globally, so importers (cli.py's
+    warm worker) keep their own pandas options. Always on from pandas 3.
+    """
+    if int(pd.__version__.split(".")[0]) >= 3:
+        return nullcontext()
+    try:
+        pd.get_option("mode.copy_on_write")
+    except (KeyError, pd.errors.OptionError):  # pandas < 1.5
+        return nullcontext()
+    return pd.option_context("mode.copy_on_write", True)
 
 
-def read_csv_smart(csv_path: Path) -> tuple[pd.DataFrame, str]:
-    enc = detect_encoding_by_bom(csv_path)
-    enc_candidates = [enc] if enc else []
-    enc_candidates += ["utf-8", "utf-8-sig", "cp1252", "latin1"]
+# ----------------------------
+# Encoding helpers
+# ----------------------------
+def is_raw_date_column(name: str) -> bool:
+    """Raw *Date columns are read as text; parse_date_columns owns date parsing."""
+    return name.strip().lower().endswith("date")
 
-    last_err: Exception | None = None
-    for e in enc_candidates:
-        try:
-            df = pd.read_csv(csv_path, encoding=e, low_memory=False)
-            return df, e
-        except UnicodeDecodeError as err:
-            last_err = err
 
-    raise last_err  # type: ignore[misc]
+def read_csv_smart(csv_path: Path) -> tuple[pd.DataFrame, str]:
+    """
+    One pass: encoding settled from BOM + a bounded prefix probe (UTF-16 is
+    transcoded in a stream), then a multithreaded pyarrow parse when available.
+    """
+    return read_csv_fast(csv_path, string_columns=is_raw_date_column)
 
 
 # ----------------------------
@@ -70,7 +97,7 @@ def camel_to_snake(name: str) -> str:
 
 
 def normalize_columns_to_snake(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
+    """In place: renames the columns of `df` and returns it (for chaining)."""
     df.columns = [camel_to_snake(c) for c in df.columns]
     return df
 
@@ -90,28 +117,149 @@ def detect_date_columns(df: pd.DataFrame) -> list[str]:
 # Standardization steps
 # ----------------------------
 def cast_id_columns_to_string(df: pd.DataFrame) -> tuple[pd.DataFrame, list[str]]:
-    df = df.copy()
+    """In place: replaces each *_id column of `df`."""
     id_cols = detect_id_columns(df)
     for c in id_cols:
         df[c] = df[c].astype("string")
     return df, id_cols
 
 
-def parse_date_columns(df: pd.DataFrame, *, raw_format: str = RAW_DATE_FORMAT) -> tuple[pd.DataFrame, list[str], dict[str, int]]:
+def _sample_positions(n: int, k: int) -> np.ndarray:
+    """Evenly spread positions (not just the head) so the sample sees late format drift."""
+    if n <= k:
+        return np.arange(n)
+    return np.unique(np.linspace(0, n - 1, k).astype(np.int64))
+
+
+def detect_date_format(sample: pd.Index, formats: list[str]) -> str | None:
     """
-    Smart date parsing for *_date columns.
-    Strategy:
-      1) Try strict RAW_DATE_FORMAT first (e.g., %m-%d-%Y).
-      2) If success rate is very low, try common alternatives.
-      3) Finally fallback to pandas inference.
-    Keeps errors='coerce' (conservative).
+    Pick the candidate that parses most of a small sample of distinct strings.
+    Ties keep list order; stops early once a format parses the whole sample.
     """
-    df = df.copy()
-    date_cols = detect_date_columns(df)
-    invalid_counts: dict[str, int] = {}
+    best: str | None = None
+    best_ok = 0
+    for fmt in formats:
+        ok = int(pd.to_datetime(sample, format=fmt, errors="coerce").notna().sum())
+        if ok > best_ok:
+            best, best_ok = fmt, ok
+        if ok == len(sample):
+            break
+    return best
+
+
+def choose_date_format(
+    uniques: pd.Index,
+    weights: np.ndarray,
+    non_null_before: int,
+    *,
+    raw_format: str,
+    formats: list[str],
+    sample_size: int = DATE_SAMPLE_SIZE,
+) -> tuple[str | None, pd.DatetimeIndex]:
+    """
+    Decide the parse for one column using only its distinct (stripped) strings.
+    `weights[i]` = number of rows holding uniques[i], so success counts are
+    row-weighted and the decision is identical to parsing the full column:
+      1) RAW_DATE_FORMAT if it parses >= 80% of non-null rows
+      2) else the first format (raw first) with the most parsed rows
+      3) if that is still < 80%, pandas inference when it does better
+    Returns (format or None for inference, parsed uniques).
+    """
+    parsed: dict[str, pd.DatetimeIndex] = {}
+
+    def full(fmt: str) -> tuple[pd.DatetimeIndex, int]:
+        if fmt not in parsed:
+            parsed[fmt] = pd.to_datetime(uniques, format=fmt, errors="coerce")
+        p = parsed[fmt]
+        return p, int(weights[np.asarray(p.notna())].sum())
+
+    def rate(succ: int) -> float:
+        return (succ / non_null_before) if non_null_before else 1.0
+
+    p_raw, succ_raw = full(raw_format)
+    if rate(succ_raw) >= 0.80:
+        return raw_format, p_raw
+
+    # Sample of distinct values: detect the likely format before any full pass,
+    # then bound what every other candidate could reach at most.
+    pos = _sample_positions(len(uniques), sample_size)
+    sample = uniques[pos]
+    in_sample = np.zeros(len(uniques), dtype=bool)
+    in_sample[pos] = True
+    rest_weight = int(weights[~in_sample].sum())
+
+    candidates = [raw_format] + [f for f in formats if f != raw_format]
+    detected = detect_date_format(sample, candidates) or raw_format
+    det_rank = candidates.index(detected)
+    _, succ_det = full(detected)
+
+    best_fmt, best_succ = raw_format, succ_raw
+    for rank, fmt in enumerate(candidates):
+        if fmt not in parsed:
+            ok_sample = np.asarray(pd.to_datetime(sample, format=fmt, errors="coerce").notna())
+            upper = int(weights[pos][ok_sample].sum()) + rest_weight
+            # an earlier candidate wins a tie with the detected one, a later one must beat it
+            if upper < succ_det or (rank > det_rank and upper == succ_det):
+                continue
+        _, succ = full(fmt)
+        if succ > best_succ:
+            best_fmt, best_succ = fmt, succ
+
+    if rate(best_succ) < 0.80 and non_null_before > 0:
+        # infer_datetime_format is a no-op since pandas 2.0 (strict inference is the default)
+        pinfer = pd.to_datetime(uniques, errors="coerce")
+        succ_inf = int(weights[np.asarray(pinfer.notna())].sum())
+        if succ_inf > best_succ:
+            return None, pinfer
+
+    return best_fmt, parsed[best_fmt]
+
+
+def parse_date_series(
+    s: pd.Series,
+    *,
+    raw_format: str = RAW_DATE_FORMAT,
+    formats: list[str] | None = None,
+    detect: bool = True,
+    use_format: str | None = None,
+) -> tuple[pd.Series, str | None, int]:
+    """
+    Unique-value date normalization:
+      - factorize the column (each distinct string is parsed once)
+      - choose the format on the distinct values (see choose_date_format),
+        or apply `use_format` as-is when detect=False (None = inference)
+      - map results back to rows with a vectorized take
+    Returns (parsed series, chosen format or None for inference, invalid count).
+    """
+    formats = formats or common_date_formats(raw_format)
+    non_null_before = int(s.notna().sum())
+
+    codes, uniques = pd.factorize(s)
+    if len(uniques) == 0:
+        return pd.Series(pd.NaT, index=s.index, dtype="datetime64[ns]"), raw_format, 0
+
+    weights = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    # Work with strings for consistent parsing (strip only the distinct values)
+    u_str = pd.Index(uniques).astype("string").str.strip()
+
+    if detect:
+        fmt, parsed_u = choose_date_format(
+            u_str, weights, non_null_before, raw_format=raw_format, formats=formats
+        )
+    else:
+        fmt = use_format
+        parsed_u = pd.to_datetime(u_str, format=fmt, errors="coerce")
 
+    parsed = pd.Series(parsed_u.take(np.where(codes < 0, 0, codes)), index=s.index).where(codes >= 0)
+
+    # Count invalids: values that were non-null but became NaT
+    invalid = non_null_before - int(weights[np.asarray(parsed_u.notna())].sum())
+    return parsed, fmt, int(invalid)
+
+
+def common_date_formats(raw_format: str = RAW_DATE_FORMAT) -> list[str]:
     # Common formats we may encounter across different CSVs
-    common_formats = [
+    return [
         raw_format,       # e.g. %m-%d-%Y
         "%Y-%m-%d",       # ISO
         "%m/%d/%Y",       # US slashes
@@ -120,73 +268,54 @@ def parse_date_columns(df: pd.DataFrame, *, raw_format: str = RAW_DATE_FORMAT) -
         "%d/%m/%Y",       # just in case
     ]
 
+
+def parse_date_columns(
+    df: pd.DataFrame,
+    *,
+    raw_format: str = RAW_DATE_FORMAT,
+    pinned_formats: dict[str, str | None] | None = None,
+) -> tuple[pd.DataFrame, list[str], dict[str, int]]:
+    """
+    Smart date parsing for *_date columns.
+    Strategy (decided on distinct values, see parse_date_series):
+      1) Try strict RAW_DATE_FORMAT first (e.g., %m-%d-%Y).
+      2) If success rate is very low, try common alternatives.
+      3) Finally fallback to pandas inference.
+    Keeps errors='coerce' (conservative).
+    In place: replaces each parsed column of `df`.
+
+    pinned_formats (streaming): decisions already made for earlier chunks are
+    reused as-is; new decisions (from a chunk with non-null values) are added.
+    """
+    date_cols = detect_date_columns(df)
+    invalid_counts: dict[str, int] = {}
+    formats = common_date_formats(raw_format)
+
     for c in date_cols:
         # If already datetime dtype, keep it
         if pd.api.types.is_datetime64_any_dtype(df[c]):
-            parsed = df[c]
-        else:
-            s = df[c]
-
-            non_null_before = int(s.notna().sum())
-
-            # Work with strings for consistent parsing
-            s_str = s.astype("string").str.strip()
-            # optional small normalization
-            # (do NOT replace '-' aggressively; just trim spaces)
-            # s_str = s_str.str.replace(r"\s+", " ", regex=True)
-
-            parsed = None
-
-            # 1) Try RAW_DATE_FORMAT first (strict)
-            p1 = pd.to_datetime(s_str, format=raw_format, errors="coerce")
-            success1 = int(p1.notna().sum())
-            success_rate1 = (success1 / non_null_before) if non_null_before else 1.0
-
-            if success_rate1 >= 0.80:
-                parsed = p1
-            else:
-                # 2) Try other common formats, but only if they improve
-                best = p1
-                best_success = success1
-
-                for fmt in common_formats:
-                    if fmt == raw_format:
-                        continue
-                    p = pd.to_datetime(s_str, format=fmt, errors="coerce")
-                    succ = int(p.notna().sum())
-                    if succ > best_success:
-                        best = p
-                        best_success = succ
-
-                # If still too low, 3) fallback to inference
-                best_rate = (best_success / non_null_before) if non_null_before else 1.0
-                if best_rate < 0.80 and non_null_before > 0:
-                    pinfer = pd.to_datetime(s_str, errors="coerce", infer_datetime_format=True)
-                    succ_inf = int(pinfer.notna().sum())
-                    if succ_inf > best_success:
-                        best = pinfer
-                        best_success = succ_inf
-
-                parsed = best
-
-            # Count invalids: values that were non-null but became NaT
-            invalid = non_null_before - int(parsed.notna().sum())
-            invalid_counts[c] = int(invalid)
+            continue
 
+        if pinned_formats is not None and c in pinned_formats:
+            parsed, _, invalid = parse_date_series(df[c], detect=False, use_format=pinned_formats[c])
+        else:
+            parsed, fmt, invalid = parse_date_series(df[c], raw_format=raw_format, formats=formats)
+            if pinned_formats is not None and df[c].notna().any():
+                pinned_formats[c] = fmt
+        invalid_counts[c] = invalid
         df[c] = parsed
 
     return df, date_cols, invalid_counts
 
 
-
 def impute_descriptive_strings(df: pd.DataFrame, table_name: str) -> tuple[pd.DataFrame, dict[str, int]]:
     """
     Minimal, explicitly allowed imputations for descriptive (non-financial) attributes.
     Current policy:
       - products.color: NULL -> "unknown"
     Returns counts of imputed cells per column.
+    In place on `df`.
     """
-    df = df.copy()
     imputed: dict[str, int] = {}
 
     if table_name == "products" and "color" in df.columns:
@@ -203,8 +332,8 @@ def add_orders_temporal_flags(df: pd.DataFrame, table_name: str) -> tuple[pd.Dat
     Orders-only anomaly handling:
       - flag if order_date > ship_date
       - add ship_lead_days = (ship_date - order_date).days
+    In place: adds the two columns to `df`.
     """
-    df = df.copy()
     metrics: dict[str, int] = {}
 
     if table_name == "orders" and {"order_date", "ship_date"}.issubset(df.columns):
@@ -223,7 +352,137 @@ def add_orders_temporal_flags(df: pd.DataFrame, table_name: str) -> tuple[pd.Dat
     return df, metrics
 
 
-def standardize_table(df: pd.DataFrame, table_name: str) -> tuple[pd.DataFrame, dict]:
+# ----------------------------
+# Compact representation (opt-in: --compact / --parquet)
+# ----------------------------
+def id_column_as_int(s: pd.Series) -> pd.Series | None:
+    """Nullable Int64 if every non-null value is integral ("1", "1.0"), else None."""
+    num = pd.to_numeric(s, errors="coerce")
+    if int(num.notna().sum()) != int(s.notna().sum()):
+        return None
+    if not bool((num.dropna() % 1 == 0).all()):
+        return None
+    return num.astype("Int64")
+
+
+def is_low_cardinality_text(s: pd.Series) -> bool:
+    if not (pd.api.types.is_object_dtype(s.dtype) or pd.api.types.is_string_dtype(s.dtype)):
+        return False
+    n = int(s.notna().sum())
+    if n == 0:
+        return False
+    nunique = int(s.nunique(dropna=True))
+    return nunique <= CATEGORY_MAX_UNIQUE and (nunique / n) <= CATEGORY_MAX_RATIO
+
+
+def downcast_numeric(s: pd.Series) -> pd.Series:
+    """Smallest integer type; float32 only when it round-trips exactly."""
+    if pd.api.types.is_bool_dtype(s.dtype):
+        return s
+    if pd.api.types.is_integer_dtype(s.dtype):
+        return pd.to_numeric(s, downcast="integer")
+    if pd.api.types.is_float_dtype(s.dtype) and s.dtype != np.float32:
+        f32 = s.astype(np.float32)
+        if np.array_equal(f32.to_numpy(dtype=np.float64), s.to_numpy(dtype=np.float64), equal_nan=True):
+            return f32
+    return s
+
+
+def compact_dtypes(
+    df: pd.DataFrame,
+    id_cols: list[str],
+    date_cols: list[str],
+    *,
+    downcast: bool = True,
+    category_cols: list[str] | None = None,
+    id_int_cols: list[str] | None = None,
+) -> tuple[pd.DataFrame, dict[str, str]]:
+    """
+    In place, after standardize_table (and after the CSV is written: the CSV keeps
+    the standardized text):
+      - *_id: nullable Int64 when every value is integral (else stays string)
+        (id_int_cols pins the choice, e.g. from the whole-file scan when streaming)
+      - low-cardinality text (color, gender, status, region, ...): category
+        (category_cols pins the choice, e.g. from the first chunk when streaming)
+      - numerics: downcast (skipped when downcast=False so chunks share one schema)
+    Returns {column: new dtype} for the columns that changed.
+    """
+    changed: dict[str, str] = {}
+
+    for c in id_cols:
+        if id_int_cols is None:
+            as_int = id_column_as_int(df[c])
+        elif c in id_int_cols:
+            as_int = pd.to_numeric(df[c]).astype("Int64")
+        else:
+            as_int = None
+        if as_int is not None:
+            df[c] = as_int
+            changed[c] = str(as_int.dtype)
+
+    skip = set(id_cols) | set(date_cols)
+    if category_cols is None:
+        category_cols = [c for c in df.columns if c not in skip and is_low_cardinality_text(df[c])]
+    for c in category_cols:
+        if c in df.columns:
+            df[c] = df[c].astype("category")
+            changed[c] = "category"
+
+    if downcast:
+        for c in df.columns:
+            if c in skip or c in changed:
+                continue
+            before = df[c].dtype
+            df[c] = downcast_numeric(df[c])
+            if df[c].dtype != before:
+                changed[c] = str(df[c].dtype)
+
+    return df, changed
+
+
+def is_integer_type(t) -> bool:
+    """Integer column type of a csv_reader scan (pyarrow DataType, or numpy dtype without pyarrow)."""
+    if isinstance(t, np.dtype):
+        return t.kind == "i"
+    import pyarrow as pa
+
+    return pa.types.is_integer(t)
+
+
+def streaming_parquet_schema(chunk: pd.DataFrame, category_cols: list[str]):
+    """
+    Parquet schema of a streamed table, fixed before the first row group.
+    Column dtypes already come from the whole-file scan (read_csv_chunks) and ids from
+    id_int_cols; what a single chunk could still get wrong is pinned here:
+      - category columns: int32 dictionary indices (a later chunk may hold more values)
+      - ship_lead_days: int64 (pandas makes it float64 only in chunks with a missing date)
+    """
+    import pyarrow as pa
+
+    schema = pa.Schema.from_pandas(chunk, preserve_index=False)
+    for i, f in enumerate(schema):
+        if f.name in category_cols:
+            schema = schema.set(i, f.with_type(pa.dictionary(pa.int32(), f.type.value_type)))
+        elif f.name == "ship_lead_days":
+            schema = schema.set(i, f.with_type(pa.int64()))
+    return schema
+
+
+def require_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise SystemExit("Missing dependency pyarrow (needed for --parquet). Run: pip install pyarrow") from e
+    return pq
+
+
+def standardize_table(
+    df: pd.DataFrame,
+    table_name: str,
+    *,
+    pinned_formats: dict[str, str | None] | None = None,
+) -> tuple[pd.DataFrame, dict]:
     """
     Apply:
       - snake_case columns
@@ -231,6 +490,9 @@ def standardize_table(df: pd.DataFrame, table_name: str) -> tuple[pd.DataFrame,
       - parse *_date using mm-dd-yyyy -> datetime
       - small safe imputations (products.color)
       - orders temporal anomaly flag + lead days
+    Takes ownership of `df`: every stage works in place (no per-stage copies),
+    so callers must not reuse the raw frame afterwards.
+    pinned_formats: see parse_date_columns (keeps chunks of one table consistent).
     """
     metrics: dict = {}
 
@@ -242,7 +504,9 @@ def standardize_table(df: pd.DataFrame, table_name: str) -> tuple[pd.DataFrame,
     metrics["id_cols_count"] = len(id_cols)
 
     # Date parse
-    df2, date_cols, invalid_counts = parse_date_columns(df2, raw_format=RAW_DATE_FORMAT)
+    df2, date_cols, invalid_counts = parse_date_columns(
+        df2, raw_format=RAW_DATE_FORMAT, pinned_formats=pinned_formats
+    )
     metrics["date_cols"] = date_cols
     metrics["date_cols_count"] = len(date_cols)
     metrics["invalid_date_counts"] = invalid_counts
@@ -257,6 +521,9 @@ def standardize_table(df: pd.DataFrame, table_name: str) -> tuple[pd.DataFrame,
     df2, orders_metrics = add_orders_temporal_flags(df2, table_name)
     metrics.update(orders_metrics)
 
+    metrics["rows"] = int(len(df2))
+    metrics["cols"] = int(df2.shape[1])
+
     return df2, metrics
 
 
@@ -271,52 +538,270 @@ def list_raw_csv_files(raw_dir: Path = RAW_DIR) -> list[Path]:
     return [p for p in files if p.name.lower() in only]
 
 
-def load_all_raw_tables(raw_dir: Path = RAW_DIR) -> tuple[dict[str, pd.DataFrame], dict[str, str]]:
+def ensure_dirs(*dirs: Path) -> None:
+    for d in dirs or (OUT_DIR, ARTIFACT_DIR):
+        d.mkdir(parents=True, exist_ok=True)
+
+
+def save_cleaned_table(table_name: str, df: pd.DataFrame, *, out_dir: Path = OUT_DIR) -> Path:
     """
-    Returns:
-      tables: {snake_table_name: df_raw}
-      enc_used: {snake_table_name: encoding_str}
+    Save one standardized df to cleaned_data/{table}.csv using UTF-8 and ISO date format.
     """
-    tables: dict[str, pd.DataFrame] = {}
-    enc_used: dict[str, str] = {}
+    ensure_dirs(out_dir)
+    out_path = out_dir / f"{table_name}.csv"
+    df.to_csv(out_path, index=False, encoding="utf-8", date_format=OUTPUT_DATE_FORMAT)
+    return out_path
 
-    for csv_path in list_raw_csv_files(raw_dir):
-        table_name = camel_to_snake(csv_path.stem)
-        df, enc = read_csv_smart(csv_path)
-        tables[table_name] = df
-        enc_used[table_name] = enc
 
-    return tables, enc_used
+def peak_delta_mb(peak: float | None, start: float | None) -> float | None:
+    """
+    Peak over the RSS the job started with: the table's own footprint, even when the
+    allocator keeps earlier tables' memory (RSS at the start grows table by table).
+    """
+    if peak is None or start is None:
+        return None
+    return round(max(peak - start, 0.0), 2)
+
+
+def frame_info(df: pd.DataFrame, title: str) -> str:
+    """df.info() as text: returned with the metrics and printed by the parent, so the
+    outputs of parallel workers never interleave."""
+    buf = io.StringIO()
+    df.info(buf=buf)
+    return f"\n{title}\n{buf.getvalue().rstrip()}"
+
+
+def clean_one_table(
+    csv_path: Path,
+    *,
+    out_dir: Path = OUT_DIR,
+    show_info: bool = True,
+    compact: bool = False,
+    parquet: bool = False,
+) -> tuple[str, str, dict, pd.DataFrame | None]:
+    """
+    Read -> standardize -> save one raw CSV -> (compact -> Parquet), measuring peak RSS.
+    The raw frame is handed over to standardize_table and dropped right after.
+    The CSV is always written from the standardized frame (ids keep their raw text,
+    e.g. "1.0"); compact dtypes only shape the Parquet file and the df.info() printout.
+    parquet=True also writes cleaned_data/{table}.parquet (implies compact).
+    Returns (table_name, encoding, metrics, orders anomaly sample or None).
+    """
+    table_name = camel_to_snake(csv_path.stem)
+    scoped = reset_peak_rss()
+    rss_start = rss_mb()
+
+    df, enc = read_csv_smart(csv_path)
+    df, metrics = standardize_table(df, table_name)
+    save_cleaned_table(table_name, df, out_dir=out_dir)
+    if compact or parquet:
+        df, metrics["compact_dtypes"] = compact_dtypes(df, metrics["id_cols"], metrics["date_cols"])
+    if show_info:
+        metrics["info"] = frame_info(df, f"=== {table_name} ===")
+    if parquet:
+        pq = require_pyarrow()
+        import pyarrow as pa
+
+        pq.write_table(pa.Table.from_pandas(df, preserve_index=False), out_dir / f"{table_name}.parquet")
+
+    peek = None
+    if "is_orderdate_gt_shipdate" in df.columns:
+        peek = df.loc[df["is_orderdate_gt_shipdate"] == True, ["order_id", "order_date", "ship_date", "ship_lead_days"]].head(10)
+    del df
+
+    # When VmHWM could not be reset (no /proc, or the reset did not take) this is the
+    # process high-water mark so far, not the table's own peak
+    metrics["peak_rss_mb"] = peak_rss_mb()
+    metrics["peak_rss_scope"] = "table" if scoped else "process"
+    metrics["peak_rss_delta_mb"] = peak_delta_mb(metrics["peak_rss_mb"], rss_start)
+
+    return table_name, enc, metrics, peek
+
+
+def merge_chunk_metrics(acc: dict, m: dict) -> dict:
+    """
+    Merge one chunk's metrics into the table total (streaming mode).
+    Column lists come from the first chunk; counts are summed.
+    """
+    if not acc:
+        acc.update(m)
+        acc["invalid_date_counts"] = dict(m.get("invalid_date_counts", {}))
+        acc["imputed_string_counts"] = dict(m.get("imputed_string_counts", {}))
+        return acc
+
+    for key in ("rows", "invalid_date_total", "imputed_string_total", "orderdate_gt_shipdate_cnt"):
+        if key in m:
+            acc[key] = int(acc.get(key, 0)) + int(m[key])
+    for key in ("invalid_date_counts", "imputed_string_counts"):
+        for col, cnt in m.get(key, {}).items():
+            acc[key][col] = int(acc[key].get(col, 0)) + int(cnt)
+    return acc
+
+
+def decide_date_formats(scan: CsvScan) -> dict[str, str | None]:
+    """
+    Date formats for the whole table, from the distinct date strings counted by scan_csv:
+    the same decision parse_date_series makes on the whole column in batch mode.
+    Columns without any value are left out (each chunk parses them to NaT).
+    """
+    pinned: dict[str, str | None] = {}
+    formats = common_date_formats(RAW_DATE_FORMAT)
+    for raw_col, counts in scan.value_counts.items():
+        if counts.empty:
+            continue
+        u_str = pd.Index(counts.index).astype("string").str.strip()
+        weights = counts.to_numpy(dtype=np.int64)
+        fmt, _ = choose_date_format(
+            u_str, weights, int(weights.sum()), raw_format=RAW_DATE_FORMAT, formats=formats
+        )
+        pinned[camel_to_snake(raw_col)] = fmt
+    return pinned
+
+
+def clean_one_table_streaming(
+    csv_path: Path,
+    *,
+    chunksize: int,
+    out_dir: Path = OUT_DIR,
+    show_info: bool = True,
+    compact: bool = False,
+    parquet: bool = False,
+) -> tuple[str, str, dict, pd.DataFrame | None]:
+    """
+    Streaming variant of clean_one_table: read `chunksize` rows, standardize,
+    append to cleaned_data/{table}.csv; memory is bounded by one chunk.
+    The CSV is byte-identical to the batch one (--check-batch verifies it):
+    - a first streaming pass (scan_csv) settles the encoding, the column dtypes the
+      batch reader infers for the whole file, and the date formats chosen on the
+      whole date columns; every chunk is read and parsed with those
+    - per-chunk metrics are merged into one report row
+    With parquet=True, chunks are compacted after their CSV rows are written and
+    appended as row groups of one Parquet file whose schema is fixed up front
+    (see streaming_parquet_schema; numerics are not downcast).
+    """
+    table_name = camel_to_snake(csv_path.stem)
+    scoped = reset_peak_rss()
+    rss_start = rss_mb()
+    ensure_dirs(out_dir)
+
+    scan = scan_csv(csv_path, string_columns=is_raw_date_column, count_values=is_raw_date_column)
+    enc = scan.encoding
+    out_path = out_dir / f"{table_name}.csv"
+    metrics: dict = {}
+    pinned_formats = decide_date_formats(scan)
+    peek_parts: list[pd.DataFrame] = []
+    peek_rows = 0
+    chunks = 0
+    category_cols: list[str] | None = None
+    # integral ids for the whole file (arrow typed them int64), not per chunk
+    id_int_cols = [camel_to_snake(c) for c, t in scan.types.items() if is_integer_type(t)]
+    pq_writer = None
+    pq_schema = None
+
+    for chunk in read_csv_chunks(csv_path, chunksize, scan=scan):
+        chunk, m = standardize_table(chunk, table_name, pinned_formats=pinned_formats)
+        chunk.to_csv(
+            out_path,
+            mode="w" if chunks == 0 else "a",
+            header=chunks == 0,
+            index=False,
+            encoding="utf-8",
+            date_format=OUTPUT_DATE_FORMAT,
+        )
+        if compact or parquet:
+            chunk, changed = compact_dtypes(
+                chunk, m["id_cols"], m["date_cols"],
+                downcast=False, category_cols=category_cols, id_int_cols=id_int_cols,
+            )
+            if category_cols is None:
+                category_cols = [c for c, dt in changed.items() if dt == "category"]
+                m["compact_dtypes"] = changed
+        if show_info and chunks == 0:
+            m["info"] = frame_info(chunk, f"=== {table_name} (first chunk) ===")
+        if parquet:
+            pq = require_pyarrow()
+            import pyarrow as pa
+
+            if pq_writer is None:
+                pq_schema = streaming_parquet_schema(chunk, category_cols)
+                pq_writer = pq.ParquetWriter(out_dir / f"{table_name}.parquet", pq_schema)
+            pq_writer.write_table(pa.Table.from_pandas(chunk, schema=pq_schema, preserve_index=False))
+        merge_chunk_metrics(metrics, m)
+        chunks += 1
+
+        if peek_rows < 10 and "is_orderdate_gt_shipdate" in chunk.columns:
+            part = chunk.loc[chunk["is_orderdate_gt_shipdate"] == True, ["order_id", "order_date", "ship_date", "ship_lead_days"]].head(10 - peek_rows)
+            peek_parts.append(part)
+            peek_rows += len(part)
+        del chunk
+
+    if pq_writer is not None:
+        pq_writer.close()
+    metrics["chunks"] = chunks
+    metrics["date_formats"] = pinned_formats
+    metrics["peak_rss_mb"] = peak_rss_mb()
+    metrics["peak_rss_scope"] = "table" if scoped else "process"
+    metrics["peak_rss_delta_mb"] = peak_delta_mb(metrics["peak_rss_mb"], rss_start)
+    peek = pd.concat(peek_parts) if peek_parts else None
+    return table_name, enc, metrics, peek
+
+
+def clean_table_job(
+    csv_path: Path,
+    chunksize: int | None,
+    out_dir: Path,
+    show_info: bool,
+    compact: bool = False,
+    parquet: bool = False,
+) -> tuple[str, str, dict, pd.DataFrame | None]:
+    """
+    One unit of work (also the process-pool entry point): read, standardize and
+    write one table. Only metrics (+ a tiny anomaly sample) travel back to the parent.
+    """
+    opts = dict(out_dir=out_dir, show_info=show_info, compact=compact, parquet=parquet)
+    t0, c0 = time.perf_counter(), time.process_time()
+    with copy_on_write():
+        if chunksize:
+            result = clean_one_table_streaming(csv_path, chunksize=chunksize, **opts)
+        else:
+            result = clean_one_table(csv_path, **opts)
+    metrics = result[2]
+    metrics["wall_s"] = round(time.perf_counter() - t0, 4)
+    metrics["cpu_s"] = round(time.process_time() - c0, 4)
+    metrics["bytes_read"] = csv_path.stat().st_size
+    return result
+
 
+def check_against_batch(csv_files: list[Path], out_dir: Path) -> list[str]:
+    """Tables whose streamed CSV is not byte-identical to a batch clean of the same raw file."""
+    import filecmp
+    import tempfile
 
-def ensure_dirs() -> None:
-    OUT_DIR.mkdir(parents=True, exist_ok=True)
-    ARTIFACT_DIR.mkdir(parents=True, exist_ok=True)
+    differ: list[str] = []
+    with tempfile.TemporaryDirectory(prefix="cleaning_batch_") as tmp:
+        for csv_path in csv_files:
+            table_name = clean_table_job(csv_path, None, Path(tmp), False)[0]
+            if not filecmp.cmp(out_dir / f"{table_name}.csv", Path(tmp) / f"{table_name}.csv", shallow=False):
+                differ.append(table_name)
+    return differ
 
 
-def save_cleaned_tables(tables: dict[str, pd.DataFrame], *, out_dir: Path = OUT_DIR) -> None:
-    """
-    Save each standardized df to cleaned_data/{table}.csv using UTF-8 and ISO date format.
-    """
-    ensure_dirs()
-    for table_name, df in tables.items():
-        out_path = out_dir / f"{table_name}.csv"
-        df.to_csv(out_path, index=False, encoding="utf-8", date_format=OUTPUT_DATE_FORMAT)
+def schedule_largest_first(csv_files: list[Path]) -> list[Path]:
+    """Longest jobs first so one big table does not start last and dominate wall time."""
+    return sorted(csv_files, key=lambda p: p.stat().st_size, reverse=True)
 
 
 def build_cleaning_report(
-    std_tables: dict[str, pd.DataFrame],
     metrics_map: dict[str, dict],
     enc_used: dict[str, str],
 ) -> pd.DataFrame:
     rows = []
-    for table_name, df in std_tables.items():
-        m = metrics_map.get(table_name, {})
+    for table_name, m in metrics_map.items():
         rows.append(
             {
                 "table": table_name,
-                "rows": int(len(df)),
-                "cols": int(df.shape[1]),
+                "rows": int(m.get("rows", 0)),
+                "cols": int(m.get("cols", 0)),
                 "source_encoding": enc_used.get(table_name, ""),
                 "id_cols_count": int(m.get("id_cols_count", 0)),
                 "id_cols": ",".join(m.get("id_cols", [])),
@@ -326,54 +811,145 @@ def build_cleaning_report(
                 "imputed_string_total": int(m.get("imputed_string_total", 0)),
                 "imputed_string_counts": str(m.get("imputed_string_counts", {})),
                 "orderdate_gt_shipdate_cnt": int(m.get("orderdate_gt_shipdate_cnt", 0)),
+                "peak_rss_mb": m.get("peak_rss_mb", ""),
+                "peak_rss_scope": m.get("peak_rss_scope", ""),
+                "peak_rss_delta_mb": m.get("peak_rss_delta_mb", ""),
             }
         )
     return pd.DataFrame(rows).sort_values(["table"]).reset_index(drop=True)
 
 
-def save_cleaning_report(report_df: pd.DataFrame) -> Path:
-    ensure_dirs()
-    out_path = ARTIFACT_DIR / "cleaning_report.csv"
+def save_cleaning_report(report_df: pd.DataFrame, *, artifact_dir: Path = ARTIFACT_DIR) -> Path:
+    ensure_dirs(artifact_dir)
+    out_path = artifact_dir / "cleaning_report.csv"
     report_df.to_csv(out_path, index=False, encoding="utf-8")
     return out_path
 
 
-def print_table_infos(tables: dict[str, pd.DataFrame]) -> None:
-    for table_name, df in tables.items():
-        print(f"\n=== {table_name} ===")
-        df.info()
-
-
-def main() -> None:
-    raw_tables, enc_used = load_all_raw_tables(RAW_DIR)
-    print(f"Loaded {len(raw_tables)} tables from: {RAW_DIR.resolve()}")
-    print("Tables:", ", ".join(raw_tables.keys()))
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(description="Clean raw_data/*.csv into cleaned_data/*.csv")
+    ap.add_argument(
+        "--jobs",
+        type=int,
+        default=JOBS,
+        help="Clean N tables in parallel worker processes (default: 1)",
+    )
+    ap.add_argument(
+        "--info",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Print df.info() per cleaned table, one table at a time also with --jobs (--no-info to skip)",
+    )
+    ap.add_argument(
+        "--compact",
+        action="store_true",
+        help="Compact dtypes (Parquet / df.info() only; the CSV keeps the standardized text): "
+        "integral ids as Int64, low-cardinality text as category, downcast numerics",
+    )
+    ap.add_argument(
+        "--parquet",
+        action="store_true",
+        help="Also write cleaned_data/{table}.parquet with the compact dtypes + parsed dates (needs pyarrow)",
+    )
+    ap.add_argument(
+        "--chunksize",
+        type=int,
+        default=CHUNKSIZE,
+        help="Streaming mode: process each table in chunks of N rows (default: whole table)",
+    )
+    ap.add_argument(
+        "--check-batch",
+        action="store_true",
+        help="With --chunksize: also clean every table in batch mode (temp folder) and fail unless the CSVs are byte-identical",
+    )
+    ap.add_argument("--raw-dir", type=Path, default=RAW_DIR, help="Folder of raw *.csv (default: raw_data)")
+    ap.add_argument("--out-dir", type=Path, default=OUT_DIR, help="Folder for cleaned tables")
+    ap.add_argument("--artifact-dir", type=Path, default=ARTIFACT_DIR, help="Folder for cleaning_report.csv")
+    ap.add_argument("--summary", action="store_true", help="Print the per-table timing / memory summary at the end")
+    return ap.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    out_dir = args.out_dir
+    csv_files = list_raw_csv_files(args.raw_dir)
+    print(f"Found {len(csv_files)} tables in: {args.raw_dir.resolve()}")
+    print("Tables:", ", ".join(camel_to_snake(p.stem) for p in csv_files))
+    if args.chunksize:
+        print(f"Streaming mode: chunksize={args.chunksize:,}")
+    if args.jobs > 1:
+        print(f"Parallel mode: jobs={args.jobs}")
+    if args.parquet:
+        require_pyarrow()  # fail before any work
 
-    std_tables: dict[str, pd.DataFrame] = {}
     metrics_map: dict[str, dict] = {}
-
-    for table_name, df in raw_tables.items():
-        df_std, metrics = standardize_table(df, table_name)
-        std_tables[table_name] = df_std
+    enc_used: dict[str, str] = {}
+    orders_peek: pd.DataFrame | None = None
+    run = RunLog("01_cleaning")
+
+    def collect(result: tuple[str, str, dict, pd.DataFrame | None]) -> None:
+        nonlocal orders_peek
+        table_name, enc, metrics, peek = result
+        if "info" in metrics:
+            print(metrics.pop("info"))
         metrics_map[table_name] = metrics
+        enc_used[table_name] = enc
+        if table_name == "orders":
+            orders_peek = peek
+        print(
+            f"  - {table_name}: rows={metrics['rows']:,} "
+            f"peak_rss={metrics['peak_rss_mb']} MB ({metrics['peak_rss_scope']}, "
+            f"+{metrics['peak_rss_delta_mb']} MB over start)"
+        )
+        run.record(
+            f"clean {table_name}",
+            parent="clean",
+            rows=metrics["rows"],
+            bytes_read=metrics["bytes_read"],
+            wall_s=metrics["wall_s"],
+            cpu_s=metrics["cpu_s"],
+            peak_rss_mb=metrics["peak_rss_mb"],
+            peak_rss_scope=metrics["peak_rss_scope"],
+            peak_rss_delta_mb=metrics["peak_rss_delta_mb"],
+        )
 
-    # Print df.info() for each table
-    print_table_infos(std_tables)
-
-    # Save cleaned CSVs + report
-    save_cleaned_tables(std_tables, out_dir=OUT_DIR)
-    print(f"\nSaved cleaned CSVs to: {OUT_DIR.resolve()}")
-
-    report_df = build_cleaning_report(std_tables, metrics_map, enc_used)
-    report_path = save_cleaning_report(report_df)
+    with run.stage("clean", jobs=args.jobs, chunksize=args.chunksize) as st:
+        if args.jobs > 1:
+            # Tables are independent: each worker reads, standardizes and writes its own table
+            with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+                futures = [
+                    pool.submit(clean_table_job, p, args.chunksize, out_dir, args.info, args.compact, args.parquet)
+                    for p in schedule_largest_first(csv_files)
+                ]
+                for fut in as_completed(futures):
+                    collect(fut.result())
+        else:
+            # One table at a time: raw + standardized frames never outlive their table
+            for csv_path in csv_files:
+                collect(clean_table_job(csv_path, args.chunksize, out_dir, args.info, args.compact, args.parquet))
+        st.rows = sum(m["rows"] for m in metrics_map.values())
+        st.bytes_read = sum(m["bytes_read"] for m in metrics_map.values())
+
+    print(f"\nSaved cleaned CSVs to: {out_dir.resolve()}")
+
+    if args.check_batch and args.chunksize:
+        differ = check_against_batch(csv_files, out_dir)
+        if differ:
+            print(f"[FAIL] streamed CSV differs from batch output: {', '.join(differ)}")
+            raise SystemExit(1)
+        print(f"[OK] streamed CSVs are byte-identical to batch output ({len(csv_files)} tables)")
+
+    report_df = build_cleaning_report(metrics_map, enc_used)
+    report_path = save_cleaning_report(report_df, artifact_dir=args.artifact_dir)
     print(f"Saved cleaning report to: {report_path.resolve()}")
 
     # Quick peek
-    if "orders" in std_tables:
+    if orders_peek is not None:
         print("\n--- orders temporal anomalies (sample) ---")
-        od = std_tables["orders"]
-        if "is_orderdate_gt_shipdate" in od.columns:
-            print(od.loc[od["is_orderdate_gt_shipdate"] == True, ["order_id", "order_date", "ship_date", "ship_lead_days"]].head(10))
+        print(orders_peek)
+
+    if args.summary:
+        run.print_summary()
 
 
 if __name__ == "__main__":
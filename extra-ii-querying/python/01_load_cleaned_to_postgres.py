@@ -4,142 +4,116 @@
 Load cleaned CSV files from extra-i-cleaning/cleaned_data into Postgres.
 
 Key features:
-- Reads .env from project root automatically (no human error).
+- Connection settings come from python/pgdb.py (env vars, then .env at project root;
+  PGDATABASE is the target, PGDB still accepted as an alias).
 - Default schema = clean (override with --schema).
-- Auto-adjust chunksize to avoid Postgres bind-parameter limit (65535).
+- Default --method copy: streams each CSV file straight into Postgres with
+  COPY ... FROM STDIN (no pandas, no bind-parameter limit).
+- Default --types infer (copy only): column types come from the cleaning
+  report (id_cols/date_cols) + one scan of the CSV (ids -> bigint,
+  dates -> date, prices -> numeric, True/False -> boolean, else text).
+  Rows are COPY'd into a text staging table and cast on INSERT; then the
+  primary key + FK-column indexes (+ orders.order_date for the summary
+  refresh) are built and the table is ANALYZEd.
+- --if-exists swap (copy only): each table is loaded + indexed as
+  <table>__shadow, then swapped in with drop/rename in one short
+  transaction, so readers never see an empty or half-loaded table.
+- --workers N: load N tables at a time over a pool of connections.
+- --method multi: legacy pandas to_sql(method="multi") path; chunksize is
+  auto-adjusted to avoid the Postgres bind-parameter limit (65535).
 - Supports --skip and --only.
-- Uses SQLAlchemy + psycopg driver.
+- --method copy uses a psycopg connection pool (one connection per worker);
+  SQLAlchemy is only needed for --method multi.
+- --refresh-summary (default auto): once orders / order_details / payments are
+  loaded, installs extra-ii-querying/sql/02_summary_tables.sql and refreshes
+  the summary.* tables. The summaries need typed tables: auto refreshes only
+  after a --method copy --types infer load (text / multi loads: skipped with
+  a notice), with the order_ids an append load inserted (collected from the
+  INSERT), else a full rebuild; full = always rebuild; off = leave them alone.
 """
 
 from __future__ import annotations
 
 import argparse
 import csv
-import os
+import re
 import sys
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional, Tuple
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
 
-import pandas as pd
-from sqlalchemy import create_engine, text
-from sqlalchemy.engine import Engine
+from psycopg import sql as psql
 
+# Shared helpers live in <root>/python (pgdb.py, instrument.py)
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "python"))
+import pgdb  # noqa: E402
+from instrument import RunLog  # noqa: E402
 
-# -----------------------------
-# Paths / Env
-# -----------------------------
-
-def project_root() -> Path:
-    # file: <root>/extra-ii-querying/python/01_load_cleaned_to_postgres.py
-    # parents[0]=python, parents[1]=extra-ii-querying, parents[2]=root
-    return Path(__file__).resolve().parents[2]
+if TYPE_CHECKING:
+    from psycopg_pool import ConnectionPool
+    from sqlalchemy.engine import Engine
 
 
-def read_dotenv(dotenv_path: Path) -> Dict[str, str]:
-    """
-    Minimal .env parser (no dependency on python-dotenv).
-    Supports lines like KEY=VALUE, ignores comments and blanks.
-    """
-    env: Dict[str, str] = {}
-    if not dotenv_path.exists():
-        return env
+# Bytes per COPY write
+COPY_BLOCK_SIZE = 1 << 20
 
-    for raw in dotenv_path.read_text(encoding="utf-8").splitlines():
-        line = raw.strip()
-        if not line or line.startswith("#"):
-            continue
-        if "=" not in line:
-            continue
-        k, v = line.split("=", 1)
-        k = k.strip()
-        v = v.strip().strip('"').strip("'")
-        if k:
-            env[k] = v
-    return env
+# Shadow-table swap
+SHADOW_SUFFIX = "__shadow"
+SWAP_LOCK_TIMEOUT = "30s"  # give up (shadow kept, live table untouched) if readers hold the lock longer
 
+# Type inference (values as written by extra-i-cleaning)
+INT_RE = re.compile(r"^[+-]?\d{1,18}$")
+INTEGRAL_RE = re.compile(r"^[+-]?\d{1,18}\.0*$")  # "1.0": ids that went through float
+NUMERIC_RE = re.compile(r"^[+-]?(?=\.?\d)(\d{1,3}(,\d{3})+|\d*)(\.\d*)?([eE][+-]?\d+)?$")
+DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+BOOL_VALUES = {"true", "false"}
 
-def get_env_value(key: str, dotenv: Dict[str, str], default: Optional[str] = None) -> Optional[str]:
-    return os.environ.get(key) or dotenv.get(key) or default
+# Picked in this order when several types fit every value
+TYPE_PRIORITY = ["boolean", "bigint", "date", "numeric"]
 
+# Summary tables (sql/02_summary_tables.sql): source tables and their key
+SUMMARY_SOURCES = {"orders", "order_details", "payments"}
+SUMMARY_KEY = "order_id"
 
-@dataclass
-class PgConfig:
-    host: str
-    port: int
-    user: str
-    password: str
-    maintdb: str
-    db: str
+# Non-key columns indexed on typed loads: the summary refresh looks orders up by day
+LOOKUP_INDEX_COLS: Dict[str, List[str]] = {"orders": ["order_date"]}
 
-    def sqlalchemy_url(self, db_override: Optional[str] = None) -> str:
-        database = db_override or self.db
-        # SQLAlchemy 2 + psycopg (v3)
-        return f"postgresql+psycopg://{self.user}:{self.password}@{self.host}:{self.port}/{database}"
 
+# -----------------------------
+# Paths
+# -----------------------------
 
-def load_pg_config() -> PgConfig:
-    root = project_root()
-    dotenv_path = root / ".env"
-    dotenv = read_dotenv(dotenv_path)
-
-    host = get_env_value("PGHOST", dotenv, "localhost")
-    port = int(get_env_value("PGPORT", dotenv, "5432") or "5432")
-    user = get_env_value("PGUSER", dotenv, "postgres")
-    password = get_env_value("PGPASSWORD", dotenv, "")
-    maintdb = get_env_value("PGMAINTDB", dotenv, "postgres")
-    db = get_env_value("PGDB", dotenv, "")
-
-    if not password:
-        raise RuntimeError("PGPASSWORD is empty. Please set it in .env (PGPASSWORD=...).")
-    if not db:
-        raise RuntimeError("PGDB is empty. Please set it in .env (PGDB=...).")
-
-    return PgConfig(
-        host=host,
-        port=port,
-        user=user,
-        password=password,
-        maintdb=maintdb,
-        db=db,
-    )
+def project_root() -> Path:
+    # file: <root>/extra-ii-querying/python/01_load_cleaned_to_postgres.py
+    # parents[0]=python, parents[1]=extra-ii-querying, parents[2]=root
+    return Path(__file__).resolve().parents[2]
 
 
 # -----------------------------
 # Postgres helpers
 # -----------------------------
 
-def ensure_database_exists(cfg: PgConfig) -> None:
+def ensure_database_exists(cfg: pgdb.PgConfig) -> None:
     """
     Optional safety: create target DB if missing.
     If user doesn't have privilege, it will just fail silently with a clear message.
     """
-    url = cfg.sqlalchemy_url(cfg.maintdb)
-    engine = create_engine(url, pool_pre_ping=True)
     try:
-        with engine.begin() as conn:
-            exists = conn.execute(
-                text("select 1 from pg_database where datname = :db"),
-                {"db": cfg.db},
-            ).scalar()
-            if not exists:
-                conn.execute(text(f'create database "{cfg.db}"'))
-                print(f"[OK] created database: {cfg.db}")
+        with pgdb.connect(cfg, dbname=cfg.maintdb, autocommit=True) as con:
+            with con.cursor() as cur:
+                cur.execute("select 1 from pg_database where datname = %s", (cfg.dbname,))
+                if cur.fetchone() is None:
+                    cur.execute(psql.SQL("create database {}").format(psql.Identifier(cfg.dbname)))
+                    print(f"[OK] created database: {cfg.dbname}")
     except Exception as e:
         # Not fatal; maybe DB already exists or no privilege.
         print(f"[WARN] ensure_database_exists skipped/failed: {e}")
-    finally:
-        engine.dispose()
-
-
-def make_engine(cfg: PgConfig) -> Engine:
-    url = cfg.sqlalchemy_url(cfg.db)
-    return create_engine(url, pool_pre_ping=True)
 
 
-def ensure_schema(engine: Engine, schema: str) -> None:
-    with engine.begin() as conn:
-        conn.execute(text(f'create schema if not exists "{schema}"'))
+def ensure_schema(pool: "ConnectionPool", schema: str) -> None:
+    with pool.connection() as con:
+        con.execute(psql.SQL("create schema if not exists {}").format(psql.Identifier(schema)))
 
 
 # -----------------------------
@@ -170,21 +144,330 @@ def safe_chunksize(requested: int, ncols: int, bind_limit: int = 65535) -> int:
     return max(1, min(requested, max_rows))
 
 
+def read_csv_header(csv_path: Path) -> List[str]:
+    with csv_path.open("r", encoding="utf-8", newline="") as f:
+        return next(csv.reader(f), [])
+
+
+# -----------------------------
+# Schema inference (typed clean.* tables)
+# -----------------------------
+
+@dataclass
+class TableSpec:
+    table: str
+    columns: List[Tuple[str, str]]  # (column, pg type)
+    primary_key: Optional[str] = None
+    index_cols: List[str] = field(default_factory=list)
+
+
+def load_cleaning_report(report_path: Path) -> Dict[str, Tuple[List[str], List[str]]]:
+    """cleaning_report.csv -> {table: (id_cols, date_cols)}; {} if the report is missing."""
+    out: Dict[str, Tuple[List[str], List[str]]] = {}
+    if not report_path.exists():
+        return out
+
+    def split(v: str) -> List[str]:
+        return [c.strip() for c in (v or "").split(",") if c.strip()]
+
+    with report_path.open("r", encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            out[row["table"]] = (split(row.get("id_cols", "")), split(row.get("date_cols", "")))
+    return out
+
+
+def value_fits(pg_type: str, v: str, is_id: bool) -> bool:
+    if pg_type == "boolean":
+        return v.lower() in BOOL_VALUES
+    if pg_type == "bigint":
+        return bool(INT_RE.match(v) or (is_id and INTEGRAL_RE.match(v)))
+    if pg_type == "date":
+        return bool(DATE_RE.match(v))
+    if pg_type == "numeric":
+        return bool(NUMERIC_RE.match(v))
+    return True
+
+
+def infer_table_spec(
+    csv_path: Path,
+    id_cols: Optional[List[str]] = None,
+    date_cols: Optional[List[str]] = None,
+) -> TableSpec:
+    """
+    One pass over the cleaned CSV; every column keeps the types all its non-empty values fit.
+    - id_cols (report; fallback *_id like the cleaning step) may hold "1.0" -> bigint
+    - date_cols (report) must still parse as ISO dates, else they fall back like any column
+    - Primary key = first column if it is an id that is bigint, non-null and unique
+    - Other id columns (FKs) and the LOOKUP_INDEX_COLS of the table get a plain btree index
+    """
+    table = table_name_from_csv(csv_path)
+    with csv_path.open("r", encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        ids = set(id_cols) if id_cols is not None else {c for c in header if c.endswith("_id")}
+        dates = set(date_cols or [])
+
+        candidates = [set(TYPE_PRIORITY) for _ in header]
+        for i, c in enumerate(header):
+            if c in dates:
+                candidates[i] = {"date"}
+        seen_any = [False] * len(header)
+        first_values: set = set()
+        first_unique = bool(header) and header[0] in ids
+
+        for row in reader:
+            for i, v in enumerate(row[: len(header)]):
+                if v == "":
+                    if i == 0:
+                        first_unique = False
+                    continue
+                seen_any[i] = True
+                cand = candidates[i]
+                if cand:
+                    for t in [t for t in cand if not value_fits(t, v, header[i] in ids)]:
+                        cand.discard(t)
+                if i == 0 and first_unique:
+                    key = v.split(".", 1)[0]
+                    if key in first_values:
+                        first_unique = False
+                        first_values.clear()
+                    else:
+                        first_values.add(key)
+
+    columns: List[Tuple[str, str]] = []
+    for c, cand, seen in zip(header, candidates, seen_any):
+        pg_type = next((t for t in TYPE_PRIORITY if t in cand), "text") if seen else "text"
+        columns.append((c, pg_type))
+
+    pk = header[0] if first_unique and columns[0][1] == "bigint" else None
+    return TableSpec(
+        table=table,
+        columns=columns,
+        primary_key=pk,
+        index_cols=[c for c in header if (c in ids and c != pk) or c in LOOKUP_INDEX_COLS.get(table, [])],
+    )
+
+
+def cast_expr(col: str, pg_type: str) -> psql.Composable:
+    """Staging TEXT -> typed value."""
+    c = psql.Identifier(col)
+    if pg_type == "bigint":
+        return psql.SQL("{}::numeric::bigint").format(c)
+    if pg_type == "numeric":
+        return psql.SQL("replace({}, ',', '')::numeric").format(c)
+    if pg_type in ("date", "boolean"):
+        return psql.SQL("{}::" + pg_type).format(c)
+    return c
+
+
+def create_table_sql(target: psql.Composable, columns: List[Tuple[str, str]]) -> psql.Composable:
+    return psql.SQL("create table {} ({})").format(
+        target,
+        psql.SQL(", ").join(psql.SQL("{} " + t).format(psql.Identifier(c)) for c, t in columns),
+    )
+
+
+def pkey_name(table: str) -> str:
+    return f"{table}_pkey"
+
+
+def index_name(table: str, col: str) -> str:
+    return f"ix_{table}__{col}"
+
+
+def build_indexes(cur, schema: str, table: str, spec: TableSpec, add_pk: bool) -> None:
+    target = psql.Identifier(schema, table)
+    if add_pk and spec.primary_key:
+        cur.execute(
+            psql.SQL("alter table {} add constraint {} primary key ({})").format(
+                target, psql.Identifier(pkey_name(table)), psql.Identifier(spec.primary_key)
+            )
+        )
+    for c in spec.index_cols:
+        cur.execute(
+            psql.SQL("create index if not exists {} on {} ({})").format(
+                psql.Identifier(index_name(table, c)), target, psql.Identifier(c)
+            )
+        )
+
+
+def shadow_table_name(table: str) -> str:
+    return f"{table}{SHADOW_SUFFIX}"
+
+
+def swap_in_shadow(cur, schema: str, table: str, spec: Optional[TableSpec]) -> None:
+    """
+    One short transaction (caller commits): drop live table, rename shadow (+ its
+    PK constraint / indexes) to the live names. Readers block only for this step.
+    """
+    shadow = shadow_table_name(table)
+    cur.execute("select set_config('lock_timeout', %s, true)", (SWAP_LOCK_TIMEOUT,))
+    cur.execute(psql.SQL("drop table if exists {}").format(psql.Identifier(schema, table)))
+    cur.execute(
+        psql.SQL("alter table {} rename to {}").format(psql.Identifier(schema, shadow), psql.Identifier(table))
+    )
+    if spec is None:
+        return
+    if spec.primary_key:
+        cur.execute(
+            psql.SQL("alter table {} rename constraint {} to {}").format(
+                psql.Identifier(schema, table), psql.Identifier(pkey_name(shadow)), psql.Identifier(pkey_name(table))
+            )
+        )
+    for c in spec.index_cols:
+        cur.execute(
+            psql.SQL("alter index {} rename to {}").format(
+                psql.Identifier(schema, index_name(shadow, c)), psql.Identifier(index_name(table, c))
+            )
+        )
+
+
+def copy_csv_stream(cur, csv_path: Path, target: psql.Composable, header: List[str]) -> None:
+    cols = psql.SQL(", ").join(psql.Identifier(c) for c in header)
+    copy_sql = psql.SQL(
+        "copy {} ({}) from stdin with (format csv, header true, null '', force_null ({}))"
+    ).format(target, cols, cols)
+    with cur.copy(copy_sql) as cp:
+        with csv_path.open("rb") as f:
+            while True:
+                block = f.read(COPY_BLOCK_SIZE)
+                if not block:
+                    break
+                cp.write(block)
+
+
+def copy_one_csv(
+    pool: "ConnectionPool",
+    csv_path: Path,
+    schema: str,
+    if_exists: str,
+    spec: Optional[TableSpec] = None,
+    verbose: bool = True,
+    affected_keys: Optional[set] = None,
+) -> Tuple[str, int]:
+    """
+    Stream one cleaned CSV into {schema}.{table} with COPY FROM STDIN.
+    - spec None: TEXT columns (same shape as the to_sql dtype=str path), COPY straight in
+    - spec given: typed columns; COPY into a temp TEXT stage, INSERT ... SELECT with casts,
+      then primary key / FK-column indexes and ANALYZE
+    - if_exists: replace = drop + create, append = create if missing, fail = error if exists,
+      swap = load + index <table>__shadow, then swap_in_shadow()
+    - Empty fields (quoted or not) become NULL, like chunk.replace({"": None})
+    - affected_keys (typed path, table has SUMMARY_KEY): filled with the distinct
+      keys of the inserted rows (for the incremental summary refresh)
+    """
+    table = table_name_from_csv(csv_path)
+    header = read_csv_header(csv_path)
+    if not header:
+        raise ValueError(f"empty CSV (no header): {csv_path}")
+
+    swap = if_exists == "swap"
+    load_table = shadow_table_name(table) if swap else table
+
+    if verbose:
+        print(f"--- Loading (COPY): {csv_path.name}  ->  {schema}.{load_table}")
+        if spec is not None:
+            print("    types: " + ", ".join(f"{c}={t}" for c, t in spec.columns))
+
+    target = psql.Identifier(schema, load_table)
+    text_columns = [(c, "text") for c in header]
+
+    # pool.connection(): rolled back on error, returned to the pool either way
+    with pool.connection() as con:
+        with con.cursor() as cur:
+            cur.execute("select to_regclass(%s) is not null", (f'"{schema}"."{load_table}"',))
+            exists = bool(cur.fetchone()[0])
+
+            if exists and if_exists == "fail":
+                raise ValueError(f"Table '{table}' already exists.")
+            if exists and if_exists in ("replace", "swap"):  # swap: leftover shadow of a failed run
+                cur.execute(psql.SQL("drop table {}").format(target))
+                exists = False
+            created = not exists
+            if created:
+                cur.execute(create_table_sql(target, spec.columns if spec is not None else text_columns))
+
+            if spec is None:
+                copy_csv_stream(cur, csv_path, target, header)
+                total_rows = cur.rowcount
+            else:
+                stage = psql.Identifier(f"_stage_{load_table}")
+                cur.execute(
+                    psql.SQL("create temp table {} ({}) on commit drop").format(
+                        stage,
+                        psql.SQL(", ").join(psql.SQL("{} text").format(psql.Identifier(c)) for c in header),
+                    )
+                )
+                copy_csv_stream(cur, csv_path, stage, header)
+                insert = psql.SQL("insert into {} ({}) select {} from {}").format(
+                    target,
+                    psql.SQL(", ").join(psql.Identifier(c) for c, _ in spec.columns),
+                    psql.SQL(", ").join(cast_expr(c, t) for c, t in spec.columns),
+                    stage,
+                )
+                if affected_keys is not None and (SUMMARY_KEY, "bigint") in spec.columns:
+                    key = psql.Identifier(SUMMARY_KEY)
+                    cur.execute(
+                        psql.SQL("with ins as ({} returning {}) select count(*), array_agg(distinct {}) from ins").format(
+                            insert, key, key
+                        )
+                    )
+                    total_rows, keys = cur.fetchone()
+                    affected_keys.update(k for k in keys or [] if k is not None)
+                else:
+                    cur.execute(insert)
+                    total_rows = cur.rowcount
+                build_indexes(cur, schema, load_table, spec, add_pk=created)
+                cur.execute(psql.SQL("analyze {}").format(target))
+        con.commit()
+
+        if swap:
+            with con.cursor() as cur:
+                swap_in_shadow(cur, schema, table, spec)
+            con.commit()
+            if verbose:
+                print(f"[OK] swapped {schema}.{load_table} -> {schema}.{table}")
+
+    if verbose:
+        print(f"[OK] {schema}.{table} rows={total_rows}")
+    return table, total_rows
+
+
+def refresh_summary(
+    pool: "ConnectionPool",
+    schema: str,
+    summary_sql: Path,
+    order_ids: Optional[set],
+) -> str:
+    """
+    Install / update the summary.* tables, then refresh them:
+    order_ids = the orders an append load touched, None = full rebuild.
+    """
+    with pool.connection() as con:
+        con.execute(summary_sql.read_text(encoding="utf-8"))
+        if order_ids is None:
+            n = con.execute("select summary.refresh_all(%s)", (schema,)).fetchone()[0]
+            return f"full rebuild ({n} rows)"
+        n = con.execute(
+            "select summary.refresh_orders(%s::bigint[], %s)", (sorted(order_ids), schema)
+        ).fetchone()[0]
+        return f"{len(order_ids)} orders ({n} rows)"
+
+
 def load_one_csv(
-    engine: Engine,
+    engine: "Engine",
     csv_path: Path,
     schema: str,
     if_exists: str,
     chunksize_req: int,
     verbose: bool = True,
 ) -> Tuple[str, int]:
+    import pandas as pd  # only the legacy to_sql path needs pandas
+
     table = table_name_from_csv(csv_path)
 
     # Read header quickly to estimate columns (for safe chunksize)
-    with csv_path.open("r", encoding="utf-8", newline="") as f:
-        reader = csv.reader(f)
-        header = next(reader, [])
-    ncols = len(header)
+    ncols = len(read_csv_header(csv_path))
 
     chunksize = safe_chunksize(chunksize_req, ncols)
     if verbose and chunksize != chunksize_req:
@@ -227,12 +510,41 @@ def load_one_csv(
 def parse_args(argv: List[str]) -> argparse.Namespace:
     root = project_root()
     default_cleaned = root / "extra-i-cleaning" / "cleaned_data"
+    default_report = root / "extra-i-cleaning" / "artifacts" / "cleaning_report.csv"
+    default_summary_sql = root / "extra-ii-querying" / "sql" / "02_summary_tables.sql"
 
     p = argparse.ArgumentParser(description="Load cleaned CSVs into Postgres.")
     p.add_argument("--cleaned-dir", default=str(default_cleaned), help="Path to cleaned_data directory")
     p.add_argument("--schema", default="clean", help="Target schema (default: clean)")
-    p.add_argument("--if-exists", default="replace", choices=["replace", "append", "fail"], help="to_sql if_exists")
-    p.add_argument("--chunksize", type=int, default=1000, help="CSV read chunksize (auto-adjusted for bind limit)")
+    p.add_argument(
+        "--if-exists",
+        default="replace",
+        choices=["replace", "append", "fail", "swap"],
+        help="to_sql if_exists; swap (--method copy only) = load into <table>__shadow, then rename into place",
+    )
+    p.add_argument(
+        "--method",
+        default="copy",
+        choices=["copy", "multi"],
+        help="copy = stream CSV with COPY FROM STDIN (default); multi = pandas to_sql(method='multi')",
+    )
+    p.add_argument(
+        "--types",
+        default="infer",
+        choices=["infer", "text"],
+        help="--method copy only: infer = typed tables + PK/FK indexes (default); text = all TEXT, no indexes",
+    )
+    p.add_argument("--report", default=str(default_report), help="cleaning_report.csv (id_cols/date_cols for --types infer)")
+    p.add_argument("--chunksize", type=int, default=1000, help="--method multi only: CSV read chunksize (auto-adjusted for bind limit)")
+    p.add_argument(
+        "--refresh-summary",
+        default="auto",
+        choices=["auto", "full", "off"],
+        help="summary.* tables after the load: auto = touched orders on append (else full), full, off",
+    )
+    p.add_argument("--summary-sql", default=str(default_summary_sql), help="SQL that creates the summary tables")
+    p.add_argument("--workers", type=int, default=1, help="Tables loaded in parallel (one pooled connection each)")
+    p.add_argument("--summary", action="store_true", help="Print the per-table timing summary at the end")
     p.add_argument("--skip", nargs="*", default=[], help="Table names (csv stem) to skip")
     p.add_argument("--only", nargs="*", default=[], help="If provided, load only these table names (csv stem)")
     return p.parse_args(argv)
@@ -247,33 +559,49 @@ def main(argv: List[str]) -> int:
     chunksize = args.chunksize
     skip = set(args.skip or [])
     only = set(args.only or [])
+    workers = max(1, args.workers)
 
     print("=== Load Cleaned CSVs to Postgres ===")
     print(f"cleaned_dir : {cleaned_dir}")
     print(f"schema      : {schema}")
     print(f"if_exists   : {if_exists}")
-    print(f"chunksize   : {chunksize}")
+    print(f"method      : {args.method}")
+    if args.method == "copy":
+        print(f"types       : {args.types}")
+    if args.method == "multi":
+        print(f"chunksize   : {chunksize}")
+    print(f"workers     : {workers}")
     print(f"skip        : {sorted(skip)}")
 
     if not cleaned_dir.exists():
         print(f"[ERROR] cleaned_dir not found: {cleaned_dir}")
         return 2
+    if if_exists == "swap" and args.method != "copy":
+        print("[ERROR] --if-exists swap requires --method copy")
+        return 2
 
-    cfg = load_pg_config()
+    cfg = pgdb.load_config(application_name="01_load_cleaned_to_postgres")
+    print(f"target      : {cfg.describe()}")
     # Optional: ensure DB exists
     ensure_database_exists(cfg)
 
-    engine = make_engine(cfg)
+    db_pool = pgdb.pool(cfg, min_size=1, max_size=workers)
+    engine = pgdb.sqlalchemy_engine(cfg, pool_size=workers) if args.method == "multi" else None
     try:
-        ensure_schema(engine, schema)
+        ensure_schema(db_pool, schema)
 
         csv_files = list_csv_files(cleaned_dir)
         if not csv_files:
             print(f"[WARN] No CSV files found in: {cleaned_dir}")
             return 0
 
+        report = load_cleaning_report(Path(args.report)) if args.types == "infer" else {}
+        if args.method == "copy" and args.types == "infer" and not report:
+            print(f"[WARN] cleaning report not found ({args.report}); ids fall back to *_id columns")
+
         loaded: List[Tuple[str, int]] = []
         skipped: List[str] = []
+        todo: List[Path] = []
 
         for csv_path in csv_files:
             table = table_name_from_csv(csv_path)
@@ -284,20 +612,76 @@ def main(argv: List[str]) -> int:
             if table in skip:
                 skipped.append(table)
                 continue
+            todo.append(csv_path)
 
-            try:
-                t, rows = load_one_csv(
-                    engine=engine,
-                    csv_path=csv_path,
-                    schema=schema,
-                    if_exists=if_exists,
-                    chunksize_req=chunksize,
-                    verbose=True,
-                )
-                loaded.append((t, rows))
-            except Exception as e:
-                print(f"[ERROR] failed loading {csv_path.name} -> {schema}.{table}: {e}")
+        run = RunLog("01_load_cleaned_to_postgres")
+
+        # the summary SQL casts dates / sums amounts: only typed tables can feed it
+        typed = args.method == "copy" and args.types == "infer"
+        # incremental summary refresh: keys inserted per source table (None = unknown -> full rebuild)
+        incremental = args.refresh_summary == "auto" and if_exists == "append" and typed
+        summary_keys: Dict[str, Optional[set]] = {}
+
+        def load_table(csv_path: Path) -> Tuple[str, int]:
+            table = table_name_from_csv(csv_path)
+            with run.stage(f"load {schema}.{table}", bytes_read=csv_path.stat().st_size, method=args.method) as st:
+                if args.method == "copy":
+                    spec = None
+                    if args.types == "infer":
+                        id_cols, date_cols = report.get(table, (None, None))
+                        spec = infer_table_spec(csv_path, id_cols, date_cols)
+                    keys: Optional[set] = None
+                    if incremental and table in SUMMARY_SOURCES and spec and (SUMMARY_KEY, "bigint") in spec.columns:
+                        keys = set()
+                    result = copy_one_csv(
+                        pool=db_pool,
+                        csv_path=csv_path,
+                        schema=schema,
+                        if_exists=if_exists,
+                        spec=spec,
+                        verbose=True,
+                        affected_keys=keys,
+                    )
+                    if table in SUMMARY_SOURCES:
+                        summary_keys[table] = keys
+                else:
+                    result = load_one_csv(
+                        engine=engine,
+                        csv_path=csv_path,
+                        schema=schema,
+                        if_exists=if_exists,
+                        chunksize_req=chunksize,
+                        verbose=True,
+                    )
+                    if table in SUMMARY_SOURCES:
+                        summary_keys[table] = None
+                st.rows = result[1]
+            return result
+
+        if workers == 1:
+            for csv_path in todo:
+                try:
+                    loaded.append(load_table(csv_path))
+                except Exception as e:
+                    print(f"[ERROR] failed loading {csv_path.name} -> {schema}.{table_name_from_csv(csv_path)}: {e}")
+                    return 1
+        else:
+            failed = False
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = {pool.submit(load_table, p): p for p in todo}
+                for fut in as_completed(futures):
+                    csv_path = futures[fut]
+                    try:
+                        loaded.append(fut.result())
+                    except Exception as e:
+                        print(f"[ERROR] failed loading {csv_path.name} -> {schema}.{table_name_from_csv(csv_path)}: {e}")
+                        if not failed:
+                            failed = True
+                            for f in futures:
+                                f.cancel()  # not-yet-started tables; running ones finish
+            if failed:
                 return 1
+            loaded.sort()
 
         print("\n=== Summary ===")
         print(f"Loaded tables: {len(loaded)}")
@@ -310,11 +694,29 @@ def main(argv: List[str]) -> int:
 
         total_rows = sum(r for _, r in loaded)
         print(f"Total rows loaded: {total_rows}")
+
+        if args.refresh_summary == "auto" and summary_keys and not typed:
+            print("Summary tables: skipped (auto needs typed tables: --method copy --types infer)")
+        elif args.refresh_summary != "off" and summary_keys:
+            order_ids: Optional[set] = None
+            if incremental and all(k is not None for k in summary_keys.values()):
+                order_ids = set().union(*summary_keys.values())
+            with run.stage("refresh summary tables", incremental=order_ids is not None) as st:
+                try:
+                    done = refresh_summary(db_pool, schema, Path(args.summary_sql), order_ids)
+                except Exception as e:
+                    print(f"[ERROR] summary refresh failed ({args.summary_sql}): {e}")
+                    return 1
+                st.rows = len(order_ids) if order_ids is not None else None
+            print(f"Summary tables: {done}")
         print("\nDone.")
+        if args.summary:
+            run.print_summary()
         return 0
 
     finally:
-        engine.dispose()
+        db_pool.close()
+        pgdb.dispose_engines()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,198 @@
+-- 02_summary_tables.sql
+-- Summary tables for the querying workload (01_querying_exercise.sql and dashboards shaped like it)
+--
+-- Instead of re-aggregating all of clean.order_details / clean.payments on every run:
+--   summary.order_sales     grain: 1 row / order_id   (line_count, item_qty, gross_sales)
+--   summary.order_payments  grain: 1 row / order_id   (payment_cnt, paid_amount)
+--   summary.daily_sales     grain: 1 row / order_date (orders, lines, gross sales, freight, payments)
+-- Same formulas as od_agg / p_agg in 01_querying_exercise.sql, but no business filters:
+-- the filters stay in the queries (they apply at order grain, which is small).
+--
+-- Maintenance (safe to re-run this file: tables are kept, functions replaced):
+--   select summary.refresh_all();                       -- full rebuild (after a replace / swap load)
+--   select summary.refresh_orders(array[1001, 1002]);   -- only these orders + their days (append loads)
+-- Both take the source schema as a last argument (default 'clean').
+-- 01_load_cleaned_to_postgres.py calls them after each load (--refresh-summary).
+--
+-- Daily rows are recomputed from clean.orders + the two order tables (never from order_details),
+-- for the days the refreshed orders are on now and were on before.
+
+create schema if not exists summary;
+
+create table if not exists summary.order_sales (
+  order_id      bigint primary key,
+  order_date    date,
+  line_count    bigint not null,
+  item_qty      numeric,
+  gross_sales   numeric(18,2),
+  refreshed_at  timestamptz not null default now()
+);
+
+create table if not exists summary.order_payments (
+  order_id      bigint primary key,
+  order_date    date,
+  payment_cnt   bigint not null,
+  paid_amount   numeric(18,2),
+  refreshed_at  timestamptz not null default now()
+);
+
+create table if not exists summary.daily_sales (
+  order_date      date primary key,
+  order_cnt       bigint not null,
+  line_count      bigint not null,
+  item_qty        numeric not null,
+  gross_sales     numeric(18,2) not null,
+  freight_charge  numeric(18,2) not null,
+  payment_cnt     bigint not null,
+  paid_amount     numeric(18,2) not null,
+  refreshed_at    timestamptz not null default now()
+);
+
+-- =========================
+-- Order grain (rows of the given orders, or all when p_order_ids is null)
+-- =========================
+create or replace function summary.load_order_rows(p_order_ids bigint[], p_src text default 'clean')
+returns integer
+language plpgsql
+as $$
+declare
+  n_sales integer;
+  n_pay integer;
+begin
+  execute format(
+    $q$
+      insert into summary.order_sales (order_id, order_date, line_count, item_qty, gross_sales)
+      select
+        od.order_id,
+        o.order_date::date,
+        count(*),
+        sum(od.quantity_sold)::numeric,
+        sum(od.quantity_sold * od.unit_sales_price)::numeric(18,2)
+      from %1$I.order_details od
+      left join %1$I.orders o
+        on o.order_id = od.order_id
+      where ($1 is null or od.order_id = any($1))
+      group by od.order_id, o.order_date
+    $q$,
+    p_src
+  ) using p_order_ids;
+  get diagnostics n_sales = row_count;
+
+  execute format(
+    $q$
+      insert into summary.order_payments (order_id, order_date, payment_cnt, paid_amount)
+      select
+        p.order_id,
+        o.order_date::date,
+        count(*),
+        sum(p.payment_amount)::numeric(18,2)
+      from %1$I.payments p
+      left join %1$I.orders o
+        on o.order_id = p.order_id
+      where ($1 is null or p.order_id = any($1))
+      group by p.order_id, o.order_date
+    $q$,
+    p_src
+  ) using p_order_ids;
+  get diagnostics n_pay = row_count;
+
+  return n_sales + n_pay;
+end $$;
+
+-- =========================
+-- Day grain (the given days, or all when p_days is null)
+-- =========================
+create or replace function summary.load_day_rows(p_days date[], p_src text default 'clean')
+returns integer
+language plpgsql
+as $$
+declare
+  n integer;
+begin
+  execute format(
+    $q$
+      insert into summary.daily_sales (
+        order_date, order_cnt, line_count, item_qty, gross_sales, freight_charge, payment_cnt, paid_amount
+      )
+      select
+        o.order_date::date,
+        count(*),
+        coalesce(sum(s.line_count), 0),
+        coalesce(sum(s.item_qty), 0),
+        coalesce(sum(s.gross_sales), 0)::numeric(18,2),
+        coalesce(sum(o.freight_charge), 0)::numeric(18,2),
+        coalesce(sum(p.payment_cnt), 0),
+        coalesce(sum(p.paid_amount), 0)::numeric(18,2)
+      from %1$I.orders o
+      left join summary.order_sales    s on s.order_id = o.order_id
+      left join summary.order_payments p on p.order_id = o.order_id
+      where o.order_date is not null
+        and ($1 is null or o.order_date::date = any($1))
+      group by o.order_date::date
+    $q$,
+    p_src
+  ) using p_days;
+  get diagnostics n = row_count;
+  return n;
+end $$;
+
+-- Day lookups by date use ix_orders__order_date, built by the loader with the PK / FK indexes
+drop function if exists summary.ensure_source_indexes(text);
+
+-- =========================
+-- Entry points
+-- =========================
+create or replace function summary.refresh_all(p_src text default 'clean')
+returns integer
+language plpgsql
+as $$
+declare
+  n_orders integer;
+  n_days integer;
+begin
+  truncate summary.order_sales, summary.order_payments, summary.daily_sales;
+  n_orders := summary.load_order_rows(null, p_src);
+  n_days := summary.load_day_rows(null, p_src);
+  analyze summary.order_sales;
+  analyze summary.order_payments;
+  analyze summary.daily_sales;
+  return n_orders + n_days;
+end $$;
+
+create or replace function summary.refresh_orders(p_order_ids bigint[], p_src text default 'clean')
+returns integer
+language plpgsql
+as $$
+declare
+  days_before date[];
+  days_after date[];
+  n_orders integer;
+  n_days integer;
+begin
+  if p_order_ids is null or cardinality(p_order_ids) = 0 then
+    return 0;
+  end if;
+
+  -- days the orders were on (an order may have moved) + the days they are on now
+  select array_agg(distinct d) into days_before
+  from (
+    select order_date as d from summary.order_sales where order_id = any(p_order_ids)
+    union
+    select order_date from summary.order_payments where order_id = any(p_order_ids)
+  ) x
+  where d is not null;
+  execute format('select array_agg(distinct order_date::date) from %I.orders where order_id = any($1)', p_src)
+    into days_after using p_order_ids;
+
+  delete from summary.order_sales where order_id = any(p_order_ids);
+  delete from summary.order_payments where order_id = any(p_order_ids);
+  n_orders := summary.load_order_rows(p_order_ids, p_src);
+
+  days_after := array(
+    select distinct d from unnest(coalesce(days_before, '{}') || coalesce(days_after, '{}')) d where d is not null
+  );
+  delete from summary.daily_sales where order_date = any(days_after);
+  n_days := summary.load_day_rows(days_after, p_src);
+
+  return n_orders + n_days;
+end $$;
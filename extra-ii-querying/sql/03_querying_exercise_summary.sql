@@ -0,0 +1,115 @@
+/* 03_querying_exercise_summary.sql
+   Same result as 01_querying_exercise.sql, read from the summary tables (02_summary_tables.sql):
+   od_agg / p_agg become primary-key lookups on summary.order_sales / summary.order_payments,
+   so the cost follows the number of orders returned, not the size of clean.order_details. */
+WITH
+/* 1) base_orders: filter early + meaningful rules
+      grain: 1 row / order_id */
+base_orders AS (
+  SELECT
+    o.order_id,
+    o.customer_id,
+    o.employee_id,
+    o.order_date::date AS order_date,
+    o.ship_date::date  AS ship_date,
+    COALESCE(o.freight_charge, 0)::numeric(18,2) AS freight_charge,
+    o.ship_lead_days
+  FROM clean.orders o
+  WHERE o.order_date IS NOT NULL
+    AND o.ship_date  IS NOT NULL
+    AND o.is_orderdate_gt_shipdate = FALSE
+    AND o.ship_lead_days BETWEEN 0 AND 30
+    AND COALESCE(o.freight_charge, 0) >= 0
+),
+
+/* 2) c: reduce customers (active only + keep only what we need)
+      grain: 1 row / customer_id */
+c AS (
+  SELECT
+    c.customer_id,
+    c.customer_name,
+    c.region,
+    c.country,
+    c.customer_class,
+    c.price_category
+  FROM clean.customers c
+  WHERE COALESCE(c.discontinued, 0) = 0
+),
+
+/* 3) o: keep orders only for active customers
+      grain: 1 row / order_id */
+o AS (
+  SELECT bo.*
+  FROM base_orders bo
+  JOIN c
+    ON c.customer_id = bo.customer_id
+),
+
+/* 4) fact_order: order-level fact; line / payment metrics are already at order grain */
+fact_order AS (
+  SELECT
+    o.order_id,
+    o.order_date,
+    o.ship_date,
+    o.customer_id,
+
+    c.customer_name,
+    c.region,
+    c.country,
+    c.customer_class,
+    c.price_category,
+
+    o.ship_lead_days,
+
+    COALESCE(od.line_count, 0) AS line_count,
+    COALESCE(od.item_qty, 0) AS item_qty,
+    COALESCE(od.gross_sales, 0)::numeric(18,2) AS gross_sales,
+
+    o.freight_charge,
+    (COALESCE(od.gross_sales, 0) + o.freight_charge)::numeric(18,2) AS order_total,
+
+    COALESCE(p.paid_amount, 0)::numeric(18,2) AS paid_amount,
+    COALESCE(p.payment_cnt, 0) AS payment_cnt,
+
+    ((COALESCE(od.gross_sales, 0) + o.freight_charge) - COALESCE(p.paid_amount, 0))::numeric(18,2)
+      AS unpaid_amount
+
+  FROM o
+  LEFT JOIN summary.order_sales    od ON od.order_id = o.order_id
+  LEFT JOIN summary.order_payments p  ON p.order_id  = o.order_id
+  JOIN c                              ON c.customer_id = o.customer_id
+)
+
+/* 5) final: simple windows over the order-level fact */
+SELECT
+  f.*,
+
+  ROW_NUMBER() OVER (
+    PARTITION BY f.customer_id
+    ORDER BY f.order_date, f.order_id
+  ) AS order_seq,
+
+  (f.order_date - LAG(f.order_date) OVER (
+     PARTITION BY f.customer_id
+     ORDER BY f.order_date, f.order_id
+   )) AS days_since_prev_order,
+
+  SUM(f.order_total) OVER (
+    PARTITION BY f.customer_id
+    ORDER BY f.order_date, f.order_id
+    ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW
+  )::numeric(18,2) AS customer_running_spend
+
+FROM fact_order f
+ORDER BY f.order_date DESC, f.order_id DESC;
+
+/* Dashboard-shaped example (day grain, no order_details scan):
+
+SELECT order_date, order_cnt, gross_sales, freight_charge, paid_amount,
+       (gross_sales + freight_charge - paid_amount)::numeric(18,2) AS unpaid_amount
+FROM summary.daily_sales
+WHERE order_date >= date '2004-01-01' AND order_date < date '2004-04-01'
+ORDER BY order_date;
+
+   Note: daily_sales covers every order with an order_date (no business filters);
+   apply the base_orders rules at order grain (fact_order above) when they matter. */
@@ -0,0 +1,425 @@
+"""
+00_run_pipeline.py
+
+Run the whole profiling pipeline as a DAG, skipping steps whose inputs did not change.
+
+Steps (inputs -> outputs):
+  load_raw      raw_data/*.csv, sql/00_setup/*.sql, .env         -> raw.* tables, stg.* views
+  scorecard     sql/10_scorecard/*.sql  (after load_raw)         -> artifacts/scorecard.csv
+  score         artifacts/scorecard.csv                          -> artifacts/scorecard_100.csv
+  describe      raw_data/*.csv                                   -> artifacts/tablestats/
+  recon_buckets (after load_raw)                                 -> artifacts/bucket.csv, bucket.md
+  dictionaries  (after load_raw)                                 -> artifacts/tabledictionaries/
+  clean         raw_data/*.csv                                   -> extra-i-cleaning/cleaned_data/ + report
+  load_clean    extra-i-cleaning/cleaned_data/*.csv                -> clean.* tables
+                (after clean, load_raw: it rebuilds the database)
+
+How "skip" works:
+- Each step's fingerprint = sha256 of its command, its script + declared input
+  files (content hashes; python/instrument.py, imported by every step, counts for
+  all of them), selected env vars, and the fingerprints of the steps it depends
+  on. A change anywhere upstream therefore re-runs exactly the affected subgraph.
+- Steps that build database objects (load_raw: raw / stg, scorecard: dq,
+  load_clean: clean) also fingerprint the identity of those objects: the oid of
+  the database and of each schema, probed through pgdb before planning and again
+  after the step ran. A dropped or recreated database (or schema) changes it, so
+  the step and everything downstream re-run; an unreachable database never matches.
+- A step is skipped when its fingerprint equals the one recorded after its last
+  successful run and its file outputs still exist.
+- State (fingerprints + a size/mtime -> sha256 cache so unchanged files are not
+  re-hashed) lives in artifacts/pipeline_state.json.
+
+Independent branches (describe and clean next to load_raw -> scorecard) run
+concurrently as subprocesses; each step's output goes to artifacts/pipeline_logs/<step>.log.
+load_clean waits for load_raw, which drops and recreates the database, and re-runs
+whenever load_raw did. The dictionaries step passes --skip-if-empty: with no
+DICT_TARGETS configured it succeeds without building anything.
+Steps share one DQ_RUN_ID, so their stage records in artifacts/runlog/runs.jsonl
+(see instrument.py) group into one run.
+
+Usage (from repo root):
+  python python/00_run_pipeline.py
+  python python/00_run_pipeline.py --dry-run
+  python python/00_run_pipeline.py --only clean load_clean --jobs 2
+  python python/00_run_pipeline.py --force
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+STATE_PATH = Path("artifacts/pipeline_state.json")
+LOG_DIR = Path("artifacts/pipeline_logs")
+
+DB_ENV = ["PGHOST", "PGPORT", "PGUSER", "PGMAINTDB", "PGDB", "PGDATABASE", "DATABASE_URL"]
+
+HASH_BLOCK = 1 << 20
+
+# Imported by every step: an edit there (run log, RSS metrics, ...) re-runs all of them
+COMMON_INPUTS = ["python/instrument.py"]
+
+DB_PROBE_SQL = """
+select (select oid from pg_database where datname = current_database())::text || ':'
+       || coalesce(string_agg(nspname || '=' || oid::text, ',' order by nspname), '')
+from pg_namespace
+where nspname = any(%s)
+"""
+
+
+@dataclass
+class Step:
+    name: str
+    cmd: List[str]
+    inputs: List[str] = field(default_factory=list)  # files or glob patterns (repo-relative)
+    outputs: List[str] = field(default_factory=list)  # files / dirs that must exist to skip
+    deps: List[str] = field(default_factory=list)
+    env: List[str] = field(default_factory=list)
+    db_schemas: List[str] = field(default_factory=list)  # schemas the step creates (DB-side outputs)
+
+
+def py(script: str, *args: str) -> List[str]:
+    return [sys.executable, script, *args]
+
+
+STEPS: List[Step] = [
+    Step(
+        name="load_raw",
+        cmd=py("python/01_load_raw_to_postgres.py"),
+        inputs=["python/01_load_raw_to_postgres.py", "python/pgdb.py", "raw_data/*.csv", "sql/00_setup/*.sql", ".env"],
+        env=DB_ENV,
+        db_schemas=["raw", "stg"],
+    ),
+    Step(
+        name="scorecard",
+        cmd=py("python/02_generate_scorecard.py"),
+        inputs=["python/02_generate_scorecard.py", "python/pgdb.py", "sql/10_scorecard/*.sql", ".env"],
+        outputs=["artifacts/scorecard.csv"],
+        deps=["load_raw"],
+        env=DB_ENV,
+        db_schemas=["dq"],
+    ),
+    Step(
+        name="score",
+        cmd=py("python/03_add_score_to_scorecard.py"),
+        inputs=["python/03_add_score_to_scorecard.py", "artifacts/scorecard.csv"],
+        outputs=["artifacts/scorecard_100.csv"],
+        deps=["scorecard"],
+    ),
+    Step(
+        name="describe",
+        cmd=py("python/04_generate_describe_csv.py"),
+        inputs=["python/04_generate_describe_csv.py", "python/csv_reader.py", "raw_data/*.csv"],
+        outputs=["artifacts/tablestats"],
+    ),
+    Step(
+        name="dictionaries",
+        cmd=py("python/05_generate_tabledictionaries.py", "--skip-if-empty"),
+        inputs=["python/05_generate_tabledictionaries.py", "python/pgdb.py", ".env"],
+        outputs=["artifacts/tabledictionaries"],
+        deps=["load_raw"],
+        env=DB_ENV,
+    ),
+    Step(
+        name="recon_buckets",
+        cmd=py("python/07_generate_recon_buckets.py"),
+        inputs=[
+            "python/07_generate_recon_buckets.py",
+            "python/pgdb.py",
+            "python/scorecard_spec.py",  # relationship list (--all) parsed from 05_fk_orphans.sql
+            "sql/10_scorecard/05_fk_orphans.sql",
+            ".env",
+        ],
+        outputs=["artifacts/bucket.csv", "artifacts/bucket.md"],
+        deps=["load_raw"],
+        env=DB_ENV,
+    ),
+    Step(
+        name="clean",
+        cmd=py("extra-i-cleaning/python/01_cleaning.py"),
+        inputs=["extra-i-cleaning/python/01_cleaning.py", "python/csv_reader.py", "raw_data/*.csv"],
+        outputs=["extra-i-cleaning/cleaned_data", "extra-i-cleaning/artifacts/cleaning_report.csv"],
+    ),
+    Step(
+        name="load_clean",
+        cmd=py("extra-ii-querying/python/01_load_cleaned_to_postgres.py"),
+        inputs=[
+            "extra-ii-querying/python/01_load_cleaned_to_postgres.py",
+            "python/pgdb.py",
+            "extra-i-cleaning/cleaned_data/*.csv",
+            "extra-i-cleaning/artifacts/cleaning_report.csv",
+            ".env",
+        ],
+        deps=["clean", "load_raw"],
+        env=DB_ENV,
+        db_schemas=["clean"],
+    ),
+]
+
+
+# -------------------------
+# Fingerprints / state
+# -------------------------
+def load_state(path: Path) -> dict:
+    if not path.exists():
+        return {"steps": {}, "files": {}}
+    try:
+        state = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return {"steps": {}, "files": {}}
+    state.setdefault("steps", {})
+    state.setdefault("files", {})
+    return state
+
+
+def save_state(path: Path, state: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps(state, indent=2, sort_keys=True), encoding="utf-8")
+    tmp.replace(path)
+
+
+def expand_inputs(patterns: Iterable[str]) -> List[Path]:
+    files: Set[Path] = set()
+    for pat in patterns:
+        if any(ch in pat for ch in "*?["):
+            files.update(p for p in Path(".").glob(pat) if p.is_file())
+        else:
+            files.add(Path(pat))
+    return sorted(files)
+
+
+def file_digest(path: Path, cache: Dict[str, dict]) -> str:
+    """sha256 of the file content; re-used from `cache` while size + mtime are unchanged."""
+    if not path.exists():
+        return "missing"
+    st = path.stat()
+    key = path.as_posix()
+    hit = cache.get(key)
+    if hit and hit["size"] == st.st_size and hit["mtime_ns"] == st.st_mtime_ns:
+        return hit["sha256"]
+
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(HASH_BLOCK)
+            if not block:
+                break
+            h.update(block)
+    digest = h.hexdigest()
+    cache[key] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": digest}
+    return digest
+
+
+def db_state(schemas: List[str]) -> str:
+    """Database oid + oid per existing schema; 'unavailable:...' when the DB cannot be reached."""
+    try:
+        import pgdb
+
+        cfg = pgdb.load_config(application_name="00_run_pipeline")
+        with pgdb.connect(cfg) as con:
+            return str(con.execute(DB_PROBE_SQL, (schemas,)).fetchone()[0])
+    except Exception as e:  # no driver, no config, database dropped, server down
+        return f"unavailable:{type(e).__name__}"
+
+
+def step_fingerprint(step: Step, upstream: Dict[str, str], cache: Dict[str, dict], db: Dict[str, str]) -> str:
+    h = hashlib.sha256()
+    # sys.executable is not part of the key: switching venvs should not force a rerun
+    h.update(json.dumps(step.cmd[1:]).encode("utf-8"))
+    for p in expand_inputs([*COMMON_INPUTS, *step.inputs]):
+        h.update(f"{p.as_posix()}={file_digest(p, cache)}\n".encode("utf-8"))
+    for k in step.env:
+        h.update(f"env:{k}={os.environ.get(k, '')}\n".encode("utf-8"))
+    if step.db_schemas:
+        h.update(f"db:{db.get(step.name, '')}\n".encode("utf-8"))
+    for d in sorted(step.deps):
+        h.update(f"dep:{d}={upstream[d]}\n".encode("utf-8"))
+    return h.hexdigest()
+
+
+def outputs_exist(step: Step) -> bool:
+    return all(Path(p).exists() for p in step.outputs)
+
+
+# -------------------------
+# DAG
+# -------------------------
+def topo_order(steps: List[Step]) -> List[Step]:
+    by_name = {s.name: s for s in steps}
+    order: List[Step] = []
+    state: Dict[str, int] = {}  # 1 = visiting, 2 = done
+
+    def visit(name: str) -> None:
+        if state.get(name) == 2:
+            return
+        if state.get(name) == 1:
+            raise ValueError(f"cycle in pipeline at step: {name}")
+        if name not in by_name:
+            raise ValueError(f"unknown step: {name}")
+        state[name] = 1
+        for d in by_name[name].deps:
+            visit(d)
+        state[name] = 2
+        order.append(by_name[name])
+
+    for s in steps:
+        visit(s.name)
+    return order
+
+
+def with_upstream(steps: List[Step], names: Set[str]) -> Set[str]:
+    """Selected steps + everything they depend on (deps are fingerprinted, not necessarily run)."""
+    by_name = {s.name: s for s in steps}
+    out: Set[str] = set()
+    todo = list(names)
+    while todo:
+        n = todo.pop()
+        if n in out:
+            continue
+        out.add(n)
+        todo.extend(by_name[n].deps)
+    return out
+
+
+def run_step(step: Step, log_dir: Path, env: Dict[str, str]) -> Tuple[int, float]:
+    log_dir.mkdir(parents=True, exist_ok=True)
+    t0 = time.perf_counter()
+    with open(log_dir / f"{step.name}.log", "w", encoding="utf-8") as log:
+        proc = subprocess.run(step.cmd, stdout=log, stderr=subprocess.STDOUT, env=env)
+    return proc.returncode, time.perf_counter() - t0
+
+
+# -------------------------
+# Main
+# -------------------------
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    names = [s.name for s in STEPS]
+    ap = argparse.ArgumentParser(description="Run the profiling pipeline as a cached DAG.")
+    ap.add_argument("--only", nargs="*", default=[], choices=names, help="Run only these steps (deps must be up to date)")
+    ap.add_argument("--force", nargs="*", default=None, choices=names, help="Re-run these steps (no names = all)")
+    ap.add_argument("--jobs", type=int, default=3, help="Max steps running at once")
+    ap.add_argument("--dry-run", action="store_true", help="Print what would run / skip, run nothing")
+    ap.add_argument("--state", default=str(STATE_PATH), help="Fingerprint state file")
+    ap.add_argument("--log-dir", default=str(LOG_DIR), help="Per-step log folder")
+    return ap.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    state_path = Path(args.state)
+    log_dir = Path(args.log_dir)
+
+    order = topo_order(STEPS)
+    selected = set(args.only) if args.only else {s.name for s in order}
+    relevant = with_upstream(order, selected)
+    force_all = args.force is not None and not args.force
+    forced = set(args.force or [])
+
+    state = load_state(state_path)
+    cache = state["files"]
+
+    # Fingerprints are computed up front in topo order; a step that re-runs may
+    # rewrite files a downstream step reads, so those are re-fingerprinted right
+    # before the downstream step is scheduled.
+    fp: Dict[str, str] = {}
+    db: Dict[str, str] = {s.name: db_state(s.db_schemas) for s in order if s.name in relevant and s.db_schemas}
+    for s in order:
+        if s.name in relevant:
+            fp[s.name] = step_fingerprint(s, fp, cache, db)
+
+    def needs_run(s: Step) -> bool:
+        if s.name not in selected:
+            return False
+        if force_all or s.name in forced:
+            return True
+        prev = state["steps"].get(s.name, {})
+        return prev.get("fingerprint") != fp[s.name] or not outputs_exist(s)
+
+    print("=== Pipeline plan ===")
+    for s in order:
+        if s.name not in relevant:
+            continue
+        tag = "RUN " if needs_run(s) else "skip"
+        if s.name not in selected:
+            tag = "dep "
+        deps = f"  (after {', '.join(s.deps)})" if s.deps else ""
+        print(f" [{tag}] {s.name}{deps}")
+    if args.dry_run:
+        save_state(state_path, state)
+        return 0
+
+    done: Set[str] = set()
+    failed: Set[str] = set()
+    pending = [s for s in order if s.name in relevant]
+    running: Dict[Future, Step] = {}
+    results: List[Tuple[str, str, float]] = []
+    env = dict(os.environ)
+    env.setdefault("DQ_RUN_ID", uuid.uuid4().hex[:12])
+    print(f"run_id: {env['DQ_RUN_ID']}")
+
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        while pending or running:
+            for s in list(pending):
+                if any(d in failed for d in s.deps):
+                    pending.remove(s)
+                    failed.add(s.name)
+                    results.append((s.name, "blocked", 0.0))
+                    continue
+                if not all(d in done for d in s.deps):
+                    continue
+                pending.remove(s)
+                fp[s.name] = step_fingerprint(s, fp, cache, db)
+                if not needs_run(s):
+                    done.add(s.name)
+                    if s.name in selected:
+                        results.append((s.name, "skipped", 0.0))
+                    continue
+                print(f"[RUN ] {s.name}: {' '.join(s.cmd[1:])}")
+                running[pool.submit(run_step, s, log_dir, env)] = s
+
+            if not running:
+                continue
+            finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for fut in finished:
+                s = running.pop(fut)
+                rc, secs = fut.result()
+                if rc == 0:
+                    done.add(s.name)
+                    if s.db_schemas:
+                        # the step (re)created its objects: record their new identity, and
+                        # downstream steps see the new fingerprint when they are scheduled
+                        db[s.name] = db_state(s.db_schemas)
+                        fp[s.name] = step_fingerprint(s, fp, cache, db)
+                    state["steps"][s.name] = {"fingerprint": fp[s.name], "finished_at": time.time(), "seconds": round(secs, 3)}
+                    save_state(state_path, state)
+                    results.append((s.name, "ok", secs))
+                    print(f"[OK  ] {s.name} ({secs:.1f}s)")
+                else:
+                    failed.add(s.name)
+                    state["steps"].pop(s.name, None)
+                    save_state(state_path, state)
+                    results.append((s.name, f"FAILED rc={rc}", secs))
+                    print(f"[FAIL] {s.name} rc={rc} -> see {(log_dir / (s.name + '.log')).as_posix()}")
+
+    save_state(state_path, state)
+
+    print("\n=== Summary ===")
+    for name, status, secs in results:
+        print(f" - {name:<13} {status:<14} {secs:6.1f}s")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,27 +1,14 @@
 from __future__ import annotations
 
-import os
+import argparse
 from pathlib import Path
 from io import StringIO
 import pandas as pd
 import psycopg
 from psycopg import sql as psql
 
-from dotenv import load_dotenv
-load_dotenv()  # auro read .env from root
-
-def require_env(name: str) -> str:
-    v = os.getenv(name)
-    if not v:
-        raise SystemExit(f"Missing env var: {name}")
-    return v
-
-HOST = require_env("PGHOST")
-PORT = int(require_env("PGPORT"))
-USER = require_env("PGUSER")
-PASSWORD = require_env("PGPASSWORD")
-MAINT_DB = require_env("PGMAINTDB")
-TARGET_DB = require_env("PGDB")
+import pgdb  # connection settings: PG* env vars / .env (PGDATABASE = target, PGMAINTDB = maintenance db)
+from instrument import RunLog
 
 RAW_DIR = Path("raw_data")
 
@@ -51,10 +38,6 @@ TABLE_FILES = {
 }
 
 
-def conn_str(dbname: str) -> str:
-    return f"host={HOST} port={PORT} dbname={dbname} user={USER} password={PASSWORD}"
-
-
 def run_sql_file(con: psycopg.Connection, path: Path) -> None:
     if not path.exists():
         raise FileNotFoundError(f"SQL file not found: {path.as_posix()}")
@@ -65,13 +48,14 @@ def run_sql_file(con: psycopg.Connection, path: Path) -> None:
     print(f"✅ ran sql: {path.as_posix()}")
 
 
-def drop_and_create_database():
+def drop_and_create_database(cfg: pgdb.PgConfig):
     """
-    Rebuild TARGET_DB safely.
-    - Terminates other sessions on TARGET_DB (fixes 'database is being accessed by other users')
+    Rebuild the target database safely.
+    - Terminates other sessions on it (fixes 'database is being accessed by other users')
     - Drops and recreates DB
     """
-    with psycopg.connect(conn_str(MAINT_DB), autocommit=True) as con:
+    target_db = cfg.dbname
+    with pgdb.connect(cfg, dbname=cfg.maintdb, autocommit=True) as con:
         with con.cursor() as cur:
             # terminate sessions
             cur.execute(
@@ -81,14 +65,14 @@ def drop_and_create_database():
                 where datname = %s
                   and pid <> pg_backend_pid();
                 """,
-                (TARGET_DB,),
+                (target_db,),
             )
 
             # drop if exists + create
-            cur.execute(psql.SQL("drop database if exists {}").format(psql.Identifier(TARGET_DB)))
-            cur.execute(psql.SQL("create database {}").format(psql.Identifier(TARGET_DB)))
+            cur.execute(psql.SQL("drop database if exists {}").format(psql.Identifier(target_db)))
+            cur.execute(psql.SQL("create database {}").format(psql.Identifier(target_db)))
 
-    print(f"✅ rebuilt database: {TARGET_DB}")
+    print(f"✅ rebuilt database: {target_db}")
 
 
 def copy_df_to_table(con: psycopg.Connection, df: pd.DataFrame, full_table: str):
@@ -111,33 +95,56 @@ def copy_df_to_table(con: psycopg.Connection, df: pd.DataFrame, full_table: str)
     con.commit()
 
 
-def main():
-    if not RAW_DIR.exists():
-        raise FileNotFoundError(f"raw_data folder not found: {RAW_DIR.resolve()}")
+def load_raw_table(con: psycopg.Connection, raw_dir: Path, table: str, run: RunLog) -> tuple[int, str]:
+    """Decode the table's CSV and COPY it into raw.<table> (truncated first); returns (rows, encoding)."""
+    filename = TABLE_FILES[table]
+    path = raw_dir / filename
+    if not path.exists():
+        raise FileNotFoundError(f"missing file: {path}")
+
+    enc = ENCODING_MAP.get(filename, DEFAULT_ENCODING)
+    with run.stage(f"load raw.{table}", pg=con, bytes_read=path.stat().st_size, encoding=enc) as st:
+        df = pd.read_csv(path, encoding=enc)
+        copy_df_to_table(con, df, f"raw.{table}")
+        st.rows = len(df)
+    return len(df), enc
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Rebuild the database and load raw CSVs into raw.*")
+    ap.add_argument("--raw-dir", type=Path, default=RAW_DIR, help="Folder of raw *.csv (default: raw_data)")
+    ap.add_argument("--summary", action="store_true", help="Print the per-stage timing summary at the end")
+    args = ap.parse_args(argv)
+    raw_dir = args.raw_dir
+    run = RunLog("01_load_raw_to_postgres")
+    cfg = pgdb.load_config(application_name="01_load_raw_to_postgres")
+    print(f"Target: {cfg.describe()}")
+
+    if not raw_dir.exists():
+        raise FileNotFoundError(f"raw_data folder not found: {raw_dir.resolve()}")
 
     # 0) rebuild database
-    drop_and_create_database()
+    with run.stage("rebuild database"):
+        drop_and_create_database(cfg)
 
     # 1) connect target db
-    with psycopg.connect(conn_str(TARGET_DB)) as con:
+    with pgdb.connect(cfg) as con:
         # 2) run create schemas/tables (raw + stg schema + raw tables)
-        run_sql_file(con, SCHEMAS_SQL)
+        with run.stage(SCHEMAS_SQL.name, pg=con):
+            run_sql_file(con, SCHEMAS_SQL)
 
         # 3) load csv into raw.*
-        for table, filename in TABLE_FILES.items():
-            path = RAW_DIR / filename
-            if not path.exists():
-                raise FileNotFoundError(f"missing file: {path}")
-
-            enc = ENCODING_MAP.get(filename, DEFAULT_ENCODING)
-            df = pd.read_csv(path, encoding=enc)
-            copy_df_to_table(con, df, f"raw.{table}")
-            print(f"✅ loaded raw.{table}: {len(df):,} rows (encoding={enc})")
+        for table in TABLE_FILES:
+            rows, enc = load_raw_table(con, raw_dir, table, run)
+            print(f"✅ loaded raw.{table}: {rows:,} rows (encoding={enc})")
 
         # 4) run stg views (นี่แหละที่ต้องเป็นเวอร์ชัน normalize *_id)
-        run_sql_file(con, STG_VIEWS_SQL_FILE)
+        with run.stage(STG_VIEWS_SQL_FILE.name, pg=con):
+            run_sql_file(con, STG_VIEWS_SQL_FILE)
 
     print("🎉 All done. raw tables + stg views are ready.")
+    if args.summary:
+        run.print_summary()
 
 
 if __name__ == "__main__":
@@ -1,3 +1,4 @@
+import argparse
 import csv
 import math
 from pathlib import Path
@@ -72,11 +73,17 @@ def compute_score(row):
     score = max(0.0, min(100.0, score))
     return int(round(score))
 
-def main():
-    if not SRC.exists():
-        raise FileNotFoundError(f"Missing {SRC}. Run scorecard generation first.")
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Add dq_score_0_100 to the scorecard export")
+    ap.add_argument("--src", type=Path, default=SRC, help="scorecard.csv from 02_generate_scorecard.py")
+    ap.add_argument("--dst", type=Path, default=DST, help="Output CSV")
+    args = ap.parse_args(argv)
+    src, dst = args.src, args.dst
 
-    with SRC.open("r", encoding="utf-8", newline="") as f:
+    if not src.exists():
+        raise FileNotFoundError(f"Missing {src}. Run scorecard generation first.")
+
+    with src.open("r", encoding="utf-8", newline="") as f:
         reader = csv.DictReader(f)
         rows = list(reader)
         fieldnames = reader.fieldnames or []
@@ -92,8 +99,8 @@ def main():
     for r in rows:
         r["dq_score_0_100"] = str(compute_score(r))
 
-    DST.parent.mkdir(parents=True, exist_ok=True)
-    with DST.open("w", encoding="utf-8", newline="") as f:
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    with dst.open("w", encoding="utf-8", newline="") as f:
         writer = csv.DictWriter(f, fieldnames=out_fields)
         writer.writeheader()
         for r in rows:
@@ -105,7 +112,7 @@ def main():
                     out_row[fn] = r.get(fn, "")
             writer.writerow(out_row)
 
-    print(f"OK: wrote {DST}")
+    print(f"OK: wrote {dst}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
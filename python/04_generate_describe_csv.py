@@ -20,13 +20,18 @@ import argparse
 from pathlib import Path
 import pandas as pd
 
+from csv_reader import read_csv_fast
+from instrument import RunLog
+
 
 def read_csv_safely(path: Path) -> pd.DataFrame:
-    """Try UTF-8 first, fallback to UTF-16. Also support thousands separators."""
-    try:
-        return pd.read_csv(path, thousands=",")
-    except UnicodeError:
-        return pd.read_csv(path, encoding="utf-16", thousands=",")
+    """
+    Encoding settled once (BOM + prefix probe, UTF-16 transcoded in a stream),
+    then one multithreaded parse. Thousands separators ("1,288.00") are handled
+    by coerce_numeric_like_object_columns.
+    """
+    df, _ = read_csv_fast(path)
+    return df
 
 
 def coerce_numeric_like_object_columns(df: pd.DataFrame, min_non_null_ratio: float = 0.85) -> pd.DataFrame:
@@ -63,18 +68,23 @@ def coerce_numeric_like_object_columns(df: pd.DataFrame, min_non_null_ratio: flo
     return df
 
 
-def main() -> int:
+def main(argv=None) -> int:
     ap = argparse.ArgumentParser()
     ap.add_argument("--input", default="raw_data", help="Folder containing *.csv")
     ap.add_argument("--out", default="artifacts/tablestats", help="Output folder")
     ap.add_argument("--ratio", type=float, default=0.85, help="min ratio to coerce object->numeric")
-    args = ap.parse_args()
+    ap.add_argument("--only", nargs="+", default=None, metavar="TABLE", help="Only these tables (CSV file stems)")
+    ap.add_argument("--summary", action="store_true", help="Print the per-table timing summary at the end")
+    args = ap.parse_args(argv)
+    run = RunLog("04_generate_describe_csv")
 
     in_dir = Path(args.input)
     out_dir = Path(args.out)
     out_dir.mkdir(parents=True, exist_ok=True)
 
     csv_files = sorted(in_dir.glob("*.csv"))
+    if args.only:
+        csv_files = [p for p in csv_files if p.stem in set(args.only)]
     if not csv_files:
         raise SystemExit(f"No CSV files found under: {in_dir.resolve()}")
 
@@ -85,14 +95,19 @@ def main() -> int:
         table = csv_path.stem
         print(f"== {table} ==")
 
-        df = read_csv_safely(csv_path)
-        df = coerce_numeric_like_object_columns(df, min_non_null_ratio=args.ratio)
-
-        # pandas default describe() summarizes numeric columns only
-        try:
-            desc = df.describe()
-        except Exception as e:
-            print(f"  - SKIP: describe() failed: {e}")
+        with run.stage(f"describe {table}", bytes_read=csv_path.stat().st_size) as st:
+            df = read_csv_safely(csv_path)
+            df = coerce_numeric_like_object_columns(df, min_non_null_ratio=args.ratio)
+            st.rows = len(df)
+
+            # pandas default describe() summarizes numeric columns only
+            try:
+                desc = df.describe()
+            except Exception as e:
+                desc = None
+                st.attrs["skipped"] = f"describe() failed: {e}"
+        if desc is None:
+            print(f"  - SKIP: {st.attrs['skipped']}")
             skipped += 1
             continue
 
@@ -107,6 +122,8 @@ def main() -> int:
         created += 1
 
     print(f"\nDone. created={created}, skipped={skipped}")
+    if args.summary:
+        run.print_summary()
     return 0
 
 
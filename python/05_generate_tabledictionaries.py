@@ -9,6 +9,28 @@ Batch generator:
 Output files:
 - artifacts/tabledictionaries/<schema>__<table>__<column>__dict.csv
 - artifacts/tabledictionaries/dictionary_index.csv
+- artifacts/tabledictionaries/dict_store.json (previous distribution + hashes per target)
+- artifacts/tabledictionaries/deltas/<schema>__<table>__<column>__delta.csv
+- artifacts/tabledictionaries/deltas/delta_index.csv
+
+Incremental mode (default):
+- Each source table gets a cheap fingerprint (row count + sum of row hashes).
+- Targets whose table fingerprint is unchanged since the last run are skipped
+  (their dict file + index row are reused from the store).
+- Recomputed targets are diffed against the stored distribution:
+  new values, vanished values, and count changes over a threshold.
+- deltas/delta_index.csv is rewritten every run from the store (skipped targets
+  keep the delta of the run that last recomputed them).
+- Use --baseline-store to diff against another store instead
+  (e.g. a run with --schema clean vs the stg run => raw vs cleaned drift).
+
+Usage:
+  python python/05_generate_tabledictionaries.py
+  python python/05_generate_tabledictionaries.py --force
+  python python/05_generate_tabledictionaries.py --skip-if-empty   (pipeline / watcher: no targets = exit 0)
+  python python/05_generate_tabledictionaries.py --schema clean \
+      --store artifacts/tabledictionaries/dict_store_clean.json \
+      --baseline-store artifacts/tabledictionaries/dict_store.json
 
 Value normalization:
 - NULL   -> [NULL]
@@ -16,18 +38,21 @@ Value normalization:
 - else trimmed text
 
 Connection:
-- Loads .env (if exists at project root) then reads:
-  PGHOST, PGPORT, PGUSER, PGPASSWORD, PGDB
+- python/pgdb.py: PG* env vars, then .env at project root
+  (PGDATABASE; PGDB is still accepted as an alias)
 """
 
 from __future__ import annotations
 
-import os
 import csv
+import json
+import hashlib
+import argparse
 from pathlib import Path
-from typing import Iterable, List, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 
-import psycopg
+import pgdb
+from instrument import RunLog
 
 
 # -------------------------
@@ -51,59 +76,13 @@ OUT_DIR = Path("artifacts/tabledictionaries")
 # Limit for each dictionary file (None = full)
 TOP_N = None  # e.g. 300
 
+# Previous distributions per target (content hash + table fingerprint)
+STORE_PATH = OUT_DIR / "dict_store.json"
+DELTA_DIR = OUT_DIR / "deltas"
 
-# -------------------------
-# .env loader (no extra deps)
-# -------------------------
-def load_dotenv_simple(dotenv_path: Path = Path(".env")) -> None:
-    """
-    Minimal .env loader:
-    - supports KEY=VALUE (VALUE may be quoted with " or ')
-    - ignores blank lines and comments starting with #
-    - does NOT override existing os.environ values
-    """
-    if not dotenv_path.exists():
-        return
-
-    for raw_line in dotenv_path.read_text(encoding="utf-8").splitlines():
-        line = raw_line.strip()
-        if not line or line.startswith("#"):
-            continue
-        if "=" not in line:
-            continue
-
-        key, val = line.split("=", 1)
-        key = key.strip()
-        val = val.strip()
-
-        # strip surrounding quotes
-        if (val.startswith('"') and val.endswith('"')) or (val.startswith("'") and val.endswith("'")):
-            val = val[1:-1]
-
-        # do not override if already set in environment
-        os.environ.setdefault(key, val)
-
-
-# -------------------------
-# ENV helpers
-# -------------------------
-def require_env(key: str) -> str:
-    val = os.getenv(key)
-    if val is None or str(val).strip() == "":
-        raise SystemExit(
-            f"Missing required env var: {key}\n"
-            f"Tip: put it in .env at repo root (or export it in your shell)."
-        )
-    return val
-
-
-def conn_str() -> str:
-    host = require_env("PGHOST")
-    port = require_env("PGPORT")
-    user = require_env("PGUSER")
-    password = require_env("PGPASSWORD")
-    db = require_env("PGDB")
-    return f"host={host} port={port} dbname={db} user={user} password={password}"
+# A count change is reported only if both thresholds are reached
+MIN_CHANGE_ABS = 1
+MIN_CHANGE_PCT = 5.0
 
 
 # -------------------------
@@ -195,6 +174,92 @@ cross join top1 t;
 """.strip()
 
 
+def build_fingerprint_sql(schema: str, table: str) -> str:
+    """
+    Cheap, order-independent table fingerprint: row count + sum of row hashes.
+    One sequential scan per source table (shared by all its targets).
+    """
+    s = q_ident(schema)
+    t = q_ident(table)
+
+    return f"""
+select
+  count(*)::bigint as row_cnt,
+  coalesce(sum(hashtext(x::text)::bigint), 0)::bigint as row_hash_sum
+from {s}.{t} x;
+""".strip()
+
+
+# -------------------------
+# Dictionary store (previous run state)
+# -------------------------
+def target_key(schema: str, table: str, col: str) -> str:
+    return f"{schema}.{table}.{col}"
+
+
+def content_hash(rows: Iterable[Tuple]) -> str:
+    h = hashlib.sha256()
+    for value, cnt in rows:
+        h.update(f"{value}\x1f{cnt}\x1e".encode("utf-8"))
+    return h.hexdigest()
+
+
+def load_store(path: Path) -> Dict[str, dict]:
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def save_store(path: Path, store: Dict[str, dict]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps(store, ensure_ascii=False, indent=1, sort_keys=True), encoding="utf-8")
+    tmp.replace(path)
+
+
+def find_baseline_entry(baseline: Dict[str, dict], table: str, col: str) -> Optional[dict]:
+    """Cross-store lookup ignores the schema (stg.orders.x <-> clean.orders.x)."""
+    for key, entry in baseline.items():
+        _, b_table, b_col = key.split(".", 2)
+        if b_table == table and b_col == col:
+            return entry
+    return None
+
+
+def diff_distributions(
+    prev: Dict[str, int],
+    curr: Dict[str, int],
+    min_abs: int = MIN_CHANGE_ABS,
+    min_pct: float = MIN_CHANGE_PCT,
+) -> List[Tuple]:
+    """
+    Returns delta rows: (change, col_value, prev_cnt, cnt, diff, diff_pct)
+      change = new | vanished | changed
+    """
+    out: List[Tuple] = []
+
+    for value, cnt in curr.items():
+        if value not in prev:
+            out.append(("new", value, 0, cnt, cnt, ""))
+
+    for value, prev_cnt in prev.items():
+        if value not in curr:
+            out.append(("vanished", value, prev_cnt, 0, -prev_cnt, -100.0))
+
+    for value, cnt in curr.items():
+        prev_cnt = prev.get(value)
+        if prev_cnt is None or prev_cnt == cnt:
+            continue
+        diff = cnt - prev_cnt
+        diff_pct = round(diff * 100.0 / prev_cnt, 2) if prev_cnt else 0.0
+        if abs(diff) >= min_abs and abs(diff_pct) >= min_pct:
+            out.append(("changed", value, prev_cnt, cnt, diff, diff_pct))
+
+    order = {"new": 0, "vanished": 1, "changed": 2}
+    out.sort(key=lambda r: (order[r[0]], -abs(r[4]), r[1]))
+    return out
+
+
 # -------------------------
 # IO helpers
 # -------------------------
@@ -210,17 +275,37 @@ def write_rows_to_csv(path: Path, headers: List[str], rows: Iterable[Tuple]) ->
 # -------------------------
 # Main
 # -------------------------
-def main() -> int:
-    # load .env first (if exists). env vars already set in shell will win.
-    load_dotenv_simple(Path(".env"))
-
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(description="Generate value dictionaries (incremental).")
+    ap.add_argument("--schema", default=None, help="Override schema of every DICT_TARGETS entry (e.g. clean)")
+    ap.add_argument("--store", default=str(STORE_PATH), help="Dictionary store (JSON) kept between runs")
+    ap.add_argument("--baseline-store", default=None, help="Diff against this store instead of the previous run")
+    ap.add_argument("--force", action="store_true", help="Recompute every target even if its table is unchanged")
+    ap.add_argument("--min-change", type=int, default=MIN_CHANGE_ABS, help="min abs count change to report")
+    ap.add_argument("--min-change-pct", type=float, default=MIN_CHANGE_PCT, help="min %% count change to report")
+    ap.add_argument("--summary", action="store_true", help="Print the per-target timing / buffer summary at the end")
+    ap.add_argument("--skip-if-empty", action="store_true", help="Exit 0 with a notice when DICT_TARGETS is empty")
+    return ap.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+
+    if not DICT_TARGETS and args.skip_if_empty:
+        print("DICT_TARGETS is empty: no dictionaries to build (skipped).")
+        return 0
     if not DICT_TARGETS:
         raise SystemExit(
             "DICT_TARGETS is empty.\n"
             "Edit python/05_generate_tabledictionaries.py and add targets."
         )
 
+    targets = [(args.schema or schema, table, col) for (schema, table, col) in DICT_TARGETS]
+
     OUT_DIR.mkdir(parents=True, exist_ok=True)
+    store_path = Path(args.store)
+    store = load_store(store_path)
+    baseline = load_store(Path(args.baseline_store)) if args.baseline_store else None
 
     index_rows: List[Tuple] = []
     index_headers = [
@@ -235,36 +320,129 @@ def main() -> int:
         "top_cnt",
         "top_pct",
     ]
-
-    with psycopg.connect(conn_str()) as con:
-        for (schema, table, col) in DICT_TARGETS:
-            print(f"== {schema}.{table}.{col} ==")
-
-            # 1) dictionary file
-            dict_sql = build_dict_sql(schema, table, col, TOP_N)
-            with con.cursor() as cur:
-                cur.execute(dict_sql)
-                rows = cur.fetchall()
-
+    recomputed = 0
+    run = RunLog("05_generate_tabledictionaries")
+
+    cfg = pgdb.load_config(application_name="05_generate_tabledictionaries")
+    print(f"Target: {cfg.describe()}")
+    with pgdb.connect(cfg) as con:
+        # 0) one fingerprint per source table
+        fingerprints: Dict[Tuple[str, str], str] = {}
+        for (schema, table) in dict.fromkeys((s, t) for (s, t, _) in targets):
+            with run.stage(f"fingerprint {schema}.{table}", pg=con) as st:
+                with con.cursor() as cur:
+                    cur.execute(build_fingerprint_sql(schema, table))
+                    row_cnt, row_hash_sum = cur.fetchone()
+                st.rows = int(row_cnt)
+            fingerprints[(schema, table)] = f"{row_cnt}:{row_hash_sum}"
+
+        for (schema, table, col) in targets:
+            key = target_key(schema, table, col)
+            fp = fingerprints[(schema, table)]
+            prev = store.get(key)
             out_name = f"{schema}__{table}__{col}__dict.csv"
             out_path = OUT_DIR / out_name
-            write_rows_to_csv(out_path, ["col_value", "cnt"], rows)
-            print(f"  - OK: {out_path.as_posix()} (rows={len(rows)})")
 
-            # 2) index row
-            idx_sql = build_index_sql(schema, table, col)
-            with con.cursor() as cur:
-                cur.execute(idx_sql)
-                idx = cur.fetchone()
-                if idx:
-                    index_rows.append(idx)
+            if (
+                not args.force
+                and baseline is None
+                and prev is not None
+                and prev.get("table_fingerprint") == fp
+                and out_path.exists()
+            ):
+                print(f"== {schema}.{table}.{col} == unchanged (skip)")
+                if prev.get("index_row"):  # [] = empty table, build_index_sql returned no row
+                    index_rows.append(tuple(prev["index_row"]))
+                continue
+
+            print(f"== {schema}.{table}.{col} ==")
+            recomputed += 1
+
+            with run.stage(f"dictionary {schema}.{table}.{col}", pg=con) as st:
+                # 1) dictionary file
+                dict_sql = build_dict_sql(schema, table, col, TOP_N)
+                with con.cursor() as cur:
+                    cur.execute(dict_sql)
+                    rows = cur.fetchall()
+
+                write_rows_to_csv(out_path, ["col_value", "cnt"], rows)
+                print(f"  - OK: {out_path.as_posix()} (rows={len(rows)})")
+
+                # 2) index row
+                idx_sql = build_index_sql(schema, table, col)
+                idx = None
+                with con.cursor() as cur:
+                    cur.execute(idx_sql)
+                    idx = cur.fetchone()
+                    if idx:
+                        index_rows.append(idx)
+                st.rows = int(idx[3]) if idx and idx[3] is not None else None
+
+            # 3) delta vs previous run (or baseline store)
+            curr_values = {str(v): int(c) for v, c in rows}
+            chash = content_hash(rows)
+            ref = find_baseline_entry(baseline, table, col) if baseline is not None else prev
+            delta_path = DELTA_DIR / f"{schema}__{table}__{col}__delta.csv"
+            delta_counts = None
+
+            if ref is None and delta_path.exists():
+                delta_path.unlink()  # left over from an earlier store; nothing to diff against now
+            if ref is not None:
+                if ref.get("content_hash") == chash:
+                    delta = []
+                else:
+                    delta = diff_distributions(
+                        ref.get("values", {}), curr_values, args.min_change, args.min_change_pct
+                    )
+                if delta:
+                    write_rows_to_csv(
+                        delta_path, ["change", "col_value", "prev_cnt", "cnt", "diff", "diff_pct"], delta
+                    )
+                    print(f"  - DELTA: {delta_path.as_posix()} (rows={len(delta)})")
+                elif delta_path.exists():
+                    delta_path.unlink()
+
+                delta_counts = [
+                    sum(1 for d in delta if d[0] == "new"),
+                    sum(1 for d in delta if d[0] == "vanished"),
+                    sum(1 for d in delta if d[0] == "changed"),
+                    ref.get("content_hash") != chash,
+                ]
+
+            store[key] = {
+                "table_fingerprint": fp,
+                "content_hash": chash,
+                "values": curr_values,
+                "index_row": [None if v is None else str(v) for v in idx] if idx else [],
+                "delta": delta_counts,
+            }
 
     # Write summary index
     index_path = OUT_DIR / "dictionary_index.csv"
     write_rows_to_csv(index_path, index_headers, index_rows)
-    print(f"\nDone. index={index_path.as_posix()} targets={len(DICT_TARGETS)}")
+
+    # Delta index: rebuilt from the store every run, so it always matches the delta files on disk
+    # (skipped targets keep the delta of the run that last recomputed them)
+    delta_index_rows = [
+        (*key.split(".", 2), *entry["delta"])
+        for key, entry in sorted(store.items())
+        if entry.get("delta")
+    ]
+    write_rows_to_csv(
+        DELTA_DIR / "delta_index.csv",
+        ["table_schema", "table_name", "column_name", "new_cnt", "vanished_cnt", "changed_cnt", "content_changed"],
+        delta_index_rows,
+    )
+
+    save_store(store_path, store)
+    print(
+        f"\nDone. index={index_path.as_posix()} targets={len(targets)} "
+        f"recomputed={recomputed} skipped={len(targets) - recomputed}"
+    )
+    if args.summary:
+        run.print_summary()
     return 0
 
 
 if __name__ == "__main__":
-    raise SystemExit(main())
\ No newline at end of file
+    raise SystemExit(main())
@@ -0,0 +1,542 @@
+"""
+06_duckdb_profile.py
+
+Embedded DuckDB backend: the same profiling as the Postgres path, with no server.
+
+What it does
+- Loads raw_data/*.csv into raw.* (all text, parallel CSV scans; the same NULL
+  tokens pandas uses in 01_load_raw_to_postgres.py). UTF-16 files are transcoded
+  to UTF-8 in a stream first.
+- Runs sql/00_setup/02_create_stg_views.sql as-is (DuckDB compatible once btrim()
+  is defined as a macro).
+- Computes the sql/10_scorecard metrics on stg.*:
+    01 nulls / 02 pk dupes / 03 date range / 04 negative flags / 05 fk orphans
+  with DuckDB macros for dq.try_parse_date / dq.try_parse_numeric / dq.norm_id.
+  The table / column maps are read from the SQL pack (scorecard_spec.py).
+- Writes (default under artifacts/duckdb/):
+    scorecard.csv, fk_orphans_detail.csv (same columns as the Postgres exports)
+    tabledictionaries/<schema>__<table>__<column>__dict.csv + dictionary_index.csv
+  Dictionary targets: --dict schema.table.column ..., else the targets of the
+  Postgres run (<reference-dir>/tabledictionaries/*__dict.csv).
+  No incremental store here: every run recomputes every target.
+
+Parity (--parity)
+- Compares the DuckDB outputs with the Postgres exports in --reference-dir
+  (default artifacts/): scorecard metrics (updated_at ignored, numbers compared
+  as numbers), fk_orphans_detail (if exported with --export-fk-detail) and every
+  dictionary (value counts; top_value may differ only between tied values).
+- Exit code 1 on any mismatch.
+
+Note: raw.* text is not byte-identical to the Postgres load (pandas writes
+inferred floats back as "1.0", DuckDB keeps the file text). The stg views
+normalize ids and every metric only depends on NULL-ness, ids, dates and signs,
+so the scorecard is the same.
+
+Usage (from repo root):
+  python python/06_duckdb_profile.py
+  python python/06_duckdb_profile.py --parity
+  python python/06_duckdb_profile.py --raw-dir synthetic_data/x10 --db artifacts/duckdb/profile.duckdb
+
+Dependencies
+  pip install duckdb
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import shutil
+import tempfile
+import time
+from decimal import Decimal
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import duckdb
+except ImportError as e:
+    raise SystemExit("Missing dependency duckdb. Run: pip install duckdb") from e
+
+from csv_reader import NULL_VALUES, open_utf8, sniff_encoding
+from instrument import RunLog
+from scorecard_spec import DATE_COLS, FK_RELATIONSHIPS, NUM_COLS, PK_COLS
+
+
+RAW_DIR = Path("raw_data")
+STG_VIEWS_SQL = Path("sql/00_setup/02_create_stg_views.sql")
+OUT_DIR = Path("artifacts/duckdb")
+REFERENCE_DIR = Path("artifacts")
+
+T_SCHEMA = "stg"
+
+SCORECARD_COLS = [
+    "table_schema", "table_name", "row_count", "col_count", "null_cells", "total_cells",
+    "overall_null_pct", "suspected_pk", "pk_null_pct", "pk_duplicate_rows", "date_min", "date_max",
+    "neg_value_flags", "fk_orphan_rows", "updated_at",
+]
+FK_DETAIL_COLS = [
+    "child_schema", "child_table", "child_fk_col", "parent_schema", "parent_table", "parent_pk_col",
+    "orphan_rows", "checked_at", "base_rows", "null_fk_rows", "orphan_rows_raw", "orphan_rows_norm",
+    "fixable_by_normalize_rows",
+]
+INDEX_COLS = [
+    "table_schema", "table_name", "column_name", "total_rows", "distinct_cnt_mapped",
+    "null_cnt", "blank_cnt", "top_value", "top_cnt", "top_pct",
+]
+
+# DuckDB versions of the dq.* helpers (same rules as the plpgsql / sql functions)
+DQ_MACROS_SQL = r"""
+create schema if not exists dq;
+
+-- Postgres built-in used by 02_create_stg_views.sql (both trim spaces only)
+create or replace macro btrim(x) as trim(x);
+
+create or replace macro dq.norm_id(x) as
+  nullif(regexp_replace(trim(x), '\.0$', ''), '');
+
+create or replace macro dq.try_parse_numeric(v) as
+  case when v ~ '^-?\d+(\.\d+)?$' then cast(v as double) end;
+
+-- DD?MM?YYYY vs MM?DD?YYYY: first part > 12 -> DD first, else second part > 12 -> MM first, else DD first
+create or replace macro dq.try_parse_date(v) as
+  case
+    when v is null or trim(v) = '' then null
+    when v ~ '^\d{4}-\d{2}-\d{2}$' then try_cast(v as date)
+    when v ~ '^\d{4}/\d{2}/\d{2}$' then try_cast(replace(v, '/', '-') as date)
+    when v ~ '^\d{2}-\d{2}-\d{4}$' or v ~ '^\d{2}/\d{2}/\d{4}$' then
+      case
+        when cast(substr(v, 1, 2) as int) <= 12 and cast(substr(v, 4, 2) as int) > 12
+          then cast(try_strptime(replace(v, '/', '-'), '%m-%d-%Y') as date)
+        else cast(try_strptime(replace(v, '/', '-'), '%d-%m-%Y') as date)
+      end
+  end;
+"""
+
+
+def q(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def lit(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+# -------------------------
+# Load
+# -------------------------
+def load_raw_tables(con: "duckdb.DuckDBPyConnection", raw_dir: Path, run: RunLog) -> Dict[str, int]:
+    paths = sorted(p for p in raw_dir.glob("*.csv") if p.is_file())
+    if not paths:
+        raise SystemExit(f"No CSV files in: {raw_dir}")
+    con.execute("create schema if not exists raw")
+    nulls = "[" + ", ".join(lit(v) for v in NULL_VALUES) + "]"
+    counts: Dict[str, int] = {}
+
+    with tempfile.TemporaryDirectory(prefix="duckdb_raw_") as tmp:
+        for path in paths:
+            enc = sniff_encoding(path)
+            with run.stage(f"load raw.{path.stem}", bytes_read=path.stat().st_size, encoding=enc) as st:
+                src = path
+                if enc not in ("utf-8", "utf-8-sig"):
+                    src = Path(tmp) / path.name
+                    with open_utf8(path, enc) as fin, open(src, "wb") as fout:
+                        shutil.copyfileobj(fin, fout, 1 << 22)
+                con.execute(
+                    f"create or replace table raw.{q(path.stem)} as "
+                    f"select * from read_csv({lit(src.as_posix())}, header = true, all_varchar = true, "
+                    f"nullstr = {nulls}, parallel = true)"
+                )
+                st.rows = counts[path.stem] = con.execute(f"select count(*) from raw.{q(path.stem)}").fetchone()[0]
+            print(f" - raw.{path.stem:<24} rows={counts[path.stem]:>12,}  encoding={enc}")
+    return counts
+
+
+def create_stg_views(con: "duckdb.DuckDBPyConnection", sql_path: Path) -> List[str]:
+    con.execute(DQ_MACROS_SQL)
+    con.execute(sql_path.read_text(encoding="utf-8"))
+    rows = con.execute(
+        "select table_name from information_schema.tables "
+        "where table_schema = ? and table_type = 'VIEW' order by table_name",
+        [T_SCHEMA],
+    ).fetchall()
+    return [r[0] for r in rows]
+
+
+# -------------------------
+# Scorecard metrics
+# -------------------------
+def view_columns(con: "duckdb.DuckDBPyConnection", table: str) -> List[str]:
+    rows = con.execute(
+        "select column_name from information_schema.columns "
+        "where table_schema = ? and table_name = ? order by ordinal_position",
+        [T_SCHEMA, table],
+    ).fetchall()
+    return [r[0] for r in rows]
+
+
+def pct(part: int, whole: int, digits: int = 4) -> Optional[Decimal]:
+    if not whole:
+        return None
+    return round(Decimal(part) * 100 / Decimal(whole), digits)
+
+
+def null_metrics(con: "duckdb.DuckDBPyConnection", table: str) -> dict:
+    cols = view_columns(con, table)
+    null_expr = " + ".join(f"count(*) filter (where {q(c)} is null)" for c in cols) or "0"
+    row_count, null_cells = con.execute(
+        f"select count(*), ({null_expr}) from {T_SCHEMA}.{q(table)}"
+    ).fetchone()
+    total = row_count * len(cols)
+    return {
+        "row_count": row_count,
+        "col_count": len(cols),
+        "null_cells": null_cells,
+        "total_cells": total,
+        "overall_null_pct": pct(null_cells, total),
+    }
+
+
+def pk_metrics(con: "duckdb.DuckDBPyConnection", table: str, pk: str) -> dict:
+    row_cnt, pk_null_rows, dupes = con.execute(
+        f"""
+        select
+          count(*),
+          count(*) filter (where {q(pk)} is null),
+          coalesce((
+            select sum(cnt - 1)
+            from (
+              select count(*) as cnt
+              from {T_SCHEMA}.{q(table)}
+              where {q(pk)} is not null
+              group by {q(pk)}
+              having count(*) > 1
+            ) d
+          ), 0)
+        from {T_SCHEMA}.{q(table)}
+        """
+    ).fetchone()
+    return {"suspected_pk": pk, "pk_null_pct": pct(pk_null_rows, row_cnt), "pk_duplicate_rows": int(dupes)}
+
+
+def date_metrics(con: "duckdb.DuckDBPyConnection", table: str, cols: Sequence[str]) -> dict:
+    exprs = ", ".join(f"dq.try_parse_date({q(c)})" for c in cols)
+    date_min, date_max = con.execute(
+        f"select min(least({exprs})), max(greatest({exprs})) from {T_SCHEMA}.{q(table)}"
+    ).fetchone()
+    return {"date_min": date_min, "date_max": date_max}
+
+
+def negative_metrics(con: "duckdb.DuckDBPyConnection", table: str, cols: Sequence[str]) -> dict:
+    any_neg = " or ".join(f"(dq.try_parse_numeric({q(c)}) < 0)" for c in cols) or "false"
+    (neg_rows,) = con.execute(f"select count(*) from {T_SCHEMA}.{q(table)} where {any_neg}").fetchone()
+    return {"neg_value_flags": neg_rows}
+
+
+def fk_metrics(con: "duckdb.DuckDBPyConnection", child: str, fk: str, parent: str, pk: str) -> dict:
+    base_rows, null_fk_rows, orphan_raw, orphan_norm, fixable = con.execute(
+        f"""
+        with base as (
+          select c.{q(fk)} as fk_raw, dq.norm_id(c.{q(fk)}) as fk_norm
+          from {T_SCHEMA}.{q(child)} c
+        ),
+        p_raw as (
+          select {q(pk)} as pk_raw, dq.norm_id({q(pk)}) as pk_norm
+          from {T_SCHEMA}.{q(parent)}
+        ),
+        j as (
+          select b.fk_raw, b.fk_norm, pr.pk_raw as hit_raw, pn.pk_raw as hit_norm
+          from base b
+          -- "= " never matches NULL: the Postgres "is not null and" guard is implied, and
+          -- DuckDB plans a nested loop instead of a hash join when it is spelled out
+          left join p_raw pr on b.fk_raw = pr.pk_raw
+          left join p_raw pn on b.fk_norm = pn.pk_norm
+        )
+        select
+          count(*) filter (where fk_raw is not null),
+          count(*) filter (where fk_raw is null),
+          count(*) filter (where fk_raw is not null and hit_raw is null),
+          count(*) filter (where fk_raw is not null and fk_norm is not null and hit_norm is null),
+          count(*) filter (where fk_raw is not null and hit_raw is null and hit_norm is not null)
+        from j
+        """
+    ).fetchone()
+    return {
+        "child_schema": T_SCHEMA, "child_table": child, "child_fk_col": fk,
+        "parent_schema": T_SCHEMA, "parent_table": parent, "parent_pk_col": pk,
+        "orphan_rows": orphan_norm,  # legacy orphan_rows = norm (business orphan)
+        "base_rows": base_rows,
+        "null_fk_rows": null_fk_rows,
+        "orphan_rows_raw": orphan_raw,
+        "orphan_rows_norm": orphan_norm,
+        "fixable_by_normalize_rows": fixable,
+    }
+
+
+def build_scorecard(con: "duckdb.DuckDBPyConnection", views: List[str], run: RunLog) -> Tuple[List[dict], List[dict]]:
+    now = time.strftime("%Y-%m-%d %H:%M:%S")
+    cards: Dict[str, dict] = {t: {"table_schema": T_SCHEMA, "table_name": t, "updated_at": now} for t in views}
+
+    with run.stage("01_nulls"):
+        for t in views:
+            cards[t].update(null_metrics(con, t))
+    with run.stage("02_pk_dupes"):
+        for t, pk in PK_COLS.items():
+            if t in cards:
+                cards[t].update(pk_metrics(con, t, pk))
+    with run.stage("03_date_range"):
+        for t, cols in DATE_COLS.items():
+            if t in cards:
+                cards[t].update(date_metrics(con, t, cols))
+    with run.stage("04_negative_flags"):
+        for t, cols in NUM_COLS.items():
+            if t in cards:
+                cards[t].update(negative_metrics(con, t, cols))
+
+    details: List[dict] = []
+    with run.stage("05_fk_orphans"):
+        for child, fk, parent, pk in FK_RELATIONSHIPS:
+            d = fk_metrics(con, child, fk, parent, pk)
+            d["checked_at"] = now
+            details.append(d)
+        for t in cards:
+            mine = [d for d in details if d["child_table"] == t]
+            if mine:
+                cards[t]["fk_orphan_rows"] = sum(d["orphan_rows_norm"] for d in mine)
+
+    return [cards[t] for t in sorted(cards)], details
+
+
+# -------------------------
+# Dictionaries (05_generate_tabledictionaries.py)
+# -------------------------
+def mapped_value_sql(schema: str, table: str, col: str) -> str:
+    c = q(col)
+    return f"""
+      select
+        case
+          when {c} is null then '[NULL]'
+          when trim(cast({c} as varchar)) = '' then '[BLANK]'
+          else trim(cast({c} as varchar))
+        end as col_value
+      from {q(schema)}.{q(table)}
+    """
+
+
+def dictionary(con: "duckdb.DuckDBPyConnection", schema: str, table: str, col: str) -> Tuple[list, tuple]:
+    rows = con.execute(
+        f"select col_value, count(*) as cnt from ({mapped_value_sql(schema, table, col)}) x "
+        f"group by 1 order by cnt desc, col_value"
+    ).fetchall()
+    total = sum(c for _, c in rows)
+    null_cnt = next((c for v, c in rows if v == "[NULL]"), 0)
+    blank_cnt = next((c for v, c in rows if v == "[BLANK]"), 0)
+    top_value, top_cnt = rows[0] if rows else (None, None)
+    top_pct = Decimal("0") if not total else round(Decimal(top_cnt) * 100 / Decimal(total), 2)
+    idx = (schema, table, col, total, len(rows), null_cnt, blank_cnt, top_value, top_cnt, top_pct)
+    return rows, idx
+
+
+def resolve_dict_targets(args: argparse.Namespace) -> List[Tuple[str, str, str]]:
+    if args.dict:
+        targets = []
+        for spec in args.dict:
+            parts = spec.split(".")
+            if len(parts) != 3:
+                raise SystemExit(f"--dict expects schema.table.column, got: {spec}")
+            targets.append((parts[0], parts[1], parts[2]))
+        return targets
+    # same targets as the Postgres run: its dictionary files (the index only lists recomputed ones)
+    ref_dir = Path(args.reference_dir) / "tabledictionaries"
+    targets = []
+    for p in sorted(ref_dir.glob("*__dict.csv")):
+        parts = p.name[: -len("__dict.csv")].split("__")
+        if len(parts) == 3:
+            targets.append((parts[0], parts[1], parts[2]))
+    return targets
+
+
+# -------------------------
+# Output
+# -------------------------
+def fmt(v) -> str:
+    return "" if v is None else str(v)
+
+
+def write_dicts(path: Path, cols: List[str], rows: List[dict]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(cols)
+        for r in rows:
+            w.writerow([fmt(r.get(c)) for c in cols])
+
+
+def write_rows(path: Path, headers: List[str], rows: List[tuple]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(headers)
+        for r in rows:
+            w.writerow([fmt(v) for v in r])
+
+
+# -------------------------
+# Parity vs Postgres exports
+# -------------------------
+def read_csv_rows(path: Path) -> List[dict]:
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        return list(csv.DictReader(f))
+
+
+def same_value(a: str, b: str) -> bool:
+    """'' == '' ; numbers compared as numbers ("0.0" == "0"); else exact text."""
+    a, b = (a or "").strip(), (b or "").strip()
+    if a == b:
+        return True
+    try:
+        return abs(float(a) - float(b)) < 1e-9
+    except ValueError:
+        return False
+
+
+def compare_tables(label: str, ours: List[dict], ref: List[dict], keys: List[str], ignore: set) -> List[str]:
+    def keyed(rows: List[dict]) -> Dict[tuple, dict]:
+        return {tuple(r[k] for k in keys): r for r in rows}
+
+    problems: List[str] = []
+    a, b = keyed(ours), keyed(ref)
+    for k in sorted(set(a) | set(b)):
+        if k not in a or k not in b:
+            problems.append(f"{label} {'.'.join(k)}: only in {'duckdb' if k in a else 'postgres'}")
+            continue
+        for col in b[k]:
+            if col in ignore or col not in a[k]:
+                continue
+            if not same_value(a[k][col], b[k][col]):
+                problems.append(f"{label} {'.'.join(k)}.{col}: duckdb={a[k][col]!r} postgres={b[k][col]!r}")
+    return problems
+
+
+def check_parity(out_dir: Path, ref_dir: Path) -> List[str]:
+    problems: List[str] = []
+    checked: List[str] = []
+
+    ref_card = ref_dir / "scorecard.csv"
+    if ref_card.exists():
+        problems += compare_tables(
+            "scorecard", read_csv_rows(out_dir / "scorecard.csv"), read_csv_rows(ref_card),
+            ["table_schema", "table_name"], {"updated_at"},
+        )
+        checked.append("scorecard.csv")
+
+    ref_fk = ref_dir / "fk_orphans_detail.csv"
+    if ref_fk.exists():
+        problems += compare_tables(
+            "fk_orphans_detail", read_csv_rows(out_dir / "fk_orphans_detail.csv"), read_csv_rows(ref_fk),
+            ["child_table", "child_fk_col", "parent_table", "parent_pk_col"], {"checked_at"},
+        )
+        checked.append("fk_orphans_detail.csv")
+
+    ref_dicts = ref_dir / "tabledictionaries"
+    our_dicts = out_dir / "tabledictionaries"
+    n_dicts = 0
+    for ours_path in sorted(our_dicts.glob("*__dict.csv")):
+        ref_path = ref_dicts / ours_path.name
+        if not ref_path.exists():
+            continue
+        n_dicts += 1
+        ours = {r["col_value"]: int(r["cnt"]) for r in read_csv_rows(ours_path)}
+        ref = {r["col_value"]: int(r["cnt"]) for r in read_csv_rows(ref_path)}
+        for v in sorted(set(ours) | set(ref)):
+            if ours.get(v) != ref.get(v):
+                problems.append(f"dictionary {ours_path.name} {v!r}: duckdb={ours.get(v)} postgres={ref.get(v)}")
+    if n_dicts:
+        checked.append(f"{n_dicts} dictionaries")
+
+    ref_index = ref_dicts / "dictionary_index.csv"
+    our_index = our_dicts / "dictionary_index.csv"
+    if ref_index.exists() and our_index.exists():
+        keys = ["table_schema", "table_name", "column_name"]
+        ref_rows = {tuple(r[k] for k in keys) for r in read_csv_rows(ref_index)}
+        ours = [r for r in read_csv_rows(our_index) if tuple(r[k] for k in keys) in ref_rows]
+        ref = [r for r in read_csv_rows(ref_index) if tuple(r[k] for k in keys) in {tuple(o[k] for k in keys) for o in ours}]
+        # ties on top_cnt are ordered by collation (C in DuckDB, the DB locale in Postgres)
+        problems += compare_tables("dictionary_index", ours, ref, keys, {"top_value"})
+        checked.append("dictionary_index.csv")
+
+    print(f" - Checked: {', '.join(checked) or 'nothing (no Postgres exports found)'}")
+    return problems
+
+
+# -------------------------
+# Main
+# -------------------------
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(description="Scorecard + dictionaries on embedded DuckDB (no Postgres server)")
+    ap.add_argument("--raw-dir", type=Path, default=RAW_DIR, help="Folder of raw *.csv (default: raw_data)")
+    ap.add_argument("--out-dir", type=Path, default=OUT_DIR, help="Output folder (default: artifacts/duckdb)")
+    ap.add_argument("--db", default=":memory:", help="DuckDB database file to keep raw/stg for ad-hoc queries")
+    ap.add_argument("--threads", type=int, default=None, help="DuckDB threads (default: all cores)")
+    ap.add_argument("--dict", nargs="*", default=None, help="Dictionary targets schema.table.column")
+    ap.add_argument("--no-dict", action="store_true", help="Skip dictionaries")
+    ap.add_argument("--parity", action="store_true", help="Compare outputs with the Postgres exports in --reference-dir")
+    ap.add_argument("--reference-dir", type=Path, default=REFERENCE_DIR, help="Postgres artifacts (default: artifacts)")
+    ap.add_argument("--summary", action="store_true", help="Print the per-stage timing summary at the end")
+    return ap.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    run = RunLog("06_duckdb_profile")
+    out_dir: Path = args.out_dir
+
+    if args.db != ":memory:":
+        Path(args.db).parent.mkdir(parents=True, exist_ok=True)
+    con = duckdb.connect(args.db)
+    if args.threads:
+        con.execute(f"set threads = {int(args.threads)}")
+
+    print(f"== Load {args.raw_dir.as_posix()} -> DuckDB ({args.db}) ==")
+    load_raw_tables(con, args.raw_dir, run)
+    with run.stage(STG_VIEWS_SQL.name):
+        views = create_stg_views(con, STG_VIEWS_SQL)
+    print(f" - stg views: {len(views)}")
+
+    print("== Scorecard ==")
+    cards, details = build_scorecard(con, views, run)
+    write_dicts(out_dir / "scorecard.csv", SCORECARD_COLS, cards)
+    write_dicts(out_dir / "fk_orphans_detail.csv", FK_DETAIL_COLS, details)
+    print(f" - Exported: {(out_dir / 'scorecard.csv').as_posix()}  (rows={len(cards)})")
+    print(f" - Exported: {(out_dir / 'fk_orphans_detail.csv').as_posix()}  (rows={len(details)})")
+
+    targets = [] if args.no_dict else resolve_dict_targets(args)
+    if targets:
+        print(f"== Dictionaries ({len(targets)} targets) ==")
+        dict_dir = out_dir / "tabledictionaries"
+        index_rows: List[tuple] = []
+        for schema, table, col in targets:
+            with run.stage(f"dictionary {schema}.{table}.{col}") as st:
+                rows, idx = dictionary(con, schema, table, col)
+                write_rows(dict_dir / f"{schema}__{table}__{col}__dict.csv", ["col_value", "cnt"], rows)
+                index_rows.append(idx)
+                st.rows = idx[3]
+        write_rows(dict_dir / "dictionary_index.csv", INDEX_COLS, index_rows)
+        print(f" - Exported: {dict_dir.as_posix()}/  (targets={len(index_rows)})")
+    con.close()
+
+    rc = 0
+    if args.parity:
+        print(f"== Parity vs {args.reference_dir.as_posix()} ==")
+        problems = check_parity(out_dir, args.reference_dir)
+        for p in problems:
+            print(f"   MISMATCH {p}")
+        print(" - OK: DuckDB matches Postgres" if not problems else f" - {len(problems)} mismatches")
+        rc = 1 if problems else 0
+
+    if args.summary:
+        run.print_summary()
+    return rc
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
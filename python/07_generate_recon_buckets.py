@@ -0,0 +1,306 @@
+"""
+07_generate_recon_buckets.py
+
+Recon buckets (docs/06_recon_buckets_and_exception_list.md, section 2) in one command.
+
+For every configured relationship child.fk -> parent.pk (stg layer):
+  base rows, FK NULL rows, FK non-NULL rows, matched rows, orphan rows,
+  NULL %, orphan % and a severity from thresholds on the impact
+  (NULL-FK + orphan rows) / base rows:
+    High   >= --high   (default 5%)
+    Medium >= --medium (default 1%)
+    Low    otherwise
+
+How:
+- Relationships are grouped by child table: one query per child table scans it
+  once and left-joins every parent key set it references (distinct keys, so a
+  duplicated parent PK cannot inflate the counts).
+- Same definitions as the doc's proof query: matched = FK not NULL and found in
+  the parent, orphan = FK not NULL and not found.
+
+Backends:
+- postgres (default): stg.* views in the target database (python/pgdb.py settings)
+- duckdb: straight from raw CSVs (--raw-dir) via 06_duckdb_profile.py, no server
+
+Outputs:
+- artifacts/bucket.csv
+- artifacts/bucket.md (markdown table, same layout as the doc; orphan % only in the CSV)
+- --update-doc: also replaces the bucket table in docs/06_recon_buckets_and_exception_list.md
+
+Usage (from repo root):
+  python python/07_generate_recon_buckets.py
+  python python/07_generate_recon_buckets.py --backend duckdb --raw-dir synthetic_data/x10
+  python python/07_generate_recon_buckets.py --all --high 10 --medium 2 --update-doc
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import importlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from instrument import RunLog
+from scorecard_spec import FK_RELATIONSHIPS
+
+
+T_SCHEMA = "stg"
+OUT_CSV = Path("artifacts/bucket.csv")
+OUT_MD = Path("artifacts/bucket.md")
+DOC_PATH = Path("docs/06_recon_buckets_and_exception_list.md")
+
+HIGH_PCT = 5.0
+MEDIUM_PCT = 1.0
+
+# Bucket -> relationship (the ones explained in docs/06)
+BUCKETS: List[Tuple[str, str, str, str, str]] = [
+    ("A", "orders", "shipping_method_id", "shipping_methods", "shipping_method_id"),
+    ("B", "payments", "payment_method_id", "payment_methods", "payment_method_id"),
+    ("C", "inventory_transactions", "purchase_order_id", "purchase_orders", "purchase_order_id"),
+]
+
+# --all: the rest of sql/10_scorecard/05_fk_orphans.sql (no bucket letter)
+OTHER_RELATIONSHIPS: List[Tuple[str, str, str, str]] = [r for r in FK_RELATIONSHIPS if r not in {b[1:] for b in BUCKETS}]
+
+CSV_HEADERS = [
+    "Bucket", "Relationship", "Base-Table", "Base Rows", "FK NULL Rows", "FK Non-NULL Rows",
+    "Matched Rows", "Orphan Rows", "NULL %", "Orphan %", "Severity",
+]
+
+
+@dataclass
+class Relationship:
+    bucket: str
+    child: str
+    fk: str
+    parent: str
+    pk: str
+
+    @property
+    def label(self) -> str:
+        return f"{self.child}.{self.fk} → {self.parent}.{self.pk}"
+
+
+@dataclass
+class BucketRow:
+    rel: Relationship
+    base_rows: int
+    fk_null_rows: int
+    matched_rows: int
+    orphan_rows: int
+    severity: str = ""
+
+    @property
+    def fk_non_null_rows(self) -> int:
+        return self.base_rows - self.fk_null_rows
+
+    @property
+    def null_pct(self) -> float:
+        return 100.0 * self.fk_null_rows / self.base_rows if self.base_rows else 0.0
+
+    @property
+    def orphan_pct(self) -> float:
+        return 100.0 * self.orphan_rows / self.base_rows if self.base_rows else 0.0
+
+
+def q(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def configured_relationships(include_all: bool) -> List[Relationship]:
+    rels = [Relationship(*b) for b in BUCKETS]
+    if include_all:
+        rels += [Relationship("", *r) for r in OTHER_RELATIONSHIPS]
+    return rels
+
+
+def child_scan_sql(child: str, rels: List[Relationship]) -> str:
+    """One scan of the child table: base rows + (null, matched, orphan) per relationship."""
+    joins, metrics = [], ["count(*)"]
+    for i, r in enumerate(rels):
+        fk = f"c.{q(r.fk)}"
+        joins.append(
+            f"left join (select distinct {q(r.pk)} as k from {T_SCHEMA}.{q(r.parent)} "
+            f"where {q(r.pk)} is not null) p{i} on p{i}.k = {fk}"
+        )
+        metrics += [
+            f"count(*) filter (where {fk} is null)",
+            f"count(*) filter (where {fk} is not null and p{i}.k is not null)",
+            f"count(*) filter (where {fk} is not null and p{i}.k is null)",
+        ]
+    return (
+        "select " + ", ".join(metrics)
+        + f" from {T_SCHEMA}.{q(child)} c "
+        + " ".join(joins)
+    )
+
+
+def severity(row: BucketRow, high: float, medium: float) -> str:
+    impact = 100.0 * (row.fk_null_rows + row.orphan_rows) / row.base_rows if row.base_rows else 0.0
+    if impact >= high:
+        return "High"
+    if impact >= medium:
+        return "Medium"
+    return "Low"
+
+
+def compute_buckets(fetchone, rels: List[Relationship], run: RunLog, pg: Any = None) -> List[BucketRow]:
+    by_child: Dict[str, List[Relationship]] = {}
+    for r in rels:
+        by_child.setdefault(r.child, []).append(r)
+
+    rows: Dict[int, BucketRow] = {}
+    for child, child_rels in by_child.items():
+        with run.stage(f"scan {T_SCHEMA}.{child}", pg=pg, relationships=len(child_rels)) as st:
+            res = fetchone(child_scan_sql(child, child_rels))
+            base = int(res[0])
+            st.rows = base
+        for i, r in enumerate(child_rels):
+            null_rows, matched, orphan = (int(v) for v in res[1 + 3 * i: 4 + 3 * i])
+            rows[id(r)] = BucketRow(r, base, null_rows, matched, orphan)
+        print(f" - {T_SCHEMA}.{child}: {base:,} rows, {len(child_rels)} relationship(s)")
+    return [rows[id(r)] for r in rels]
+
+
+# -------------------------
+# Backends
+# -------------------------
+def run_postgres(args: argparse.Namespace, rels: List[Relationship], run: RunLog) -> List[BucketRow]:
+    import pgdb
+
+    cfg = pgdb.load_config(args.db_url, application_name="07_generate_recon_buckets")
+    print(f"== Postgres: {cfg.describe()} ==")
+    with pgdb.connect(cfg, autocommit=True) as con:
+        def fetchone(sql: str) -> tuple:
+            with con.cursor() as cur:
+                cur.execute(sql)
+                return cur.fetchone()
+
+        return compute_buckets(fetchone, rels, run, pg=con)
+
+
+def run_duckdb(args: argparse.Namespace, rels: List[Relationship], run: RunLog) -> List[BucketRow]:
+    duck = importlib.import_module("06_duckdb_profile")
+    con = duck.duckdb.connect(":memory:")
+    print(f"== DuckDB: {args.raw_dir.as_posix()} ==")
+    duck.load_raw_tables(con, args.raw_dir, run)
+    duck.create_stg_views(con, duck.STG_VIEWS_SQL)
+    try:
+        return compute_buckets(lambda sql: con.execute(sql).fetchone(), rels, run)
+    finally:
+        con.close()
+
+
+# -------------------------
+# Output
+# -------------------------
+def pct_text(v: float) -> str:
+    return f"{v:.2f}%"
+
+
+def write_bucket_csv(rows: List[BucketRow], path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(CSV_HEADERS)
+        for r in rows:
+            w.writerow([
+                r.rel.bucket, r.rel.label, r.rel.child, r.base_rows, r.fk_null_rows, r.fk_non_null_rows,
+                r.matched_rows, r.orphan_rows, pct_text(r.null_pct), pct_text(r.orphan_pct), r.severity,
+            ])
+
+
+def render_markdown(rows: List[BucketRow]) -> str:
+    """Same columns / padding as the table in docs/06 (so --update-doc only changes numbers)."""
+    headers = [
+        "Bucket", "Relationship", "Base Rows", "FK NULL Rows", "FK Non-NULL Rows",
+        "Matched Rows", "Orphan Rows", "NULL %", "Severity",
+    ]
+    right = {"Base Rows", "FK NULL Rows", "FK Non-NULL Rows", "Matched Rows", "Orphan Rows", "NULL %"}
+    body = [
+        [
+            f"**{r.rel.bucket}**" if r.rel.bucket else "",
+            f"`{r.rel.label}`",
+            f"{r.base_rows:,}",
+            f"{r.fk_null_rows:,}",
+            f"{r.fk_non_null_rows:,}",
+            f"{r.matched_rows:,}",
+            f"{r.orphan_rows:,}",
+            pct_text(r.null_pct),
+            r.severity,
+        ]
+        for r in rows
+    ]
+    widths = [max(len(h), *(len(b[i]) for b in body)) for i, h in enumerate(headers)]
+    lines = ["|" + "|".join(h.ljust(w) for h, w in zip(headers, widths)) + "|"]
+    lines.append("|" + "|".join(("-" * (w - 1) + ":") if h in right else "-" * w for h, w in zip(headers, widths)) + "|")
+    for b in body:
+        lines.append("|" + "|".join(v.ljust(w) for v, w in zip(b, widths)) + "|")
+    return "\n".join(lines) + "\n"
+
+
+def update_doc_table(doc_path: Path, table_md: str) -> bool:
+    """Replace the first markdown table that starts with a |Bucket| header row."""
+    lines = doc_path.read_text(encoding="utf-8").splitlines(keepends=True)
+    start = next((i for i, line in enumerate(lines) if line.replace(" ", "").startswith("|Bucket|")), None)
+    if start is None:
+        return False
+    end = start
+    while end < len(lines) and lines[end].lstrip().startswith("|"):
+        end += 1
+    lines[start:end] = [table_md]
+    doc_path.write_text("".join(lines), encoding="utf-8")
+    return True
+
+
+# -------------------------
+# Main
+# -------------------------
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(description="Recon buckets: one scan per child table -> bucket.csv + markdown")
+    ap.add_argument("--backend", choices=["postgres", "duckdb"], default="postgres")
+    ap.add_argument("--db-url", default=None, help="postgres: connection URL (default: pgdb settings)")
+    ap.add_argument("--raw-dir", type=Path, default=Path("raw_data"), help="duckdb: folder of raw *.csv")
+    ap.add_argument("--all", action="store_true", help="Every relationship of 05_fk_orphans.sql, not only buckets A/B/C")
+    ap.add_argument("--high", type=float, default=HIGH_PCT, help="High severity from this impact %% (default 5)")
+    ap.add_argument("--medium", type=float, default=MEDIUM_PCT, help="Medium severity from this impact %% (default 1)")
+    ap.add_argument("--out", type=Path, default=OUT_CSV, help="bucket CSV (default: artifacts/bucket.csv)")
+    ap.add_argument("--md", type=Path, default=OUT_MD, help="markdown table (default: artifacts/bucket.md)")
+    ap.add_argument("--update-doc", action="store_true", help=f"Rewrite the bucket table in {DOC_PATH.as_posix()}")
+    ap.add_argument("--summary", action="store_true", help="Print the per-scan timing summary at the end")
+    return ap.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    if args.medium > args.high:
+        raise SystemExit("--medium must be <= --high")
+    run = RunLog("07_generate_recon_buckets")
+    rels = configured_relationships(args.all)
+
+    rows = run_duckdb(args, rels, run) if args.backend == "duckdb" else run_postgres(args, rels, run)
+    for r in rows:
+        r.severity = severity(r, args.high, args.medium)
+
+    write_bucket_csv(rows, args.out)
+    table_md = render_markdown(rows)
+    args.md.parent.mkdir(parents=True, exist_ok=True)
+    args.md.write_text(table_md, encoding="utf-8")
+    print(f"\n{table_md}")
+    print(f"Wrote: {args.out.as_posix()}, {args.md.as_posix()}")
+
+    if args.update_doc:
+        if update_doc_table(DOC_PATH, table_md):
+            print(f"Updated: {DOC_PATH.as_posix()}")
+        else:
+            print(f"[WARN] no |Bucket| table found in {DOC_PATH.as_posix()}")
+
+    if args.summary:
+        run.print_summary()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
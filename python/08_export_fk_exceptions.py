@@ -0,0 +1,285 @@
+"""
+08_export_fk_exceptions.py
+
+Row-level exception lists for the FK checks of sql/10_scorecard/05_fk_orphans.sql.
+
+dq.fk_orphans_detail only keeps counts. This script writes the offending child
+rows themselves, one gzip CSV per relationship:
+  artifacts/fk_exceptions/<child>__<fk>__<parent>.csv.gz
+columns: dq_category, dq_fk_norm, then every column of stg.<child>
+
+Categories (same definitions as the counts in 05_fk_orphans.sql):
+- null_fk : FK is NULL                                     (null_fk_rows)
+- orphan  : normalized FK not found in the parent          (orphan_rows_norm)
+- fixable : raw FK not found, normalized FK found          (fixable_by_normalize_rows)
+
+Memory stays bounded whatever the size of the lists:
+- postgres: COPY (select ...) TO STDOUT, blocks go straight into the gzip file
+- duckdb  : streaming result fetched in batches (--batch-rows)
+--cap N keeps at most N rows per category and relationship (capped = true in the index).
+Relationships with no exception rows get no file.
+
+Summary index: artifacts/fk_exceptions/index.csv
+  one row per relationship x category: rows, capped, file
+  (with --only, rows of the other relationships are kept from the previous index)
+
+Notes:
+- postgres: needs dq.norm_id(), created by sql/10_scorecard/05_fk_orphans.sql
+  (run 02_generate_scorecard.py once first).
+- No ordering: rows come out in scan order (sorting millions of rows is not worth it).
+
+Usage (from repo root):
+  python python/08_export_fk_exceptions.py
+  python python/08_export_fk_exceptions.py --only inventory_transactions.purchase_order_id --cap 1000
+  python python/08_export_fk_exceptions.py --backend duckdb --raw-dir synthetic_data/x10
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import gzip
+import importlib
+import io
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from instrument import RunLog
+from scorecard_spec import FK_RELATIONSHIPS
+
+
+T_SCHEMA = "stg"
+OUT_DIR = Path("artifacts/fk_exceptions")
+INDEX_NAME = "index.csv"
+
+CATEGORIES = ["null_fk", "orphan", "fixable"]
+
+INDEX_COLS = ["child_table", "child_fk_col", "parent_table", "parent_pk_col", "category", "rows", "capped", "file"]
+
+
+@dataclass
+class Export:
+    child: str
+    fk: str
+    parent: str
+    pk: str
+    rows: Dict[str, int]
+    file: Optional[Path] = None
+
+
+def q(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def file_name(child: str, fk: str, parent: str) -> str:
+    return f"{child}__{fk}__{parent}.csv.gz"
+
+
+def category_sql(category: str, child: str, fk: str, parent: str, pk: str, cap: Optional[int]) -> str:
+    """
+    Exception rows of one category. The normalized parent keys are computed once
+    (p_norm, distinct: no fan-out on duplicated parent keys) and joined, as
+    05_fk_orphans.sql does, instead of a dq.norm_id() probe per child row.
+    """
+    c_fk = f"c.{q(fk)}"
+    p_tbl = f"{T_SCHEMA}.{q(parent)} p"
+    raw_hit = f"exists (select 1 from {p_tbl} where p.{q(pk)} = {c_fk})"
+    p_norm = (
+        f"with p_norm as (select distinct dq.norm_id({q(pk)}) as pk_norm "
+        f"from {T_SCHEMA}.{q(parent)} where dq.norm_id({q(pk)}) is not null) "
+    )
+    join, where = {
+        "null_fk": ("", f"{c_fk} is null"),
+        "orphan": ("left join p_norm pn on pn.pk_norm = dq.norm_id({fk})",
+                   f"dq.norm_id({c_fk}) is not null and pn.pk_norm is null"),
+        "fixable": ("join p_norm pn on pn.pk_norm = dq.norm_id({fk})", f"{c_fk} is not null and not {raw_hit}"),
+    }[category]
+    sql = (
+        (p_norm if join else "")
+        + f"select '{category}' as dq_category, dq.norm_id({c_fk}) as dq_fk_norm, c.* "
+        + f"from {T_SCHEMA}.{q(child)} c {join.format(fk=c_fk)} where {where}"
+    )
+    return sql + (f" limit {int(cap)}" if cap is not None else "")
+
+
+# -------------------------
+# Backends: write one relationship's gzip file, return rows per category
+# -------------------------
+def postgres_writer(con: Any, level: int) -> Callable[[Path, List[Tuple[str, str]]], Dict[str, int]]:
+    def write(path: Path, queries: List[Tuple[str, str]]) -> Dict[str, int]:
+        rows: Dict[str, int] = {}
+        with gzip.open(path, "wb", compresslevel=level) as gz, con.cursor() as cur:
+            for i, (category, sql) in enumerate(queries):
+                header = "true" if i == 0 else "false"
+                with cur.copy(f"copy ({sql}) to stdout with (format csv, header {header})") as cp:
+                    for block in cp:
+                        gz.write(block)
+                rows[category] = max(cur.rowcount, 0)  # "COPY n" command tag
+        return rows
+
+    return write
+
+
+def duckdb_writer(con: Any, batch_rows: int, level: int) -> Callable[[Path, List[Tuple[str, str]]], Dict[str, int]]:
+    def write(path: Path, queries: List[Tuple[str, str]]) -> Dict[str, int]:
+        rows: Dict[str, int] = {}
+        with gzip.open(path, "wb", compresslevel=level) as gz:
+            text = io.TextIOWrapper(gz, encoding="utf-8", newline="")
+            w = csv.writer(text)
+            for i, (category, sql) in enumerate(queries):
+                res = con.execute(sql)
+                if i == 0:
+                    w.writerow([d[0] for d in res.description])
+                n = 0
+                while True:
+                    batch = res.fetchmany(batch_rows)
+                    if not batch:
+                        break
+                    w.writerows(batch)
+                    n += len(batch)
+                rows[category] = n
+            text.flush()
+            text.detach()
+        return rows
+
+    return write
+
+
+def export_relationship(
+    write: Callable[[Path, List[Tuple[str, str]]], Dict[str, int]],
+    rel: Tuple[str, str, str, str],
+    categories: List[str],
+    cap: Optional[int],
+    out_dir: Path,
+) -> Export:
+    child, fk, parent, pk = rel
+    path = out_dir / file_name(child, fk, parent)
+    tmp = path.with_name(path.name + ".tmp")
+    queries = [(c, category_sql(c, child, fk, parent, pk, cap)) for c in categories]
+    rows = write(tmp, queries)
+    if sum(rows.values()) == 0:
+        tmp.unlink()
+        path.unlink(missing_ok=True)  # stale list from an earlier run
+        return Export(child, fk, parent, pk, rows)
+    tmp.replace(path)
+    return Export(child, fk, parent, pk, rows, path)
+
+
+def run_exports(write, rels, args: argparse.Namespace, run: RunLog, pg: Any = None) -> List[Export]:
+    exports: List[Export] = []
+    for rel in rels:
+        child, fk, parent, pk = rel
+        with run.stage(f"exceptions {child}.{fk}", pg=pg) as st:
+            ex = export_relationship(write, rel, args.categories, args.cap, args.out_dir)
+            st.rows = sum(ex.rows.values())
+            st.attrs.update(ex.rows)
+            if ex.file:
+                st.attrs["gzip_bytes"] = ex.file.stat().st_size
+        counts = "  ".join(f"{c}={n:,}" for c, n in ex.rows.items())
+        print(f" - {child}.{fk} -> {parent}.{pk}: {counts}" + (f"  -> {ex.file.as_posix()}" if ex.file else ""))
+        exports.append(ex)
+    return exports
+
+
+def run_postgres(args: argparse.Namespace, rels, run: RunLog) -> List[Export]:
+    import pgdb
+
+    cfg = pgdb.load_config(args.db_url, application_name="08_export_fk_exceptions")
+    print(f"== Postgres: {cfg.describe()} ==")
+    with pgdb.connect(cfg, autocommit=True) as con:
+        return run_exports(postgres_writer(con, args.compresslevel), rels, args, run, pg=con)
+
+
+def run_duckdb(args: argparse.Namespace, rels, run: RunLog) -> List[Export]:
+    duck = importlib.import_module("06_duckdb_profile")
+    con = duck.duckdb.connect(":memory:")
+    print(f"== DuckDB: {args.raw_dir.as_posix()} ==")
+    duck.load_raw_tables(con, args.raw_dir, run)
+    duck.create_stg_views(con, duck.STG_VIEWS_SQL)
+    try:
+        return run_exports(duckdb_writer(con, args.batch_rows, args.compresslevel), rels, args, run)
+    finally:
+        con.close()
+
+
+# -------------------------
+# Index
+# -------------------------
+def write_index(out_dir: Path, exports: List[Export], cap: Optional[int]) -> Path:
+    path = out_dir / INDEX_NAME
+    done = {(e.child, e.fk) for e in exports}
+    kept: List[dict] = []
+    if path.exists():
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            kept = [r for r in csv.DictReader(f) if (r["child_table"], r["child_fk_col"]) not in done]
+
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=INDEX_COLS)
+        w.writeheader()
+        w.writerows(kept)
+        for e in exports:
+            for category, n in e.rows.items():
+                w.writerow({
+                    "child_table": e.child,
+                    "child_fk_col": e.fk,
+                    "parent_table": e.parent,
+                    "parent_pk_col": e.pk,
+                    "category": category,
+                    "rows": n,
+                    "capped": "true" if cap is not None and n >= cap else "false",
+                    "file": e.file.name if e.file and n else "",
+                })
+    return path
+
+
+# -------------------------
+# Main
+# -------------------------
+def select_relationships(only: Optional[List[str]]) -> List[Tuple[str, str, str, str]]:
+    if not only:
+        return list(FK_RELATIONSHIPS)
+    wanted = set(only)
+    rels = [r for r in FK_RELATIONSHIPS if f"{r[0]}.{r[1]}" in wanted or r[0] in wanted]
+    unknown = wanted - {f"{r[0]}.{r[1]}" for r in rels} - {r[0] for r in rels}
+    if unknown:
+        raise SystemExit(f"Unknown relationship(s): {', '.join(sorted(unknown))} (use child_table[.fk_col])")
+    return rels
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(description="Stream orphan / NULL-FK / fixable child rows into gzip CSVs")
+    ap.add_argument("--backend", choices=["postgres", "duckdb"], default="postgres")
+    ap.add_argument("--db-url", default=None, help="postgres: connection URL (default: pgdb settings)")
+    ap.add_argument("--raw-dir", type=Path, default=Path("raw_data"), help="duckdb: folder of raw *.csv")
+    ap.add_argument("--only", nargs="+", default=None, help="child_table or child_table.fk_col (default: all 12)")
+    ap.add_argument("--categories", nargs="+", choices=CATEGORIES, default=CATEGORIES)
+    ap.add_argument("--cap", type=int, default=None, help="Max rows per category and relationship (default: all)")
+    ap.add_argument("--out-dir", type=Path, default=OUT_DIR)
+    ap.add_argument("--compresslevel", type=int, default=6, choices=range(1, 10), metavar="1-9")
+    ap.add_argument("--batch-rows", type=int, default=50_000, help="duckdb: rows per fetch")
+    ap.add_argument("--summary", action="store_true", help="Print the per-relationship timing summary at the end")
+    return ap.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    if args.cap is not None and args.cap <= 0:
+        raise SystemExit("--cap must be > 0")
+    args.out_dir.mkdir(parents=True, exist_ok=True)
+    run = RunLog("08_export_fk_exceptions")
+    rels = select_relationships(args.only)
+
+    exports = run_duckdb(args, rels, run) if args.backend == "duckdb" else run_postgres(args, rels, run)
+
+    index = write_index(args.out_dir, exports, args.cap)
+    total = sum(sum(e.rows.values()) for e in exports)
+    print(f"Exported: {total:,} exception rows, {sum(1 for e in exports if e.file)} file(s); index {index.as_posix()}")
+
+    if args.summary:
+        run.print_summary()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
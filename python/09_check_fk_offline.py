@@ -0,0 +1,386 @@
+"""
+09_check_fk_offline.py
+
+Offline referential-integrity check: the 12 FK relationships of
+sql/10_scorecard/05_fk_orphans.sql on the CSVs, in process, no database.
+
+Same definitions as dq.fk_orphans_detail:
+- keys go through the stg key rule first (02_create_stg_views.sql: blank -> NULL,
+  "123" / "123.0" -> "123", else trimmed text), then dq.norm_id (trim, drop a
+  trailing ".0") for the normalized comparison
+- base_rows = FK not NULL, null_fk_rows, orphan_rows_raw (stg key not in parent),
+  orphan_rows_norm (normalized key not in parent), fixable_by_normalize_rows
+  (raw miss, normalized hit); orphan_rows = orphan_rows_norm
+
+How:
+- Each table is read once (key columns only, as text).
+- Every key column is interned (pd.factorize): per-row integer codes + its
+  distinct values. The stg / norm_id rules run on the distinct values only.
+- Membership: the distinct child and parent keys are interned together and
+  compared with np.isin(kind="table") on the codes; per-row results are then
+  plain integer indexing, no string work per row.
+- --chunk-rows N streams every child in chunks instead (bounded memory): chunk
+  keys are interned against the parent's key dictionary (pd.Index.get_indexer).
+  --bloom adds a Bloom-filter pre-pass on the normalized keys there: keys the
+  filter rules out are orphans without a hash-table probe (worth it only when
+  parents are large and orphans common).
+
+Input: --source raw (raw_data/, CamelCase headers) or cleaned
+(extra-i-cleaning/cleaned_data/, snake_case headers); --data-dir overrides the folder.
+Columns are matched to the stg names ignoring case and underscores.
+
+Output: artifacts/fk_offline/fk_orphans_detail.csv (same columns as the Postgres export)
+--parity compares it with a reference fk_orphans_detail.csv (default: artifacts/,
+else artifacts/duckdb/) and exits 1 on any difference.
+
+Usage (from repo root):
+  python python/09_check_fk_offline.py
+  python python/09_check_fk_offline.py --parity --reference artifacts/duckdb/fk_orphans_detail.csv
+  python python/09_check_fk_offline.py --data-dir synthetic_data/x100 --chunk-rows 1000000 --bloom
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import math
+import re
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from csv_reader import NULL_VALUES, open_utf8, read_header, sniff_encoding
+from instrument import RunLog
+from scorecard_spec import FK_RELATIONSHIPS
+
+
+SOURCES = {"raw": Path("raw_data"), "cleaned": Path("extra-i-cleaning/cleaned_data")}
+OUT_PATH = Path("artifacts/fk_offline/fk_orphans_detail.csv")
+REFERENCE_PATHS = [Path("artifacts/fk_orphans_detail.csv"), Path("artifacts/duckdb/fk_orphans_detail.csv")]
+
+T_SCHEMA = "stg"
+BLOOM_FP_RATE = 0.01
+
+FK_DETAIL_COLS = [
+    "child_schema", "child_table", "child_fk_col", "parent_schema", "parent_table", "parent_pk_col",
+    "orphan_rows", "checked_at", "base_rows", "null_fk_rows", "orphan_rows_raw", "orphan_rows_norm",
+    "fixable_by_normalize_rows",
+]
+COUNT_COLS = ["base_rows", "null_fk_rows", "orphan_rows_raw", "orphan_rows_norm", "fixable_by_normalize_rows"]
+
+_STG_NUMERIC_ID = re.compile(r"^[0-9]+(\.0+)?$")
+
+
+# -------------------------
+# Key normalization (vectorized)
+# -------------------------
+def stg_key(s: pd.Series) -> pd.Series:
+    """02_create_stg_views.sql key rule: NULL/blank -> NULL, ^\\d+(\\.0+)?$ -> bigint text, else btrim."""
+    s = s.astype("object")
+    stripped = s.str.strip(" ")
+    numeric = s.str.match(_STG_NUMERIC_ID).fillna(False).astype(bool)  # on the untrimmed text, like the view
+    as_int = s[numeric].str.replace(r"\.0+$", "", regex=True).str.lstrip("0").replace("", "0")
+    out = stripped.where(stripped != "", None)
+    out[numeric] = as_int
+    return out
+
+
+def norm_id(s: pd.Series) -> pd.Series:
+    """dq.norm_id: nullif(regexp_replace(trim(x), '\\.0$', ''), '')."""
+    out = s.str.strip(" ").str.replace(r"\.0$", "", regex=True)
+    return out.where(out != "", None)
+
+
+# -------------------------
+# Reading
+# -------------------------
+def header_map(path: Path, enc: str) -> Dict[str, str]:
+    """stg column name -> CSV header (case and underscores ignored)."""
+    return {re.sub(r"[^0-9a-z]", "", h.lower()): h for h in read_header(path, enc)}
+
+
+def column_chunks(path: Path, cols: List[str], chunk_rows: Optional[int]) -> Iterator[pd.DataFrame]:
+    """Key columns as text (stg names), whole file or in chunks."""
+    enc = sniff_encoding(path)
+    headers = header_map(path, enc)
+    missing = [c for c in cols if c.replace("_", "") not in headers]
+    if missing:
+        raise SystemExit(f"{path}: no column for {', '.join(missing)}")
+    usecols = {headers[c.replace("_", "")]: c for c in cols}
+    with open_utf8(path, enc) as stream:
+        reader = pd.read_csv(
+            stream,
+            usecols=list(usecols),
+            dtype=str,
+            na_values=NULL_VALUES,
+            keep_default_na=False,
+            chunksize=chunk_rows,
+        )
+        for df in ([reader] if chunk_rows is None else reader):
+            yield df.rename(columns=usecols)
+
+
+def read_columns(path: Path, cols: List[str]) -> pd.DataFrame:
+    return next(column_chunks(path, cols, None))
+
+
+# -------------------------
+# Checks
+# -------------------------
+@dataclass
+class FkCounts:
+    base_rows: int = 0
+    null_fk_rows: int = 0
+    orphan_rows_raw: int = 0
+    orphan_rows_norm: int = 0
+    fixable_by_normalize_rows: int = 0
+
+    def add(self, other: "FkCounts") -> None:
+        for k in COUNT_COLS:
+            setattr(self, k, getattr(self, k) + getattr(other, k))
+
+
+class KeyColumn:
+    """
+    One key column, interned: per-row integer codes into its distinct raw values.
+    The stg / norm_id rules run on the distinct values only; every per-row step
+    is integer indexing. Code -1 (NULL in the file) hits the trailing sentinel.
+    """
+
+    def __init__(self, values: pd.Series):
+        codes, uniques = pd.factorize(values, use_na_sentinel=True)
+        self.codes = codes
+        self.stg = stg_key(pd.Series(uniques, dtype="object"))
+        self.norm = norm_id(self.stg)
+
+    def per_row(self, per_unique: np.ndarray) -> np.ndarray:
+        return np.append(per_unique, False)[self.codes]
+
+
+def interned_hits(child: pd.Series, parent: pd.Series) -> np.ndarray:
+    """Per child value: found among the parent values (shared integer codes, NULL never matches)."""
+    codes, _ = pd.factorize(pd.concat([parent, child], ignore_index=True), use_na_sentinel=True)
+    p_codes, c_codes = codes[: len(parent)], codes[len(parent):]
+    p_codes = p_codes[p_codes >= 0]
+    if not len(p_codes):
+        return np.zeros(len(c_codes), dtype=bool)
+    return (c_codes >= 0) & np.isin(c_codes, p_codes, kind="table")
+
+
+def classify(fk: KeyColumn, raw_hit_u: np.ndarray, norm_hit_u: np.ndarray) -> FkCounts:
+    not_null = fk.per_row(fk.stg.notna().to_numpy())
+    norm_not_null = fk.per_row(fk.norm.notna().to_numpy())
+    raw_hit, norm_hit = fk.per_row(raw_hit_u), fk.per_row(norm_hit_u)
+    return FkCounts(
+        base_rows=int(not_null.sum()),
+        null_fk_rows=int((~not_null).sum()),
+        orphan_rows_raw=int((not_null & ~raw_hit).sum()),
+        orphan_rows_norm=int((not_null & norm_not_null & ~norm_hit).sum()),
+        fixable_by_normalize_rows=int((not_null & ~raw_hit & norm_hit).sum()),
+    )
+
+
+def check_in_memory(fk: KeyColumn, pk: KeyColumn) -> FkCounts:
+    return classify(fk, interned_hits(fk.stg, pk.stg), interned_hits(fk.norm, pk.norm))
+
+
+class BloomFilter:
+    """k hashes by double hashing two 64-bit pandas hashes of the key text."""
+
+    def __init__(self, n_items: int, fp_rate: float = BLOOM_FP_RATE):
+        n = max(n_items, 1)
+        self.m = max(64, int(math.ceil(-n * math.log(fp_rate) / math.log(2) ** 2)))
+        self.k = max(1, round(self.m / n * math.log(2)))
+        self.bits = np.zeros((self.m + 7) // 8, dtype=np.uint8)
+
+    def _positions(self, keys: np.ndarray) -> np.ndarray:
+        h1 = pd.util.hash_array(keys, hash_key="dq_bloom_key_001")
+        h2 = pd.util.hash_array(keys, hash_key="dq_bloom_key_002") | np.uint64(1)
+        i = np.arange(self.k, dtype=np.uint64)
+        with np.errstate(over="ignore"):
+            return (h1[:, None] + i[None, :] * h2[:, None]) % np.uint64(self.m)
+
+    def add(self, keys: np.ndarray) -> None:
+        pos = self._positions(keys).ravel()
+        np.bitwise_or.at(self.bits, (pos >> np.uint64(3)).astype(np.int64), (1 << (pos & np.uint64(7))).astype(np.uint8))
+
+    def might_contain(self, keys: np.ndarray) -> np.ndarray:
+        if not len(keys):
+            return np.zeros(0, dtype=bool)
+        pos = self._positions(keys)
+        byte = self.bits[(pos >> np.uint64(3)).astype(np.int64)]
+        return ((byte >> (pos & np.uint64(7)).astype(np.uint8)) & 1).astype(bool).all(axis=1)
+
+
+class ParentKeys:
+    """A parent's key dictionaries (stg + normalized) for chunked children."""
+
+    def __init__(self, pk: KeyColumn, bloom: bool):
+        self.raw = pd.Index(pk.stg.dropna().unique())
+        norm = pk.norm.dropna().unique()
+        self.norm = pd.Index(norm)
+        self.bloom: Optional[BloomFilter] = None
+        if bloom:
+            self.bloom = BloomFilter(len(norm))
+            self.bloom.add(np.asarray(norm, dtype=object))
+
+    def check_chunk(self, fk: KeyColumn) -> Tuple[FkCounts, int]:
+        """Counts for one chunk + how many distinct keys the Bloom filter ruled out."""
+        raw_hit = fk.stg.notna().to_numpy() & (self.raw.get_indexer(fk.stg) >= 0)
+        present = fk.norm.notna().to_numpy().copy()
+        ruled_out = 0
+        if self.bloom is not None and present.any():
+            maybe = self.bloom.might_contain(fk.norm[present].to_numpy(dtype=object))
+            ruled_out = int((~maybe).sum())
+            present[np.flatnonzero(present)[~maybe]] = False  # definite misses: no probe
+        norm_hit = np.zeros(len(fk.norm), dtype=bool)
+        norm_hit[present] = self.norm.get_indexer(fk.norm[present]) >= 0
+        return classify(fk, raw_hit, norm_hit), ruled_out
+
+# -------------------------
+# Output / parity
+# -------------------------
+def detail_row(rel: Tuple[str, str, str, str], c: FkCounts, checked_at: str) -> dict:
+    child, fk, parent, pk = rel
+    return {
+        "child_schema": T_SCHEMA, "child_table": child, "child_fk_col": fk,
+        "parent_schema": T_SCHEMA, "parent_table": parent, "parent_pk_col": pk,
+        "orphan_rows": c.orphan_rows_norm,  # legacy orphan_rows = norm (business orphan)
+        "checked_at": checked_at,
+        **{k: getattr(c, k) for k in COUNT_COLS},
+    }
+
+
+def write_detail(path: Path, rows: List[dict]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=FK_DETAIL_COLS)
+        w.writeheader()
+        w.writerows(rows)
+
+
+def check_parity(rows: List[dict], ref_path: Path) -> List[str]:
+    with open(ref_path, "r", encoding="utf-8", newline="") as f:
+        ref = {(r["child_table"], r["child_fk_col"]): r for r in csv.DictReader(f)}
+    problems: List[str] = []
+    for r in rows:
+        key = (r["child_table"], r["child_fk_col"])
+        if key not in ref:
+            problems.append(f"{'.'.join(key)}: not in {ref_path.as_posix()}")
+            continue
+        for col in ["orphan_rows"] + COUNT_COLS:
+            if str(r[col]) != str(int(float(ref[key][col] or 0))):
+                problems.append(f"{'.'.join(key)}.{col}: offline={r[col]} reference={ref[key][col]}")
+    return problems
+
+
+# -------------------------
+# Main
+# -------------------------
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(description="FK checks of 05_fk_orphans.sql on CSVs (NumPy, no database)")
+    ap.add_argument("--source", choices=sorted(SOURCES), default="raw")
+    ap.add_argument("--data-dir", type=Path, default=None, help="CSV folder (default: by --source)")
+    ap.add_argument("--out", type=Path, default=OUT_PATH)
+    ap.add_argument("--chunk-rows", type=int, default=None, help="Stream children in chunks of N rows")
+    ap.add_argument("--bloom", action="store_true", help="With --chunk-rows: Bloom-filter pre-pass on parent keys")
+    ap.add_argument("--parity", action="store_true", help="Compare with a reference fk_orphans_detail.csv")
+    ap.add_argument("--reference", type=Path, default=None, help="Reference CSV (default: artifacts/, else artifacts/duckdb/)")
+    ap.add_argument("--summary", action="store_true", help="Print the per-stage timing summary at the end")
+    return ap.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    if args.bloom and not args.chunk_rows:
+        raise SystemExit("--bloom needs --chunk-rows")
+    data_dir: Path = args.data_dir or SOURCES[args.source]
+    run = RunLog("09_check_fk_offline")
+    checked_at = time.strftime("%Y-%m-%d %H:%M:%S")
+
+    # key columns per table (each parent is read once, as a whole)
+    parent_cols: Dict[str, List[str]] = {}
+    for _, _, parent, pk in FK_RELATIONSHIPS:
+        parent_cols.setdefault(parent, [])
+        if pk not in parent_cols[parent]:
+            parent_cols[parent].append(pk)
+    child_cols: Dict[str, List[str]] = {}
+    for child, fk, _, _ in FK_RELATIONSHIPS:
+        child_cols.setdefault(child, []).append(fk)
+
+    print(f"== FK check (offline): {data_dir.as_posix()} ==")
+    parents: Dict[str, Dict[str, KeyColumn]] = {}
+    for table, cols in parent_cols.items():
+        path = data_dir / f"{table}.csv"
+        with run.stage(f"read {table} keys", bytes_read=path.stat().st_size) as st:
+            df = read_columns(path, cols)
+            parents[table] = {c: KeyColumn(df[c]) for c in cols}
+            st.rows = len(df)
+
+    counts: Dict[Tuple[str, str, str, str], FkCounts] = {}
+    if not args.chunk_rows:
+        for child, cols in child_cols.items():
+            path = data_dir / f"{child}.csv"
+            with run.stage(f"read {child} keys", bytes_read=path.stat().st_size) as st:
+                df = read_columns(path, cols)
+                st.rows = len(df)
+            rels = [r for r in FK_RELATIONSHIPS if r[0] == child]
+            with run.stage(f"check {child}", rows=len(df), relationships=len(rels)):
+                for rel in rels:
+                    _, fk, parent, pk = rel
+                    counts[rel] = check_in_memory(KeyColumn(df[fk]), parents[parent][pk])
+    else:
+        dicts = {
+            (parent, pk): ParentKeys(parents[parent][pk], args.bloom)
+            for _, _, parent, pk in FK_RELATIONSHIPS
+        }
+        for child, cols in child_cols.items():
+            path = data_dir / f"{child}.csv"
+            rels = [r for r in FK_RELATIONSHIPS if r[0] == child]
+            for rel in rels:
+                counts[rel] = FkCounts()
+            with run.stage(f"stream {child}", bytes_read=path.stat().st_size, bloom=args.bloom) as st:
+                n = ruled_out = 0
+                for df in column_chunks(path, cols, args.chunk_rows):
+                    n += len(df)
+                    for rel in rels:
+                        _, fk, parent, pk = rel
+                        c, r = dicts[(parent, pk)].check_chunk(KeyColumn(df[fk]))
+                        counts[rel].add(c)
+                        ruled_out += r
+                st.rows = n
+                st.attrs["bloom_ruled_out"] = ruled_out
+
+    rows = [detail_row(rel, counts[rel], checked_at) for rel in FK_RELATIONSHIPS]
+    for r in rows:
+        print(
+            f" - {r['child_table']}.{r['child_fk_col']} -> {r['parent_table']}.{r['parent_pk_col']}: "
+            f"null_fk={r['null_fk_rows']:,}  orphan_raw={r['orphan_rows_raw']:,}  "
+            f"orphan_norm={r['orphan_rows_norm']:,}  fixable={r['fixable_by_normalize_rows']:,}"
+        )
+    write_detail(args.out, rows)
+    print(f"Exported: {args.out.as_posix()}  (rows={len(rows)})")
+
+    rc = 0
+    if args.parity:
+        ref = args.reference or next((p for p in REFERENCE_PATHS if p.exists()), None)
+        if ref is None or not ref.exists():
+            raise SystemExit("No reference fk_orphans_detail.csv (02_generate_scorecard.py --export-fk-detail, "
+                             "or 06_duckdb_profile.py)")
+        problems = check_parity(rows, ref)
+        for p in problems:
+            print(f"   MISMATCH {p}")
+        print(f" - OK: matches {ref.as_posix()}" if not problems else f" - {len(problems)} mismatches")
+        rc = 1 if problems else 0
+
+    if args.summary:
+        run.print_summary()
+    return rc
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,524 @@
+"""
+10_index_advisor.py
+
+Workload-driven index advisor: propose indexes from the plans of the statements
+this project actually runs, keep only the ones that measurably help.
+
+Workload
+- scorecard pack: the statements captured by the last `02_generate_scorecard.py --explain`
+  run (dq.captured_sql); skipped with a hint when nothing was captured yet
+- FK checks: the relationship list of sql/10_scorecard/05_fk_orphans.sql, as the
+  docs/06 proof query, on every schema of --fk-schemas that has the tables
+- querying: every SELECT / WITH statement of extra-ii-querying/sql/*.sql
+  (+ any --sql FILE)
+
+Candidates
+- Each statement is EXPLAINed; columns of base tables that appear in scan filters
+  and join / index conditions become single-column candidates (btree; hash too
+  when the column is only ever compared with "=" and --hash is given).
+- Columns that already lead an index are skipped. stg.* are views: their
+  candidates land on raw.* columns wrapped in expressions, and the check below
+  rejects them.
+
+Check (--mode)
+- hypopg: hypothetical index, EXPLAIN total cost with / without (no build, no lock)
+- rollback: CREATE INDEX inside a transaction that is rolled back; EXPLAIN cost
+  and EXPLAIN ANALYZE time (median of --repeat runs) with / without. Holds a
+  SHARE lock on the table while it runs: use a scratch / dev database.
+- auto (default): hypopg when the extension is installed, else rollback
+A candidate wins when it lowers the cost of at least one statement by --min-gain
+percent (default 10) and raises none by more than that.
+
+--apply creates the winners (CREATE INDEX CONCURRENTLY ix_<table>__<col>, the
+loader's naming) and times every improved statement before / after (EXPLAIN
+ANALYZE, median of --repeat runs): measured speedup per statement.
+
+Outputs (artifacts/index_advisor/):
+- report.csv: candidate x statement: cost before / after, gain %, ms before / after
+- winners.csv: winning indexes, their DDL, best gain, statements improved, measured speedup
+
+Usage (from repo root):
+  python python/10_index_advisor.py
+  python python/10_index_advisor.py --mode rollback --repeat 5
+  python python/10_index_advisor.py --apply
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import re
+import statistics
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import psycopg
+from psycopg import sql as psql
+
+import pgdb
+from instrument import RunLog
+from scorecard_spec import FK_RELATIONSHIPS
+
+
+QUERY_GLOB = "extra-ii-querying/sql/*.sql"
+OUT_DIR = Path("artifacts/index_advisor")
+
+MIN_GAIN_PCT = 10.0
+REPEAT = 3
+
+REPORT_COLS = [
+    "index", "statement", "cost_before", "cost_after", "cost_gain_pct", "ms_before", "ms_after", "winner",
+]
+WINNERS_COLS = [
+    "index", "ddl", "best_cost_gain_pct", "statements_improved", "ms_before", "ms_after", "speedup", "created",
+]
+
+COND_KEYS = ("Filter", "Hash Cond", "Merge Cond", "Join Filter", "Index Cond", "Recheck Cond")
+SCAN_TYPES = ("Seq Scan", "Bitmap Heap Scan", "Index Scan", "Index Only Scan")
+QUALIFIED_COL_RE = re.compile(r'\b("?)([A-Za-z_][\w$]*)\1\.("?)([A-Za-z_][\w$]*)\3')
+IDENT_RE = re.compile(r'"([^"]+)"|\b([A-Za-z_][\w$]*)\b')
+
+
+@dataclass
+class Statement:
+    label: str
+    sql: str
+
+
+@dataclass(frozen=True)
+class Candidate:
+    schema: str
+    table: str
+    column: str
+    method: str = "btree"
+
+    @property
+    def name(self) -> str:
+        return f"ix_{self.table}__{self.column}" + ("" if self.method == "btree" else f"__{self.method}")
+
+    @property
+    def label(self) -> str:
+        return f"{self.schema}.{self.table}({self.column}) {self.method}"
+
+    def ddl(self, concurrently: bool = False) -> psql.Composable:
+        return psql.SQL("create index {}{} on {} using {} ({})").format(
+            psql.SQL("concurrently if not exists " if concurrently else ""),
+            psql.Identifier(self.name),
+            psql.Identifier(self.schema, self.table),
+            psql.SQL(self.method),
+            psql.Identifier(self.column),
+        )
+
+
+@dataclass
+class Measure:
+    cost_before: float
+    cost_after: float
+    ms_before: Optional[float] = None
+    ms_after: Optional[float] = None
+
+    @property
+    def gain_pct(self) -> float:
+        return 100.0 * (self.cost_before - self.cost_after) / self.cost_before if self.cost_before else 0.0
+
+
+# -------------------------
+# Workload
+# -------------------------
+def split_sql(text: str) -> List[str]:
+    """Split a script on ';' outside quotes, dollar quotes and comments."""
+    out: List[str] = []
+    buf: List[str] = []
+    i, n = 0, len(text)
+    while i < n:
+        ch = text[i]
+        if text.startswith("--", i):
+            j = text.find("\n", i)
+            j = n if j < 0 else j
+            buf.append(text[i:j])
+            i = j
+        elif text.startswith("/*", i):
+            j = text.find("*/", i + 2)
+            j = n if j < 0 else j + 2
+            buf.append(text[i:j])
+            i = j
+        elif ch == "'":
+            j = i + 1
+            while j < n:
+                if text[j] == "'" and text.startswith("''", j):
+                    j += 2
+                    continue
+                if text[j] == "'":
+                    break
+                j += 1
+            buf.append(text[i:j + 1])
+            i = j + 1
+        elif ch == "$" and re.match(r"\$[A-Za-z_]*\$", text[i:]):
+            tag = re.match(r"\$[A-Za-z_]*\$", text[i:]).group(0)
+            j = text.find(tag, i + len(tag))
+            j = n if j < 0 else j + len(tag)
+            buf.append(text[i:j])
+            i = j
+        elif ch == ";":
+            out.append("".join(buf))
+            buf = []
+            i += 1
+        else:
+            buf.append(ch)
+            i += 1
+    out.append("".join(buf))
+    return [s.strip() for s in out if strip_comments(s).strip()]
+
+
+def strip_comments(sql: str) -> str:
+    sql = re.sub(r"/\*.*?\*/", " ", sql, flags=re.S)
+    return re.sub(r"--[^\n]*", " ", sql)
+
+
+def is_query(sql: str) -> bool:
+    return strip_comments(sql).lstrip().lower().startswith(("select", "with"))
+
+
+def fk_statements(con: psycopg.Connection, schemas: List[str]) -> List[Statement]:
+    out: List[Statement] = []
+    for schema in schemas:
+        for child, fk, parent, pk in FK_RELATIONSHIPS:
+            if not relation_exists(con, schema, child) or not relation_exists(con, schema, parent):
+                continue
+            out.append(Statement(
+                f"fk {schema}.{child}.{fk} -> {parent}.{pk}",
+                f"""
+                select
+                  count(*) filter (where c.{fk} is null) as fk_null_rows,
+                  count(*) filter (where c.{fk} is not null and p.{pk} is not null) as matched_rows,
+                  count(*) filter (where c.{fk} is not null and p.{pk} is null) as orphan_rows
+                from {schema}.{child} c
+                left join {schema}.{parent} p
+                  on c.{fk} = p.{pk}
+                """,
+            ))
+    return out
+
+
+def captured_statements(con: psycopg.Connection) -> List[Statement]:
+    if not relation_exists(con, "dq", "captured_sql"):
+        return []
+    rows = con.execute(
+        """
+        select label, sql_text from dq.captured_sql
+        where run_id = (select run_id from dq.captured_sql order by captured_at desc limit 1)
+        order by captured_at, label
+        """
+    ).fetchall()
+    return [Statement(f"scorecard {label}", sql) for label, sql in rows if is_query(sql)]
+
+
+def file_statements(paths: Iterable[Path]) -> List[Statement]:
+    out: List[Statement] = []
+    for path in paths:
+        queries = [s for s in split_sql(path.read_text(encoding="utf-8")) if is_query(s)]
+        for i, sql in enumerate(queries, start=1):
+            out.append(Statement(f"{path.name}#{i}" if len(queries) > 1 else path.name, sql))
+    return out
+
+
+# -------------------------
+# Catalog
+# -------------------------
+def relation_exists(con: psycopg.Connection, schema: str, name: str) -> bool:
+    return con.execute("select to_regclass(%s) is not null", (f'"{schema}"."{name}"',)).fetchone()[0]
+
+
+def indexed_leading_columns(con: psycopg.Connection) -> Set[Tuple[str, str, str]]:
+    rows = con.execute(
+        """
+        select n.nspname, c.relname, a.attname
+        from pg_index i
+        join pg_class c on c.oid = i.indrelid
+        join pg_namespace n on n.oid = c.relnamespace
+        join pg_attribute a on a.attrelid = c.oid and a.attnum = i.indkey[0]
+        where n.nspname not in ('pg_catalog', 'information_schema')
+        """
+    ).fetchall()
+    return {tuple(r) for r in rows}
+
+
+def table_columns(con: psycopg.Connection, schema: str, table: str) -> Set[str]:
+    rows = con.execute(
+        "select attname from pg_attribute where attrelid = %s::regclass and attnum > 0 and not attisdropped",
+        (f'"{schema}"."{table}"',),
+    ).fetchall()
+    return {r[0] for r in rows}
+
+
+def has_hypopg(con: psycopg.Connection) -> bool:
+    return bool(con.execute("select count(*) from pg_extension where extname = 'hypopg'").fetchone()[0])
+
+
+# -------------------------
+# Plans -> candidates
+# -------------------------
+def explain_json(con: psycopg.Connection, sql: str, analyze: bool = False) -> Dict[str, Any]:
+    prefix = "explain (analyze, format json) " if analyze else "explain (format json) "
+    (doc,) = con.execute(prefix + sql.strip().rstrip(";")).fetchone()
+    return doc[0]
+
+
+def plan_nodes(node: Dict[str, Any]) -> Iterable[Dict[str, Any]]:
+    yield node
+    for child in node.get("Plans", []) or []:
+        yield from plan_nodes(child)
+
+
+def condition_columns(cond: str, aliases: Dict[str, Tuple[str, str]], own: Optional[Tuple[str, str]],
+                      columns: Dict[Tuple[str, str], Set[str]]) -> Iterable[Tuple[str, str, str, bool]]:
+    """(schema, table, column, equality_only) for the base-table columns a condition mentions."""
+    seen: Set[Tuple[str, str, str]] = set()
+    for m in QUALIFIED_COL_RE.finditer(cond):
+        rel = aliases.get(m.group(2))
+        if rel and m.group(4) in columns.get(rel, set()):
+            seen.add((rel[0], rel[1], m.group(4)))
+    if own is not None:
+        for m in IDENT_RE.finditer(QUALIFIED_COL_RE.sub(" ", cond)):
+            name = m.group(1) or m.group(2)
+            if name in columns.get(own, set()):
+                seen.add((own[0], own[1], name))
+    for schema, table, col in seen:
+        yield schema, table, col, equality_only(cond, col)
+
+
+def equality_only(cond: str, col: str) -> bool:
+    """Every mention of the column is one side of an "=" (incl. "= ANY (...)")."""
+    hits = list(re.finditer(rf'(?<![\w$]){re.escape(col)}(?![\w$])', cond))
+    for m in hits:
+        after = re.sub(r'^("|\)|::\w+( varying| precision)?(\[\])?)+', "", cond[m.end():])
+        before = re.sub(r'(\(|"|[\w$]+"?\.)+$', "", cond[:m.start()])
+        if not (after.startswith(" = ") or before.endswith(" = ")):
+            return False
+    return bool(hits)
+
+
+def plan_candidates(con: psycopg.Connection, plan: Dict[str, Any], hash_too: bool,
+                    indexed: Set[Tuple[str, str, str]]) -> Set[Candidate]:
+    nodes = list(plan_nodes(plan["Plan"]))
+    aliases: Dict[str, Tuple[str, str]] = {}
+    columns: Dict[Tuple[str, str], Set[str]] = {}
+    for node in nodes:
+        if node.get("Node Type") in SCAN_TYPES and node.get("Relation Name"):
+            rel = (node.get("Schema", "public"), node["Relation Name"])
+            aliases[node.get("Alias", rel[1])] = rel
+            if rel not in columns:
+                columns[rel] = table_columns(con, *rel)
+
+    out: Set[Candidate] = set()
+    for node in nodes:
+        own = None
+        if node.get("Node Type") in SCAN_TYPES and node.get("Relation Name"):
+            own = (node.get("Schema", "public"), node["Relation Name"])
+        for key in COND_KEYS:
+            if not node.get(key):
+                continue
+            for schema, table, col, eq_only in condition_columns(node[key], aliases, own, columns):
+                if (schema, table, col) in indexed:
+                    continue
+                out.add(Candidate(schema, table, col, "btree"))
+                if hash_too and eq_only:
+                    out.add(Candidate(schema, table, col, "hash"))
+    return out
+
+
+# -------------------------
+# Measuring
+# -------------------------
+def median_ms(con: psycopg.Connection, sql: str, repeat: int) -> float:
+    return round(statistics.median(
+        float(explain_json(con, sql, analyze=True)["Execution Time"]) for _ in range(max(1, repeat))
+    ), 3)
+
+
+def touches(plan: Dict[str, Any], cand: Candidate) -> bool:
+    return any(
+        n.get("Relation Name") == cand.table and n.get("Schema", "public") == cand.schema
+        for n in plan_nodes(plan["Plan"])
+    )
+
+
+def evaluate(con: psycopg.Connection, cand: Candidate, stmts: List[Statement], base_cost: Dict[str, float],
+             base_ms: Dict[str, Optional[float]], mode: str, repeat: int) -> Dict[str, Measure]:
+    """Cost (and, in rollback mode, time) of every statement with the candidate in place."""
+    out: Dict[str, Measure] = {}
+    try:
+        if mode == "hypopg":
+            con.execute("select hypopg_create_index(%s)", (cand.ddl().as_string(con),))
+        else:
+            con.execute(cand.ddl())
+        for s in stmts:
+            cost = float(explain_json(con, s.sql)["Plan"]["Total Cost"])
+            m = Measure(base_cost[s.label], cost)
+            if mode == "rollback" and repeat > 0:
+                m.ms_before = base_ms.get(s.label)
+                m.ms_after = median_ms(con, s.sql, repeat)
+            out[s.label] = m
+    finally:
+        if mode == "hypopg":
+            con.execute("select hypopg_reset()")
+        con.rollback()
+    return out
+
+
+# -------------------------
+# Main
+# -------------------------
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(description="Propose and check indexes from the project's real workload")
+    ap.add_argument("--db-url", default=None, help="Connection URL (default: pgdb settings)")
+    ap.add_argument("--mode", choices=["auto", "hypopg", "rollback"], default="auto")
+    ap.add_argument("--fk-schemas", nargs="*", default=["stg", "clean"], help="Schemas for the FK check statements")
+    ap.add_argument("--sql", nargs="*", type=Path, default=[], help="Extra workload SQL files")
+    ap.add_argument("--no-scorecard", action="store_true", help="Skip the captured scorecard statements")
+    ap.add_argument("--hash", action="store_true", help="Also try hash indexes on equality-only columns")
+    ap.add_argument("--min-gain", type=float, default=MIN_GAIN_PCT, help="Min cost gain %% to win (default 10)")
+    ap.add_argument("--repeat", type=int, default=REPEAT, help="EXPLAIN ANALYZE runs per timing (median)")
+    ap.add_argument("--apply", action="store_true", help="Create the winners and measure the speedup")
+    ap.add_argument("--out-dir", type=Path, default=OUT_DIR)
+    ap.add_argument("--summary", action="store_true", help="Print the per-stage timing summary at the end")
+    return ap.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    run = RunLog("10_index_advisor")
+    try:
+        cfg = pgdb.load_config(args.db_url, application_name="10_index_advisor")
+    except pgdb.PgConfigError as e:
+        print(f"[ERROR] {e}")
+        return 2
+    print(f"== Target: {cfg.describe()} ==")
+
+    with pgdb.connect(cfg) as con:
+        mode = args.mode
+        if mode == "auto":
+            mode = "hypopg" if has_hypopg(con) else "rollback"
+        elif mode == "hypopg" and not has_hypopg(con):
+            print("[ERROR] hypopg is not installed (create extension hypopg), or use --mode rollback")
+            return 2
+        print(f" - Mode: {mode}")
+
+        # ---- workload
+        stmts: List[Statement] = []
+        if not args.no_scorecard:
+            captured = captured_statements(con)
+            if not captured:
+                print(" - Scorecard: nothing captured yet (run 02_generate_scorecard.py --explain first)")
+            stmts += captured
+        stmts += fk_statements(con, args.fk_schemas)
+        stmts += file_statements(sorted(Path().glob(QUERY_GLOB)) + list(args.sql))
+        con.rollback()
+
+        # ---- baseline + candidates
+        indexed = indexed_leading_columns(con)
+        base_cost: Dict[str, float] = {}
+        base_ms: Dict[str, Optional[float]] = {}
+        plans: Dict[str, Dict[str, Any]] = {}
+        candidates: Set[Candidate] = set()
+        with run.stage("baseline", pg=con, statements=len(stmts)):
+            for s in list(stmts):
+                try:
+                    plans[s.label] = explain_json(con, s.sql)
+                    if mode == "rollback" and args.repeat > 0:
+                        base_ms[s.label] = median_ms(con, s.sql, args.repeat)
+                except psycopg.Error as e:
+                    con.rollback()
+                    print(f" - Skipped (EXPLAIN failed): {s.label}: {str(e).strip().splitlines()[0]}")
+                    stmts.remove(s)
+                    continue
+                con.rollback()
+                base_cost[s.label] = float(plans[s.label]["Plan"]["Total Cost"])
+                candidates |= plan_candidates(con, plans[s.label], args.hash, indexed)
+        print(f" - Workload: {len(stmts)} statements, {len(candidates)} candidate indexes")
+
+        # ---- check every candidate against the statements that scan its table
+        report: List[dict] = []
+        winners: Dict[Candidate, List[Tuple[str, Measure]]] = {}
+        for cand in sorted(candidates, key=lambda c: (c.schema, c.table, c.column, c.method)):
+            affected = [s for s in stmts if touches(plans[s.label], cand)]
+            if not affected:
+                continue
+            with run.stage(f"check {cand.label}", pg=con, statements=len(affected)):
+                try:
+                    measures = evaluate(con, cand, affected, base_cost, base_ms, mode, args.repeat)
+                except psycopg.Error as e:
+                    con.rollback()
+                    print(f" - Skipped {cand.label}: {str(e).strip().splitlines()[0]}")
+                    continue
+            gains = [m.gain_pct for m in measures.values()]
+            win = max(gains) >= args.min_gain and min(gains) > -args.min_gain
+            for label, m in measures.items():
+                report.append({
+                    "index": cand.label, "statement": label,
+                    "cost_before": round(m.cost_before, 2), "cost_after": round(m.cost_after, 2),
+                    "cost_gain_pct": round(m.gain_pct, 2), "ms_before": m.ms_before, "ms_after": m.ms_after,
+                    "winner": win,
+                })
+            if win:
+                winners[cand] = [(label, m) for label, m in measures.items() if m.gain_pct >= args.min_gain]
+
+        # one method per column: keep the better of btree / hash
+        best: Dict[Tuple[str, str, str], Candidate] = {}
+        for cand, improved in winners.items():
+            key = (cand.schema, cand.table, cand.column)
+            top = max(m.gain_pct for _, m in improved)
+            if key not in best or top > max(m.gain_pct for _, m in winners[best[key]]):
+                best[key] = cand
+
+    # ---- apply: real index, measured speedup
+    winner_rows: List[dict] = []
+    for cand in sorted(best.values(), key=lambda c: (c.schema, c.table, c.column)):
+        improved = winners[cand]
+        row = {
+            "index": cand.label,
+            "ddl": "",
+            "best_cost_gain_pct": round(max(m.gain_pct for _, m in improved), 2),
+            "statements_improved": "; ".join(label for label, _ in improved),
+            "ms_before": "", "ms_after": "", "speedup": "", "created": False,
+        }
+        if args.apply:
+            with pgdb.connect(cfg, autocommit=True) as con:
+                row["ddl"] = cand.ddl(concurrently=True).as_string(con)
+                stmts_by_label = {s.label: s for s in stmts}
+                with run.stage(f"apply {cand.label}", pg=con):
+                    before = sum(median_ms(con, stmts_by_label[label].sql, args.repeat) for label, _ in improved)
+                    con.execute(cand.ddl(concurrently=True))
+                    con.execute(psql.SQL("analyze {}").format(psql.Identifier(cand.schema, cand.table)))
+                    after = sum(median_ms(con, stmts_by_label[label].sql, args.repeat) for label, _ in improved)
+            row.update(ms_before=round(before, 3), ms_after=round(after, 3), created=True,
+                       speedup=round(before / after, 2) if after else "")
+        else:
+            with pgdb.connect(cfg) as con:
+                row["ddl"] = cand.ddl(concurrently=True).as_string(con)
+        winner_rows.append(row)
+
+    args.out_dir.mkdir(parents=True, exist_ok=True)
+    for name, cols, rows in (("report.csv", REPORT_COLS, report), ("winners.csv", WINNERS_COLS, winner_rows)):
+        with open(args.out_dir / name, "w", encoding="utf-8", newline="") as f:
+            w = csv.DictWriter(f, fieldnames=cols)
+            w.writeheader()
+            w.writerows(rows)
+
+    print(f"\n== Winners ({len(winner_rows)}) ==")
+    for r in winner_rows:
+        measured = f"  {r['ms_before']} ms -> {r['ms_after']} ms (x{r['speedup']})" if r["created"] else ""
+        print(f" - {r['index']}: cost -{r['best_cost_gain_pct']}%{measured}")
+        print(f"     {r['ddl']};")
+    print(f"Wrote: {(args.out_dir / 'report.csv').as_posix()}, {(args.out_dir / 'winners.csv').as_posix()}")
+    if winner_rows and not args.apply:
+        print("Create them with --apply (or run the DDL above).")
+
+    if args.summary:
+        run.print_summary()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
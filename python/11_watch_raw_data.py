@@ -0,0 +1,284 @@
+"""
+11_watch_raw_data.py
+
+Watch raw_data/ and re-profile only the tables whose CSV changed.
+
+For each batch of changed files (TABLE_FILES of 01_load_raw_to_postgres.py):
+  1) raw.<table> is truncated and reloaded (same decoding / COPY as the full load)
+  2) sql/00_setup/02_create_stg_views.sql is re-run (create or replace, cheap)
+  3) 02_generate_scorecard.py --tables <changed>: the per-table checks of those tables and the
+     FK checks they take part in (as child or parent); artifacts/scorecard.csv is re-exported
+  4) 03_add_score_to_scorecard.py                      -> artifacts/scorecard_100.csv
+  5) 04_generate_describe_csv.py --only <changed>      -> artifacts/tablestats/<table>__describe.csv
+  6) 05_generate_tabledictionaries.py (incremental: unchanged tables are skipped on their own;
+     --skip-if-empty: nothing to do, not a failure, while DICT_TARGETS is empty)
+  7) 07_generate_recon_buckets.py                      -> artifacts/bucket.csv, bucket.md
+--steps picks a subset (default: all). The database must exist already (full load once).
+
+How changes are detected:
+- The folder is polled every --interval seconds (stdlib only, works on every OS / network share).
+- A file counts as written once its size + mtime have not moved for --debounce seconds;
+  files that land together (within the debounce window) are handled as one batch.
+- A settled file is re-hashed (sha256); the same content saved again is not a change.
+- State (size / mtime / sha256 per file) lives in artifacts/watch_state.json. The first run
+  only records it (the database is assumed to match raw_data/); --once processes the
+  changes since the recorded state and exits (cron / scripts; no state = every file).
+- A file's new sha256 is recorded only once its batch re-profiled without error. A failing
+  step is reported and the watcher keeps going; the files of that batch keep their old
+  state and are retried after --retry-delay seconds (--once exits with 1 and the next
+  run retries them). Deleted files are reported, their tables are left as they are.
+
+Usage (from repo root):
+  python python/11_watch_raw_data.py
+  python python/11_watch_raw_data.py --debounce 5 --steps raw stg scorecard score
+  python python/11_watch_raw_data.py --once
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import importlib
+import json
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import pgdb
+from instrument import RunLog
+
+STATE_PATH = Path("artifacts/watch_state.json")
+
+STEPS = ["raw", "stg", "scorecard", "score", "describe", "dict", "buckets"]
+
+HASH_BLOCK = 1 << 20
+
+Stat = Tuple[int, int]  # size, mtime_ns
+
+
+def step_module(name: str):
+    """Step scripts are imported once and reused between batches (warm imports)."""
+    return importlib.import_module(name)
+
+
+# -------------------------
+# Change detection
+# -------------------------
+def file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(HASH_BLOCK)
+            if not block:
+                break
+            h.update(block)
+    return h.hexdigest()
+
+
+def load_state(path: Path) -> Dict[str, dict]:
+    if not path.exists():
+        return {}
+    try:
+        return json.loads(path.read_text(encoding="utf-8")).get("files", {})
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def save_state(path: Path, files: Dict[str, dict]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps({"files": files}, indent=2, sort_keys=True), encoding="utf-8")
+    tmp.replace(path)
+
+
+def scan(raw_dir: Path, table_files: Dict[str, str]) -> Dict[str, Stat]:
+    out: Dict[str, Stat] = {}
+    for filename in table_files.values():
+        try:
+            st = (raw_dir / filename).stat()
+        except OSError:
+            continue
+        out[filename] = (st.st_size, st.st_mtime_ns)
+    return out
+
+
+class Debouncer:
+    """Collects files whose size / mtime moved; releases them as one batch once all stood still."""
+
+    def __init__(self, debounce: float) -> None:
+        self.debounce = debounce
+        self.pending: Dict[str, Stat] = {}
+        self.last_move = 0.0
+
+    def observe(self, seen: Dict[str, Stat], known: Dict[str, dict]) -> None:
+        now = time.monotonic()
+        for filename, stat in seen.items():
+            prev = known.get(filename)
+            if prev is not None and (prev["size"], prev["mtime_ns"]) == stat:
+                self.pending.pop(filename, None)
+                continue
+            if self.pending.get(filename) != stat:
+                self.pending[filename] = stat
+                self.last_move = now
+
+    def ready(self) -> bool:
+        return bool(self.pending) and time.monotonic() - self.last_move >= self.debounce
+
+    def take(self) -> Dict[str, Stat]:
+        batch, self.pending = self.pending, {}
+        return batch
+
+
+def content_changes(raw_dir: Path, batch: Dict[str, Stat], known: Dict[str, dict]) -> Tuple[List[str], Dict[str, dict]]:
+    """Files of the batch whose content differs from the state (+ the new state entries)."""
+    changed: List[str] = []
+    entries: Dict[str, dict] = {}
+    for filename, (size, mtime_ns) in sorted(batch.items()):
+        digest = file_sha256(raw_dir / filename)
+        entries[filename] = {"size": size, "mtime_ns": mtime_ns, "sha256": digest}
+        if known.get(filename, {}).get("sha256") != digest:
+            changed.append(filename)
+    return changed, entries
+
+
+# -------------------------
+# Re-profile
+# -------------------------
+def reload_raw(cfg: pgdb.PgConfig, raw_dir: Path, tables: List[str], run: RunLog) -> None:
+    load = step_module("01_load_raw_to_postgres")
+    with pgdb.connect(cfg) as con:
+        for table in tables:
+            rows, enc = load.load_raw_table(con, raw_dir, table, run)
+            print(f"   loaded raw.{table}: {rows:,} rows (encoding={enc})")
+
+
+def refresh_stg(cfg: pgdb.PgConfig, run: RunLog) -> None:
+    load = step_module("01_load_raw_to_postgres")
+    with pgdb.connect(cfg) as con:
+        with run.stage(load.STG_VIEWS_SQL_FILE.name, pg=con):
+            load.run_sql_file(con, load.STG_VIEWS_SQL_FILE)
+
+
+def call_main(module: str, argv: List[str]) -> int:
+    try:
+        rc = step_module(module).main(argv)
+    except SystemExit as e:
+        rc = e.code
+    return rc if isinstance(rc, int) else (0 if rc is None else 1)
+
+
+def reprofile(cfg: pgdb.PgConfig, raw_dir: Path, tables: List[str], steps: List[str], run: RunLog) -> bool:
+    """Run the selected steps for these tables; False when one failed (later steps are skipped)."""
+    actions = {
+        "raw": lambda: reload_raw(cfg, raw_dir, tables, run),
+        "stg": lambda: refresh_stg(cfg, run),
+        "scorecard": lambda: call_main("02_generate_scorecard", ["--tables", *tables]),
+        "score": lambda: call_main("03_add_score_to_scorecard", []),
+        "describe": lambda: call_main("04_generate_describe_csv", ["--input", str(raw_dir), "--only", *tables]),
+        "dict": lambda: call_main("05_generate_tabledictionaries", ["--skip-if-empty"]),
+        "buckets": lambda: call_main("07_generate_recon_buckets", []),
+    }
+    for name in STEPS:
+        if name not in steps:
+            continue
+        print(f"-- {name}")
+        t0 = time.perf_counter()
+        try:
+            rc = actions[name]()
+        except Exception as e:  # keep watching: report and retry on the next change
+            print(f"[FAIL] {name}: {type(e).__name__}: {e}")
+            return False
+        if rc:
+            print(f"[FAIL] {name}: rc={rc}")
+            return False
+        print(f"   ({time.perf_counter() - t0:.2f}s)")
+    return True
+
+
+# -------------------------
+# Main
+# -------------------------
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(description="Re-profile the tables whose raw CSV changed.")
+    ap.add_argument("--raw-dir", type=Path, default=Path("raw_data"), help="Folder to watch (default: raw_data)")
+    ap.add_argument("--interval", type=float, default=1.0, help="Poll interval in seconds")
+    ap.add_argument("--debounce", type=float, default=2.0, help="Seconds a file must stand still before it counts")
+    ap.add_argument("--steps", nargs="+", default=STEPS, choices=STEPS, help="Steps to run per batch (default: all)")
+    ap.add_argument("--state", type=Path, default=STATE_PATH, help="File state (size / mtime / sha256)")
+    ap.add_argument("--once", action="store_true", help="Process the changes since the recorded state, then exit")
+    ap.add_argument("--retry-delay", type=float, default=30.0, help="Seconds before a failed batch is retried")
+    ap.add_argument("--db-url", default=None, help="DB URL (default: pgdb settings)")
+    return ap.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    run = RunLog("11_watch_raw_data")
+    try:
+        cfg = pgdb.load_config(args.db_url, application_name="11_watch_raw_data")
+    except pgdb.PgConfigError as e:
+        print(f"ERROR: {e}")
+        return 2
+    if not args.raw_dir.is_dir():
+        print(f"ERROR: raw folder not found: {args.raw_dir.resolve()}")
+        return 2
+
+    table_files: Dict[str, str] = step_module("01_load_raw_to_postgres").TABLE_FILES
+    table_of = {filename: table for table, filename in table_files.items()}
+    pgdb.reuse_connections()  # one connection per database between batches
+
+    known = load_state(args.state)
+    if not known and not args.once:
+        seen = scan(args.raw_dir, table_files)
+        _, known = content_changes(args.raw_dir, seen, {})
+        save_state(args.state, known)
+        print(f"Baseline recorded for {len(known)} files ({args.state.as_posix()})")
+
+    print(f"Target: {cfg.describe()}")
+    print(f"Watching {args.raw_dir.as_posix()} (every {args.interval:g}s, debounce {args.debounce:g}s); Ctrl+C to stop")
+    debouncer = Debouncer(0.0 if args.once else args.debounce)
+    reported_missing: set = set()
+    retry_at = 0.0  # after a failed batch: no new batch before this (monotonic)
+    try:
+        while True:
+            seen = scan(args.raw_dir, table_files)
+            for filename in sorted(set(known) - set(seen) - reported_missing):
+                print(f"[gone] {filename}: raw.{table_of[filename]} left as loaded")
+            reported_missing = set(known) - set(seen)
+            debouncer.observe(seen, known)
+
+            if debouncer.ready() and time.monotonic() >= retry_at:
+                changed, entries = content_changes(args.raw_dir, debouncer.take(), known)
+                # touch-only saves: record the new size / mtime right away
+                known.update({f: e for f, e in entries.items() if f not in changed})
+                save_state(args.state, known)
+                if changed:
+                    tables = sorted(table_of[f] for f in changed)
+                    print(f"\n== {time.strftime('%H:%M:%S')} changed: {', '.join(tables)} ==")
+                    t0 = time.perf_counter()
+                    with run.stage("reprofile", tables=",".join(tables)) as st:
+                        ok = reprofile(cfg, args.raw_dir, tables, args.steps, run)
+                        st.attrs["ok"] = ok
+                    print(f"== {'done' if ok else 'FAILED'} in {time.perf_counter() - t0:.1f}s ==")
+                    if ok:
+                        # only now: a failed batch keeps the old entries, so its files are retried
+                        known.update({f: entries[f] for f in changed})
+                        save_state(args.state, known)
+                    elif args.once:
+                        return 1
+                    else:
+                        retry_at = time.monotonic() + args.retry_delay
+                        print(f"   retrying in {args.retry_delay:g}s")
+
+            if args.once and not debouncer.pending:
+                return 0
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        print("\nStopped.")
+    finally:
+        pgdb.close_idle_connections()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,610 @@
+"""
+12_sharded_scorecard.py
+
+Scorecard over N Postgres shards (databases on one instance, or other instances),
+merged into dq.scorecard_table / dq.fk_orphans_detail of the normal target database.
+
+Layout (--load):
+- The large tables (--shard-tables, default order_details + inventory_transactions) are
+  hash-partitioned by their stg primary key: the key goes through the stg key rule
+  (02_create_stg_views.sql, see 09_check_fk_offline.stg_key) and pd.util.hash_array, so equal
+  stg keys always land on the same shard. Rows with a NULL key are spread round-robin.
+- Every other table is replicated to every shard (dimension-sized).
+- raw_data/ is streamed in --chunk-rows chunks and COPYed to all shards in parallel.
+  The CSVs are read as text (06_duckdb_profile.py does the same); the stg views normalize
+  ids, so every metric is the same as after 01_load_raw_to_postgres.py.
+- Each shard gets raw.* (sql/00_setup/01_create_schemas.sql), stg.* views, the dq.* helper
+  functions (the scorecard pack run with an empty dq.only_tables scope) and dq_shard.layout.
+- Shards: --shards N = databases <PGDATABASE>_shard<i> on the configured server (created when
+  missing), or --shard-url URL per shard (databases must exist).
+
+Partials (one connection per shard, all shards at once):
+  per table        row count, null cells, PK NULL rows, PK duplicate rows, min/max date,
+                   negative-flag rows
+  per relationship base / NULL-FK / raw orphan / normalized orphan / fixable rows
+- Replicated tables and relationships between them are computed on shard 0 only.
+- PK duplicates are exact per shard (equal keys share a shard) and add up.
+- FK checks whose parent is sharded use key exchange: each parent shard's
+  (pk, count(*)) rows are COPYed into dq_shard.parent_keys of the shards that hold the
+  child; the check joins that multiset instead of stg.<parent> (same counts as
+  05_fk_orphans.sql, duplicates included).
+
+Merge (coordinator = PGDATABASE / --db-url): partial rows go to temp tables and one
+insert ... on conflict per target table sums them with the percentage formulas of
+01_nulls.sql / 02_pk_dupes.sql; the fk_orphan_rows roll-up is the one of 05_fk_orphans.sql.
+Exports <out-dir>/scorecard.csv and fk_orphans_detail.csv (default artifacts/sharded/).
+
+Usage (from repo root):
+  python python/12_sharded_scorecard.py --shards 4 --load
+  python python/12_sharded_scorecard.py --shards 4                 # re-profile loaded shards
+  python python/12_sharded_scorecard.py --shard-url postgresql://pg1/dq --shard-url postgresql://pg2/dq --load
+  python python/12_sharded_scorecard.py --shards 4 --load --raw-dir synthetic_data/x100 --summary
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from dataclasses import dataclass
+from io import StringIO
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from psycopg import sql as psql
+
+import pgdb
+from csv_reader import NULL_VALUES, open_utf8, read_header, sniff_encoding
+from instrument import RunLog
+from scorecard_spec import DATE_COLS, FK_RELATIONSHIPS, NUM_COLS, PK_COLS
+
+offline = importlib.import_module("09_check_fk_offline")
+scorecard = importlib.import_module("02_generate_scorecard")
+
+RAW_DIR = Path("raw_data")
+OUT_DIR = Path("artifacts/sharded")
+SCHEMAS_SQL = Path("sql/00_setup/01_create_schemas.sql")
+STG_VIEWS_SQL = Path("sql/00_setup/02_create_stg_views.sql")
+SCORECARD_SQL_DIR = Path("sql/10_scorecard")
+
+T_SCHEMA = "stg"
+DEFAULT_SHARD_TABLES = ["order_details", "inventory_transactions"]
+CHUNK_ROWS = 500_000
+NO_TABLES = "-"  # dq.only_tables value that matches no table: the pack only installs its objects
+
+SHARD_SETUP_SQL = """
+create schema if not exists dq_shard;
+
+create table if not exists dq_shard.layout (
+  table_name  text primary key,
+  sharded     boolean not null,
+  shard_no    int not null,
+  shard_count int not null,
+  loaded_at   timestamptz not null default now()
+);
+
+create unlogged table if not exists dq_shard.parent_keys (
+  parent_table  text not null,
+  parent_pk_col text not null,
+  pk_raw        text not null,
+  cnt           bigint not null
+);
+"""
+
+TABLE_PARTIAL_COLS = [
+    "table_name", "shard", "row_count", "col_count", "null_cells", "suspected_pk",
+    "pk_null_rows", "pk_duplicate_rows", "date_min", "date_max", "neg_rows",
+]
+FK_PARTIAL_COLS = [
+    "child_table", "child_fk_col", "parent_table", "parent_pk_col", "shard",
+    "base_rows", "null_fk_rows", "orphan_rows_raw", "orphan_rows_norm", "fixable_by_normalize_rows",
+]
+
+MERGE_SQL = """
+create temp table shard_table_partials (
+  table_name text, shard int, row_count bigint, col_count int, null_cells bigint, suspected_pk text,
+  pk_null_rows bigint, pk_duplicate_rows bigint, date_min date, date_max date, neg_rows bigint
+) on commit drop;
+create temp table shard_fk_partials (
+  child_table text, child_fk_col text, parent_table text, parent_pk_col text, shard int,
+  base_rows bigint, null_fk_rows bigint, orphan_rows_raw bigint, orphan_rows_norm bigint,
+  fixable_by_normalize_rows bigint
+) on commit drop;
+"""
+
+MERGE_TABLES_SQL = """
+insert into dq.scorecard_table as s (
+  table_schema, table_name, row_count, col_count, null_cells, total_cells, overall_null_pct,
+  suspected_pk, pk_null_pct, pk_duplicate_rows, date_min, date_max, neg_value_flags, updated_at
+)
+select
+  %(schema)s, b.table_name, b.row_count, b.col_count, b.null_cells,
+  (b.row_count * b.col_count)::bigint,
+  case
+    when (b.row_count * b.col_count) = 0 then null
+    else round((b.null_cells::numeric / (b.row_count * b.col_count)::numeric) * 100, 4)
+  end,
+  b.suspected_pk,
+  case
+    when b.suspected_pk is null or b.row_count = 0 then null
+    else round((b.pk_null_rows::numeric / b.row_count::numeric) * 100, 4)
+  end,
+  b.pk_duplicate_rows, b.date_min, b.date_max, b.neg_rows, now()
+from (
+  select
+    table_name,
+    sum(row_count)::bigint as row_count,
+    max(col_count) as col_count,
+    sum(null_cells)::bigint as null_cells,
+    max(suspected_pk) as suspected_pk,
+    sum(pk_null_rows)::bigint as pk_null_rows,
+    sum(pk_duplicate_rows)::bigint as pk_duplicate_rows,
+    min(date_min) as date_min,
+    max(date_max) as date_max,
+    sum(neg_rows)::bigint as neg_rows
+  from shard_table_partials
+  group by table_name
+) b
+on conflict (table_schema, table_name) do update set
+  row_count = excluded.row_count,
+  col_count = excluded.col_count,
+  null_cells = excluded.null_cells,
+  total_cells = excluded.total_cells,
+  overall_null_pct = excluded.overall_null_pct,
+  suspected_pk = excluded.suspected_pk,
+  pk_null_pct = excluded.pk_null_pct,
+  pk_duplicate_rows = excluded.pk_duplicate_rows,
+  date_min = excluded.date_min,
+  date_max = excluded.date_max,
+  neg_value_flags = excluded.neg_value_flags,
+  updated_at = excluded.updated_at
+"""
+
+MERGE_FK_SQL = """
+insert into dq.fk_orphans_detail (
+  child_schema, child_table, child_fk_col, parent_schema, parent_table, parent_pk_col,
+  orphan_rows, checked_at,
+  base_rows, null_fk_rows, orphan_rows_raw, orphan_rows_norm, fixable_by_normalize_rows
+)
+select
+  %(schema)s, child_table, child_fk_col, %(schema)s, parent_table, parent_pk_col,
+  sum(orphan_rows_norm)::bigint, now(),
+  sum(base_rows)::bigint, sum(null_fk_rows)::bigint, sum(orphan_rows_raw)::bigint,
+  sum(orphan_rows_norm)::bigint, sum(fixable_by_normalize_rows)::bigint
+from shard_fk_partials
+group by child_table, child_fk_col, parent_table, parent_pk_col
+on conflict (child_schema, child_table, child_fk_col, parent_schema, parent_table, parent_pk_col)
+do update set
+  orphan_rows = excluded.orphan_rows,
+  checked_at = excluded.checked_at,
+  base_rows = excluded.base_rows,
+  null_fk_rows = excluded.null_fk_rows,
+  orphan_rows_raw = excluded.orphan_rows_raw,
+  orphan_rows_norm = excluded.orphan_rows_norm,
+  fixable_by_normalize_rows = excluded.fixable_by_normalize_rows
+"""
+
+# 05_fk_orphans.sql roll-up
+ROLLUP_SQL = """
+update dq.scorecard_table s
+set
+  fk_orphan_rows = d.orphan_rows_norm,
+  fk_fixable_by_normalize_rows = d.fixable_by_normalize_rows,
+  updated_at = now()
+from (
+  select
+    child_schema as table_schema,
+    child_table  as table_name,
+    sum(orphan_rows_norm)::bigint as orphan_rows_norm,
+    sum(fixable_by_normalize_rows)::bigint as fixable_by_normalize_rows
+  from dq.fk_orphans_detail
+  group by child_schema, child_table
+) d
+where s.table_schema = d.table_schema
+  and s.table_name   = d.table_name
+"""
+
+
+@dataclass(frozen=True)
+class Shard:
+    no: int
+    cfg: pgdb.PgConfig
+
+    def describe(self) -> str:
+        return f"shard {self.no}: {self.cfg.describe()}"
+
+
+def q(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def lit(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+# -------------------------
+# Shards
+# -------------------------
+def resolve_shards(cfg: pgdb.PgConfig, args: argparse.Namespace) -> List[Shard]:
+    if args.shard_url:
+        return [
+            Shard(i, pgdb.load_config(url, application_name=f"12_sharded_scorecard:{i}"))
+            for i, url in enumerate(args.shard_url)
+        ]
+    return [Shard(i, pgdb.with_database(cfg, f"{cfg.dbname}_shard{i}")) for i in range(args.shards)]
+
+
+def ensure_databases(shards: List[Shard]) -> None:
+    for shard in shards:
+        with pgdb.connect(shard.cfg, dbname=shard.cfg.maintdb, autocommit=True) as con:
+            exists = con.execute("select 1 from pg_database where datname = %s", (shard.cfg.dbname,)).fetchone()
+            if not exists:
+                con.execute(psql.SQL("create database {}").format(psql.Identifier(shard.cfg.dbname)))
+                print(f" - created database {shard.cfg.dbname}")
+
+
+def install_pack(con, label: str) -> None:
+    """dq.* tables / helper functions of the scorecard pack, without running any check."""
+    con.execute("select set_config('dq.only_tables', %s, false)", (NO_TABLES,))
+    for fname in scorecard.SQL_RUN_ORDER:
+        con.execute((SCORECARD_SQL_DIR / fname).read_text(encoding="utf-8"))
+    con.execute("select set_config('dq.only_tables', '', false)")
+    con.commit()
+    print(f" - {label}: scorecard pack objects installed")
+
+
+def setup_shard(shard: Shard) -> None:
+    with pgdb.connect(shard.cfg) as con:
+        con.execute(SCHEMAS_SQL.read_text(encoding="utf-8"))
+        con.execute(STG_VIEWS_SQL.read_text(encoding="utf-8"))
+        con.execute(SHARD_SETUP_SQL)
+        con.commit()
+        install_pack(con, f"shard {shard.no}")
+
+
+def read_layout(shards: List[Shard]) -> Dict[str, bool]:
+    """table -> sharded, checked to be the same on every shard (and to match the shard list)."""
+    layouts = []
+    for shard in shards:
+        with pgdb.connect(shard.cfg) as con:
+            if con.execute("select to_regclass('dq_shard.layout')").fetchone()[0] is None:
+                raise SystemExit(f"{shard.describe()} has no dq_shard.layout: run with --load first")
+            rows = con.execute("select table_name, sharded, shard_no, shard_count from dq_shard.layout").fetchall()
+        for table, _, no, count in rows:
+            if no != shard.no or count != len(shards):
+                raise SystemExit(
+                    f"{shard.describe()}: {table} was loaded as shard {no} of {count}, "
+                    f"not {shard.no} of {len(shards)}: reload with --load"
+                )
+        layouts.append({t: s for t, s, _, _ in rows})
+    if any(layout != layouts[0] for layout in layouts[1:]) or not layouts[0]:
+        raise SystemExit("Shards were loaded with different tables / shard keys: reload with --load")
+    return layouts[0]
+
+
+# -------------------------
+# Load (partition + COPY)
+# -------------------------
+def shard_of(keys: pd.Series, n: int, offset: int) -> np.ndarray:
+    """Shard number per row: hash of the stg key; NULL keys round-robin."""
+    stg = offline.stg_key(keys)
+    out = (np.arange(len(keys), dtype=np.int64) + offset) % n
+    present = stg.notna().to_numpy()
+    if present.any():
+        hashed = pd.util.hash_array(stg[present].to_numpy(dtype=object))
+        out[present] = (hashed % np.uint64(n)).astype(np.int64)
+    return out
+
+
+def csv_text(df: pd.DataFrame) -> str:
+    buf = StringIO()
+    df.to_csv(buf, index=False, header=False)  # NaN -> empty unquoted field = NULL for COPY csv
+    return buf.getvalue()
+
+
+def copy_rows(con, table: str, cols: List[str], data: str) -> None:
+    if not data:
+        return
+    col_list = ", ".join(q(c) for c in cols)
+    with con.cursor() as cur:
+        with cur.copy(f"copy raw.{q(table)} ({col_list}) from stdin with (format csv)") as cp:
+            cp.write(data)
+
+
+def load_table(
+    table: str, path: Path, sharded: bool, cons: list, pool: ThreadPoolExecutor, chunk_rows: int, run: RunLog
+) -> List[int]:
+    enc = sniff_encoding(path)
+    cols = read_header(path, enc)
+    pk_header = offline.header_map(path, enc).get(PK_COLS[table].replace("_", "")) if sharded else None
+    if sharded and pk_header is None:
+        raise SystemExit(f"{path}: no column for {PK_COLS[table]}")
+    n = len(cons)
+    counts = [0] * n
+
+    with run.stage(f"load raw.{table}", bytes_read=path.stat().st_size, encoding=enc, sharded=sharded) as st:
+        list(pool.map(lambda con: con.execute(f"truncate raw.{q(table)}"), cons))
+        offset = 0
+        with open_utf8(path, enc) as stream:
+            reader = pd.read_csv(
+                stream, dtype=str, na_values=NULL_VALUES, keep_default_na=False, chunksize=chunk_rows
+            )
+            for chunk in reader:
+                if sharded:
+                    where = shard_of(chunk[pk_header], n, offset)
+                    parts = [chunk[where == i] for i in range(n)]
+                    list(pool.map(lambda i: copy_rows(cons[i], table, cols, csv_text(parts[i])), range(n)))
+                    for i in range(n):
+                        counts[i] += len(parts[i])
+                else:
+                    data = csv_text(chunk)  # serialized once, sent to every shard
+                    list(pool.map(lambda con: copy_rows(con, table, cols, data), cons))
+                    counts = [c + len(chunk) for c in counts]
+                offset += len(chunk)
+        list(pool.map(lambda con: con.commit(), cons))
+        st.rows = offset
+    split = " / ".join(f"{c:,}" for c in counts) if sharded else f"{offset:,} x {n}"
+    print(f" - raw.{table:<24} {'sharded ' if sharded else 'replicated'}  rows {split}")
+    return counts
+
+
+def load_shards(shards: List[Shard], raw_dir: Path, shard_tables: Sequence[str], chunk_rows: int, run: RunLog) -> None:
+    with ExitStack() as stack, ThreadPoolExecutor(max_workers=len(shards)) as pool:
+        cons = [stack.enter_context(pgdb.connect(s.cfg)) for s in shards]
+        for table in PK_COLS:
+            path = raw_dir / f"{table}.csv"
+            if not path.exists():
+                raise SystemExit(f"missing file: {path}")
+            load_table(table, path, table in shard_tables, cons, pool, chunk_rows, run)
+
+        for shard, con in zip(shards, cons):
+            con.execute("truncate dq_shard.layout")
+            with con.cursor() as cur:
+                cur.executemany(
+                    "insert into dq_shard.layout (table_name, sharded, shard_no, shard_count) values (%s, %s, %s, %s)",
+                    [(t, t in shard_tables, shard.no, len(shards)) for t in PK_COLS],
+                )
+            con.execute("analyze")
+            con.commit()
+
+
+# -------------------------
+# Partials
+# -------------------------
+def table_partial_sql(table: str, cols: List[str]) -> str:
+    """One row of mergeable counts for a stg view (the formulas of 01..04, before any percentage)."""
+    t = f"{T_SCHEMA}.{q(table)}"
+    null_expr = " + ".join(f"count(*) filter (where {q(c)} is null)" for c in cols) or "0"
+    pk = PK_COLS.get(table)
+    if pk:
+        pk_nulls = f"count(*) filter (where {q(pk)} is null)::bigint"
+        dupes = (
+            f"coalesce((select sum(cnt - 1) from (select count(*) as cnt from {t} "
+            f"where {q(pk)} is not null group by {q(pk)} having count(*) > 1) d), 0)::bigint"
+        )
+    else:
+        pk_nulls = dupes = "null::bigint"
+    dates = DATE_COLS.get(table)
+    if dates:
+        exprs = ", ".join(f"dq.try_parse_date({q(c)})" for c in dates)
+        date_min, date_max = f"min(least({exprs}))", f"max(greatest({exprs}))"
+    else:
+        date_min = date_max = "null::date"
+    nums = NUM_COLS.get(table)
+    if nums:
+        any_neg = " or ".join(f"(dq.try_parse_numeric({q(c)}) < 0)" for c in nums)
+        neg = f"count(*) filter (where {any_neg})::bigint"
+    else:
+        neg = "null::bigint"
+    return (
+        f"select count(*)::bigint, ({null_expr})::bigint, {pk_nulls}, {dupes}, "
+        f"{date_min}, {date_max}, {neg} from {t}"
+    )
+
+
+def fk_partial_sql(child: str, fk: str, parent: str, pk: str, exchanged: bool) -> str:
+    """05_fk_orphans.sql metrics; with exchanged parent keys the parent side is dq_shard.parent_keys."""
+    if exchanged:
+        p_raw = (
+            "select k.pk_raw, dq.norm_id(k.pk_raw) as pk_norm "
+            "from dq_shard.parent_keys k cross join lateral generate_series(1, k.cnt) "
+            f"where k.parent_table = {lit(parent)} and k.parent_pk_col = {lit(pk)}"
+        )
+    else:
+        p_raw = f"select {q(pk)} as pk_raw, dq.norm_id({q(pk)}) as pk_norm from {T_SCHEMA}.{q(parent)}"
+    return f"""
+      with base as (
+        select c.{q(fk)} as fk_raw, dq.norm_id(c.{q(fk)}) as fk_norm
+        from {T_SCHEMA}.{q(child)} c
+      ),
+      p_raw as ({p_raw}),
+      j as (
+        select b.fk_raw, b.fk_norm, pr.pk_raw as hit_raw, pn.pk_raw as hit_norm
+        from base b
+        left join p_raw pr on b.fk_raw is not null and b.fk_raw = pr.pk_raw
+        left join p_raw pn on b.fk_norm is not null and b.fk_norm = pn.pk_norm
+      )
+      select
+        count(*) filter (where fk_raw is not null)::bigint,
+        count(*) filter (where fk_raw is null)::bigint,
+        count(*) filter (where fk_raw is not null and hit_raw is null)::bigint,
+        count(*) filter (where fk_raw is not null and fk_norm is not null and hit_norm is null)::bigint,
+        count(*) filter (where fk_raw is not null and hit_raw is null and hit_norm is not null)::bigint
+      from j
+    """
+
+
+def exchange_parent_keys(shards: List[Shard], layout: Dict[str, bool], run: RunLog) -> List[Tuple[str, str]]:
+    """Copy the (pk, count) multiset of every sharded parent to the shards that check its children."""
+    exchanged: List[Tuple[str, str]] = []
+    for child, fk, parent, pk in FK_RELATIONSHIPS:
+        if not layout.get(parent) or (parent, pk) in exchanged:
+            continue
+        children_sharded = any(layout.get(c) for c, _, p, k in FK_RELATIONSHIPS if (p, k) == (parent, pk))
+        targets = shards if children_sharded else shards[:1]
+        with run.stage(f"key exchange {parent}.{pk}") as st, ExitStack() as stack:
+            dst = [stack.enter_context(pgdb.connect(s.cfg)) for s in targets]
+            for con in dst:
+                con.execute(
+                    "delete from dq_shard.parent_keys where parent_table = %s and parent_pk_col = %s", (parent, pk)
+                )
+            src_sql = (
+                f"copy (select {lit(parent)}, {lit(pk)}, {q(pk)}, count(*) from {T_SCHEMA}.{q(parent)} "
+                f"where {q(pk)} is not null group by {q(pk)}) to stdout"
+            )
+            rows = 0
+            for shard in shards:
+                with pgdb.connect(shard.cfg) as src, src.cursor() as cur:
+                    with cur.copy(src_sql) as out, ExitStack() as sinks:
+                        copies = [
+                            sinks.enter_context(sinks.enter_context(con.cursor()).copy("copy dq_shard.parent_keys from stdin"))
+                            for con in dst
+                        ]
+                        for block in out:
+                            for cp in copies:
+                                cp.write(block)
+                    rows += cur.rowcount
+            for con in dst:
+                con.commit()
+            st.rows = rows
+        exchanged.append((parent, pk))
+        print(f" - key exchange {parent}.{pk}: {rows:,} distinct keys -> {len(targets)} shard(s)")
+    return exchanged
+
+
+def shard_partials(
+    shard: Shard, layout: Dict[str, bool], exchanged: List[Tuple[str, str]]
+) -> Tuple[List[tuple], List[tuple]]:
+    tables = [t for t in PK_COLS if layout.get(t) or shard.no == 0]
+    table_rows: List[tuple] = []
+    fk_rows: List[tuple] = []
+    with pgdb.connect(shard.cfg) as con:
+        for table in tables:
+            cols = [
+                r[0]
+                for r in con.execute(
+                    "select column_name from information_schema.columns "
+                    "where table_schema = %s and table_name = %s order by ordinal_position",
+                    (T_SCHEMA, table),
+                ).fetchall()
+            ]
+            counts = con.execute(table_partial_sql(table, cols)).fetchone()
+            row_count, null_cells, pk_nulls, dupes, date_min, date_max, neg = counts
+            table_rows.append(
+                (table, shard.no, row_count, len(cols), null_cells, PK_COLS.get(table), pk_nulls, dupes, date_min, date_max, neg)
+            )
+        for child, fk, parent, pk in FK_RELATIONSHIPS:
+            if not (layout.get(child) or shard.no == 0):
+                continue
+            sql = fk_partial_sql(child, fk, parent, pk, exchanged=(parent, pk) in exchanged)
+            fk_rows.append((child, fk, parent, pk, shard.no, *con.execute(sql).fetchone()))
+        con.rollback()
+    return table_rows, fk_rows
+
+
+# -------------------------
+# Merge
+# -------------------------
+def merge(cfg: pgdb.PgConfig, table_rows: List[tuple], fk_rows: List[tuple]) -> None:
+    with pgdb.connect(cfg) as con:
+        install_pack(con, "coordinator")
+        con.execute(MERGE_SQL)
+        with con.cursor() as cur:
+            cur.executemany(
+                f"insert into shard_table_partials ({', '.join(TABLE_PARTIAL_COLS)}) "
+                f"values ({', '.join(['%s'] * len(TABLE_PARTIAL_COLS))})",
+                table_rows,
+            )
+            cur.executemany(
+                f"insert into shard_fk_partials ({', '.join(FK_PARTIAL_COLS)}) "
+                f"values ({', '.join(['%s'] * len(FK_PARTIAL_COLS))})",
+                fk_rows,
+            )
+            cur.execute(MERGE_TABLES_SQL, {"schema": T_SCHEMA})
+            cur.execute(MERGE_FK_SQL, {"schema": T_SCHEMA})
+            cur.execute(ROLLUP_SQL)
+        con.commit()
+
+
+# -------------------------
+# Main
+# -------------------------
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(description="Scorecard over hash-partitioned Postgres shards, merged on one node.")
+    ap.add_argument("--shards", type=int, default=2, help="Shard databases <PGDATABASE>_shard<i> (default 2)")
+    ap.add_argument("--shard-url", action="append", default=[], help="Shard connection URL (repeat; overrides --shards)")
+    ap.add_argument("--db-url", default=None, help="Coordinator URL (default: pgdb settings)")
+    ap.add_argument("--load", action="store_true", help="Create / set up the shards and distribute --raw-dir first")
+    ap.add_argument("--raw-dir", type=Path, default=RAW_DIR, help="Folder of raw *.csv (with --load)")
+    ap.add_argument(
+        "--shard-tables", nargs="+", default=DEFAULT_SHARD_TABLES, choices=sorted(PK_COLS),
+        help="Tables partitioned by their stg PK; the others are replicated (with --load)",
+    )
+    ap.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS, help="CSV rows per partition / COPY batch")
+    ap.add_argument("--out-dir", type=Path, default=OUT_DIR, help="scorecard.csv / fk_orphans_detail.csv folder")
+    ap.add_argument("--summary", action="store_true", help="Print the per-stage timing summary at the end")
+    return ap.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    run = RunLog("12_sharded_scorecard")
+    try:
+        cfg = pgdb.load_config(args.db_url, application_name="12_sharded_scorecard")
+        shards = resolve_shards(cfg, args)
+    except pgdb.PgConfigError as e:
+        print(f"ERROR: {e}")
+        return 2
+    if not shards:
+        print("ERROR: no shards (--shards N or --shard-url URL)")
+        return 2
+
+    print(f"Coordinator: {cfg.describe()}")
+    for shard in shards:
+        print(f"  {shard.describe()}")
+
+    if args.load:
+        print("== Set up shards ==")
+        with run.stage("setup shards"):
+            if not args.shard_url:
+                ensure_databases(shards)
+            with ThreadPoolExecutor(max_workers=len(shards)) as pool:
+                list(pool.map(setup_shard, shards))
+        print(f"== Distribute {args.raw_dir.as_posix()} ==")
+        load_shards(shards, args.raw_dir, args.shard_tables, args.chunk_rows, run)
+
+    layout = read_layout(shards)
+    print(f"== Partials (sharded: {', '.join(t for t, s in layout.items() if s) or 'none'}) ==")
+    exchanged = exchange_parent_keys(shards, layout, run)
+    with run.stage("partials", shards=len(shards)) as st, ThreadPoolExecutor(max_workers=len(shards)) as pool:
+        results = list(pool.map(lambda s: shard_partials(s, layout, exchanged), shards))
+        table_rows = [r for t, _ in results for r in t]
+        fk_rows = [r for _, f in results for r in f]
+        st.rows = len(table_rows) + len(fk_rows)
+    print(f" - {len(table_rows)} table partials, {len(fk_rows)} FK partials from {len(shards)} shards")
+
+    print("== Merge into dq.scorecard_table / dq.fk_orphans_detail ==")
+    with run.stage("merge"):
+        merge(cfg, table_rows, fk_rows)
+
+    engine = pgdb.sqlalchemy_engine(cfg)
+    with run.stage("export") as st:
+        st.rows = scorecard.export_view_to_csv(
+            engine, "select * from dq.scorecard_v order by table_schema, table_name", args.out_dir / "scorecard.csv"
+        )
+        scorecard.export_view_to_csv(
+            engine,
+            "select * from dq.fk_orphans_detail order by child_schema, child_table, child_fk_col",
+            args.out_dir / "fk_orphans_detail.csv",
+        )
+
+    if args.summary:
+        run.print_summary()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
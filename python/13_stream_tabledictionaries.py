@@ -0,0 +1,336 @@
+"""
+13_stream_tabledictionaries.py
+
+Value dictionaries straight from the CSVs, no database: every column of every table
+in one read pass per file, in bounded memory.
+
+Same mapping as build_dict_sql / build_index_sql in 05_generate_tabledictionaries.py:
+  NULL -> [NULL], blank / spaces only -> [BLANK], else the value trimmed of spaces.
+Rows are ordered by cnt desc. Within one count the order is collation-independent
+(values by code point, then [NULL], then [BLANK]) and is not part of the contract:
+05 orders ties by the database collation, so rows with equal counts (and top_value
+when the top count is tied) may come in a different order there.
+NULL = the tokens pandas and 06_duckdb_profile.py read as NULL (csv_reader.NULL_VALUES);
+values are the file text, as 06 loads raw.* (01_load_raw_to_postgres.py lets pandas
+re-type columns, so its raw.* shows e.g. "1.0" where the file says "1").
+
+Per column:
+- [NULL] / [BLANK] / total rows are always exact.
+- Exact counter (one pandas value_counts per chunk, merged) until the column has more
+  than --exact-cap distinct values. Then it switches to:
+    Misra-Gries summary, --top-k counters: chunk counts are merged and reduced to the k
+    largest minus the (k+1)-th count, so a kept count is a lower bound and undercounts
+    by at most delta <= rows / (k + 1) (delta is tracked exactly);
+    Count-Min sketch (width e / --cms-eps, depth ln(1 / --cms-delta)): overcounts by at
+    most eps * rows with probability 1 - delta;
+    HyperLogLog (2^--hll-p registers) for distinct_cnt_mapped.
+  The exact counts seen before the switch seed all three.
+- Sketched dictionary files list the top-k values with
+    cnt = Count-Min estimate clipped to [lower, lower + delta], cnt_lower, cnt_upper.
+  Exact files have the 05 columns only (col_value, cnt).
+Memory per column: at most --exact-cap values, or k counters + the Count-Min table + 2^p bytes.
+
+Output (default artifacts/tabledictionaries_stream/):
+- <schema>__<table>__<column>__dict.csv   (schema label: --schema, default raw / clean)
+- dictionary_index.csv                    (same columns as 05; distinct_cnt_mapped and
+                                           top_cnt are estimates for sketched columns)
+- sketch_index.csv                        (mode exact | sketch + error bounds per column)
+
+Usage (from repo root):
+  python python/13_stream_tabledictionaries.py
+  python python/13_stream_tabledictionaries.py --source cleaned --tables orders payments
+  python python/13_stream_tabledictionaries.py --data-dir synthetic_data/x100 --exact-cap 20000 --top-k 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import math
+from dataclasses import dataclass, field
+from decimal import ROUND_HALF_UP, Decimal
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from csv_reader import NULL_VALUES, open_utf8, read_header, sniff_encoding
+from instrument import RunLog
+
+
+SOURCES = {"raw": Path("raw_data"), "cleaned": Path("extra-i-cleaning/cleaned_data")}
+SCHEMA_LABELS = {"raw": "raw", "cleaned": "clean"}
+OUT_DIR = Path("artifacts/tabledictionaries_stream")
+
+NULL_TOKEN = "[NULL]"
+BLANK_TOKEN = "[BLANK]"
+SPECIAL_RANK = {NULL_TOKEN: 0, BLANK_TOKEN: 1}  # after the real values of the same count
+
+EXACT_CAP = 50_000
+TOP_K = 1_000
+CMS_EPS = 0.0005
+CMS_DELTA = 0.001
+HLL_P = 14
+CHUNK_ROWS = 200_000
+
+INDEX_HEADERS = [
+    "table_schema", "table_name", "column_name", "total_rows", "distinct_cnt_mapped",
+    "null_cnt", "blank_cnt", "top_value", "top_cnt", "top_pct",
+]
+SKETCH_HEADERS = [
+    "table_schema", "table_name", "column_name", "mode", "total_rows", "distinct_cnt_mapped",
+    "listed_values", "mg_max_undercount", "cms_width", "cms_depth", "cms_max_overcount",
+]
+
+
+def hash_key(seed: int) -> str:
+    """pd.util.hash_array wants a 16-character key; one per independent hash function."""
+    return f"dqdict{seed:010d}"
+
+
+# -------------------------
+# Sketches (vectorized over the distinct values of a chunk)
+# -------------------------
+class CountMin:
+    def __init__(self, eps: float, delta: float) -> None:
+        self.width = int(math.ceil(math.e / eps))
+        self.depth = int(math.ceil(math.log(1.0 / delta)))
+        self.table = np.zeros((self.depth, self.width), dtype=np.int64)
+
+    def _cells(self, values: np.ndarray) -> List[np.ndarray]:
+        return [
+            (pd.util.hash_array(values, hash_key=hash_key(r)) % np.uint64(self.width)).astype(np.int64)
+            for r in range(self.depth)
+        ]
+
+    def add(self, values: np.ndarray, counts: np.ndarray) -> None:
+        for r, cells in enumerate(self._cells(values)):
+            np.add.at(self.table[r], cells, counts)
+
+    def estimate(self, values: np.ndarray) -> np.ndarray:
+        cells = self._cells(values)
+        return np.min([self.table[r][c] for r, c in enumerate(cells)], axis=0)
+
+
+class HyperLogLog:
+    def __init__(self, p: int) -> None:
+        self.p = p
+        self.m = 1 << p
+        self.registers = np.zeros(self.m, dtype=np.uint8)
+
+    def add(self, values: np.ndarray) -> None:
+        if not len(values):
+            return
+        h = pd.util.hash_array(values, hash_key=hash_key(99))
+        bucket = (h >> np.uint64(64 - self.p)).astype(np.int64)
+        rest = h & np.uint64((1 << (64 - self.p)) - 1)  # < 2^50: exact as float64
+        _, exp = np.frexp(rest.astype(np.float64))  # bit length (0 for rest == 0)
+        rank = (64 - self.p - exp + 1).astype(np.uint8)
+        np.maximum.at(self.registers, bucket, rank)
+
+    def estimate(self) -> int:
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / float(np.sum(np.ldexp(1.0, -self.registers.astype(np.int64))))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            return int(round(m * math.log(m / zeros)))  # linear counting for small cardinalities
+        return int(round(raw))
+
+
+# -------------------------
+# Per-column state
+# -------------------------
+@dataclass
+class ColumnDict:
+    exact_cap: int
+    top_k: int
+    cms_eps: float
+    cms_delta: float
+    hll_p: int
+    total: int = 0
+    nulls: int = 0
+    blanks: int = 0
+    counts: pd.Series = field(default_factory=lambda: pd.Series(dtype="int64"))  # exact, or Misra-Gries
+    undercount: int = 0  # Misra-Gries: sum of the subtracted thresholds
+    cms: Optional[CountMin] = None
+    hll: Optional[HyperLogLog] = None
+
+    @property
+    def sketched(self) -> bool:
+        return self.cms is not None
+
+    def update(self, col: pd.Series) -> None:
+        self.total += len(col)
+        null = col.isna().to_numpy()
+        trimmed = col[~null].str.strip(" ")
+        blank = (trimmed == "").to_numpy()
+        self.nulls += int(null.sum())
+        self.blanks += int(blank.sum())
+        chunk = trimmed[~blank].value_counts(sort=False)
+        if chunk.empty:
+            return
+        values = chunk.index.to_numpy(dtype=object)
+        if self.hll is None:
+            self.hll = HyperLogLog(self.hll_p)
+        self.hll.add(values)
+
+        if self.sketched:
+            self.cms.add(values, chunk.to_numpy(dtype=np.int64))
+        self.counts = self.counts.add(chunk, fill_value=0).astype("int64")
+        if not self.sketched and len(self.counts) > self.exact_cap:
+            self.cms = CountMin(self.cms_eps, self.cms_delta)
+            self.cms.add(self.counts.index.to_numpy(dtype=object), self.counts.to_numpy(dtype=np.int64))
+        if self.sketched and len(self.counts) > self.top_k:
+            # Misra-Gries merge; the k largest stay listed even when they drop to 0, so an
+            # all-distinct column (ids) still has candidates, ranked by the Count-Min estimate.
+            threshold = int(self.counts.nlargest(self.top_k + 1).iloc[-1])
+            self.counts = self.counts.nlargest(self.top_k) - threshold
+            self.undercount += threshold
+
+    def distinct(self) -> int:
+        specials = int(self.nulls > 0) + int(self.blanks > 0)
+        if not self.sketched:
+            return len(self.counts) + specials
+        return max(self.hll.estimate(), len(self.counts)) + specials
+
+    def rows(self) -> List[tuple]:
+        """(col_value, cnt[, cnt_lower, cnt_upper]): cnt desc, then value by code point, specials last."""
+        out: List[tuple] = []
+        if self.sketched and len(self.counts):
+            values = self.counts.index.to_numpy(dtype=object)
+            lower = self.counts.to_numpy(dtype=np.int64)
+            upper = lower + self.undercount
+            est = np.clip(self.cms.estimate(values), lower, upper)
+            out = [(v, int(e), int(lo), int(up)) for v, e, lo, up in zip(values, est, lower, upper)]
+        elif len(self.counts):
+            out = [(v, int(c)) for v, c in self.counts.items()]
+        width = 4 if self.sketched else 2
+        for token, cnt in ((NULL_TOKEN, self.nulls), (BLANK_TOKEN, self.blanks)):
+            if cnt:
+                out.append((token, cnt, cnt, cnt)[:width])
+        out.sort(key=lambda r: (-r[1], r[0] in SPECIAL_RANK, SPECIAL_RANK.get(r[0], 0), r[0]))
+        return out
+
+
+# -------------------------
+# Reading
+# -------------------------
+def build_table(path: Path, args: argparse.Namespace, run: RunLog) -> Dict[str, ColumnDict]:
+    enc = sniff_encoding(path)
+    cols = {
+        c: ColumnDict(args.exact_cap, args.top_k, args.cms_eps, args.cms_delta, args.hll_p)
+        for c in read_header(path, enc)
+    }
+    with run.stage(f"stream {path.stem}", bytes_read=path.stat().st_size, encoding=enc) as st:
+        with open_utf8(path, enc) as stream:
+            reader = pd.read_csv(
+                stream,
+                dtype=str,
+                na_values=NULL_VALUES,
+                keep_default_na=False,
+                chunksize=args.chunk_rows,
+            )
+            for chunk in reader:
+                for name, state in cols.items():
+                    state.update(chunk[name])
+        st.rows = next(iter(cols.values())).total if cols else 0
+        st.attrs["sketched"] = sum(1 for c in cols.values() if c.sketched)
+    return cols
+
+
+def top_pct(top_cnt: int, total: int) -> Decimal:
+    """round(top_cnt * 100.0 / total, 2) with Postgres rounding (half away from zero)."""
+    if not total:
+        return Decimal("0")
+    return (Decimal(top_cnt) * 100 / Decimal(total)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
+
+def write_rows(path: Path, headers: List[str], rows: List[tuple]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f, lineterminator="\n")  # LF, like the committed dictionaries
+        w.writerow(headers)
+        w.writerows(rows)
+
+
+# -------------------------
+# Main
+# -------------------------
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(description="Value dictionaries from the CSVs in one pass (exact, then sketches).")
+    ap.add_argument("--source", choices=sorted(SOURCES), default="raw", help="raw_data/ or the cleaned CSVs")
+    ap.add_argument("--data-dir", type=Path, default=None, help="CSV folder (overrides --source)")
+    ap.add_argument("--schema", default=None, help="Schema label in file names / index (default raw or clean)")
+    ap.add_argument("--tables", nargs="+", default=None, help="Only these tables (CSV file stems)")
+    ap.add_argument("--exact-cap", type=int, default=EXACT_CAP, help="Distinct values counted exactly per column")
+    ap.add_argument("--top-k", type=int, default=TOP_K, help="Misra-Gries counters once a column is over the cap")
+    ap.add_argument("--cms-eps", type=float, default=CMS_EPS, help="Count-Min overcount bound, fraction of rows")
+    ap.add_argument("--cms-delta", type=float, default=CMS_DELTA, help="Count-Min failure probability")
+    ap.add_argument("--hll-p", type=int, default=HLL_P, help="HyperLogLog precision (2^p registers)")
+    ap.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS, help="CSV rows per chunk")
+    ap.add_argument("--out", type=Path, default=OUT_DIR, help="Output folder")
+    ap.add_argument("--summary", action="store_true", help="Print the per-file timing summary at the end")
+    return ap.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    if args.top_k < 1 or args.exact_cap < args.top_k:
+        print("ERROR: need 1 <= --top-k <= --exact-cap")
+        return 2
+    data_dir = args.data_dir or SOURCES[args.source]
+    schema = args.schema or SCHEMA_LABELS[args.source]
+    paths = sorted(p for p in data_dir.glob("*.csv") if p.is_file())
+    if args.tables:
+        paths = [p for p in paths if p.stem in set(args.tables)]
+    if not paths:
+        print(f"ERROR: no CSV files under {data_dir.as_posix()}")
+        return 2
+
+    run = RunLog("13_stream_tabledictionaries")
+    args.out.mkdir(parents=True, exist_ok=True)
+    index_rows: List[tuple] = []
+    sketch_rows: List[tuple] = []
+
+    for path in paths:
+        table = path.stem
+        cols = build_table(path, args, run)
+        for col, state in cols.items():
+            rows = state.rows()
+            headers = ["col_value", "cnt", "cnt_lower", "cnt_upper"] if state.sketched else ["col_value", "cnt"]
+            write_rows(args.out / f"{schema}__{table}__{col}__dict.csv", headers, rows)
+
+            distinct = state.distinct()
+            if state.total:  # build_index_sql returns no row for an empty table
+                top_value, top_cnt = rows[0][0], rows[0][1]
+                index_rows.append(
+                    (schema, table, col, state.total, distinct, state.nulls, state.blanks,
+                     top_value, top_cnt, top_pct(top_cnt, state.total))
+                )
+            sketch_rows.append(
+                (
+                    schema, table, col, "sketch" if state.sketched else "exact", state.total, distinct, len(rows),
+                    state.undercount if state.sketched else 0,
+                    state.cms.width if state.sketched else "",
+                    state.cms.depth if state.sketched else "",
+                    math.ceil(args.cms_eps * state.total) if state.sketched else 0,
+                )
+            )
+        sketched = [c for c, s in cols.items() if s.sketched]
+        print(
+            f"== {table}: {len(cols)} columns, {next(iter(cols.values())).total if cols else 0:,} rows"
+            + (f"; sketched: {', '.join(sketched)}" if sketched else "")
+        )
+
+    write_rows(args.out / "dictionary_index.csv", INDEX_HEADERS, index_rows)
+    write_rows(args.out / "sketch_index.csv", SKETCH_HEADERS, sketch_rows)
+    print(f"\nDone. {len(sketch_rows)} dictionaries -> {args.out.as_posix()}")
+    if args.summary:
+        run.print_summary()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
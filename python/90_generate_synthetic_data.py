@@ -0,0 +1,239 @@
+"""
+90_generate_synthetic_data.py
+
+Scale raw_data/ up N times for load / scorecard / cleaning benchmarks.
+
+How:
+- Every table is written as N copies of itself. In copy k every key column
+  (PK or FK, by raw column name) is shifted by k * span(domain), where span is
+  a power of 10 above the largest id seen for that key anywhere (e.g. OrderID
+  max 4,9xx -> span 10,000 -> copy 3 ids are 30,0xx..34,9xx).
+- Because parent and child are shifted by the same offset, every FK relationship
+  checked in sql/10_scorecard/05_fk_orphans.sql holds (and every raw orphan stays
+  an orphan); empty FKs stay empty, so NULL-FK rates (e.g. ~16% PurchaseOrderID
+  in inventory_transactions) are unchanged.
+- Non-key values are copied as-is: date formats, "1,288.00" amounts and value
+  distributions match the source exactly.
+- Byte format is kept per file: encoding (UTF-16 for customers/employees),
+  line terminator, which columns are quoted and whether empty fields are
+  (QUOTE_ALL style) or are not (customers/employees style).
+
+--fixed keeps small lookup tables at 1x (children then point at the original ids).
+
+Usage (from repo root):
+  python python/90_generate_synthetic_data.py --scale 10
+  python python/90_generate_synthetic_data.py --scale 100 --out synthetic_data/x100 --fixed payment_methods shipping_methods
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import re
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from csv_reader import sniff_encoding
+
+
+RAW_DIR = Path("raw_data")
+OUT_ROOT = Path("synthetic_data")
+
+# Raw key column -> owning table (domain). Other *ID columns get a domain of their own.
+KEY_DOMAINS = {
+    "CustomerID": "customers",
+    "EmployeeID": "employees",
+    "ShippingMethodID": "shipping_methods",
+    "OrderID": "orders",
+    "OrderDetailID": "order_details",
+    "ProductID": "products",
+    "PaymentID": "payments",
+    "PaymentMethodID": "payment_methods",
+    "SupplierID": "suppliers",
+    "PurchaseOrderID": "purchase_orders",
+    "TransactionID": "inventory_transactions",
+}
+
+INT_RE = re.compile(r"^(\d+)(\.0*)?$")  # "12" or "12.0" (suffix kept)
+
+WRITE_BUFFER = 1 << 20
+
+
+@dataclass
+class RawTable:
+    name: str
+    path: Path
+    encoding: str
+    newline: str
+    header: List[str]
+    header_quoted: List[bool]
+    quoted: List[bool]
+    quote_empty: bool
+    rows: List[List[str]]
+
+
+def camel_key_columns(header: List[str]) -> Dict[int, str]:
+    """column index -> key domain for every key-like column."""
+    out: Dict[int, str] = {}
+    for i, c in enumerate(header):
+        if c in KEY_DOMAINS:
+            out[i] = KEY_DOMAINS[c]
+        elif c.endswith("ID"):
+            out[i] = c
+    return out
+
+
+def quoted_fields(line: str) -> List[bool]:
+    """Per field of one raw CSV line: was it written in quotes?"""
+    flags: List[bool] = []
+    i, n = 0, len(line)
+    while i <= n:
+        if i < n and line[i] == '"':
+            flags.append(True)
+            i += 1
+            while i < n:
+                if line[i] == '"':
+                    if i + 1 < n and line[i + 1] == '"':
+                        i += 2
+                        continue
+                    break
+                i += 1
+            i += 1
+        else:
+            flags.append(False)
+        j = line.find(",", i)
+        if j < 0:
+            break
+        i = j + 1
+    return flags
+
+
+def read_raw_table(path: Path) -> RawTable:
+    enc = sniff_encoding(path)
+    with open(path, "r", encoding=enc, newline="") as f:
+        first = f.readline()
+        second = f.readline()
+    newline = "\r\n" if first.endswith("\r\n") else "\n"
+    header_quoted = quoted_fields(first.lstrip("\ufeff").rstrip("\r\n"))
+    data_quoted = quoted_fields(second.rstrip("\r\n")) if second else []
+
+    with open(path, "r", encoding=enc, newline="") as f:
+        reader = csv.reader(f)
+        header = [h.lstrip("\ufeff") for h in next(reader)]
+        rows = [r for r in reader if r]
+
+    quoted = [data_quoted[i] if i < len(data_quoted) else True for i in range(len(header))]
+    return RawTable(path.stem, path, enc, newline, header, header_quoted, quoted, all(quoted), rows)
+
+
+def domain_spans(tables: List[RawTable]) -> Dict[str, int]:
+    """Smallest power of 10 above the largest integer id per key domain."""
+    top: Dict[str, int] = {}
+    for t in tables:
+        for i, dom in camel_key_columns(t.header).items():
+            for r in t.rows:
+                m = INT_RE.match(r[i]) if i < len(r) else None
+                if m:
+                    top[dom] = max(top.get(dom, 0), int(m.group(1)))
+    return {dom: 10 ** len(str(v + 1)) for dom, v in top.items()}
+
+
+def fmt_field(v: str, quoted: bool, quote_empty: bool = True) -> str:
+    if v == "" and not quote_empty:
+        return v
+    if quoted or any(ch in v for ch in ',"\r\n'):
+        return '"' + v.replace('"', '""') + '"'
+    return v
+
+
+def write_scaled_table(
+    t: RawTable,
+    out_path: Path,
+    copies: int,
+    spans: Dict[str, int],
+    fixed_domains: Set[str],
+) -> int:
+    """
+    Rows are pre-rendered once into a template where only key fields vary
+    (so each extra copy costs one string format per row).
+    """
+    keys = {i: d for i, d in camel_key_columns(t.header).items() if d not in fixed_domains}
+
+    templates: List[str] = []
+    args: List[List[tuple]] = []  # per row: (base int, span) or (raw str, span) per key field
+    for r in t.rows:
+        parts: List[str] = []
+        row_args: List[tuple] = []
+        for i, v in enumerate(r):
+            q = t.quoted[i] if i < len(t.quoted) else True
+            if i in keys and v != "":
+                m = INT_RE.match(v)
+                suffix = (m.group(2) or "") if m else ""
+                lq = '"' if q else ""
+                parts.append(lq + "{}" + suffix + lq)
+                row_args.append((int(m.group(1)), spans[keys[i]]) if m else (v, 0))
+            else:
+                parts.append(fmt_field(v, q, t.quote_empty).replace("{", "{{").replace("}", "}}"))
+        templates.append(",".join(parts) + t.newline)
+        args.append(row_args)
+
+    header_line = ",".join(
+        fmt_field(h, t.header_quoted[i] if i < len(t.header_quoted) else True) for i, h in enumerate(t.header)
+    ) + t.newline
+
+    n = 0
+    with open(out_path, "w", encoding=t.encoding, newline="", buffering=WRITE_BUFFER) as f:
+        f.write(header_line)
+        for k in range(copies):
+            buf: List[str] = []
+            for tpl, row_args in zip(templates, args):
+                vals = [
+                    (base + k * span) if span else (base if k == 0 else f"{base}~{k}")
+                    for base, span in row_args
+                ]
+                buf.append(tpl.format(*vals))
+            f.write("".join(buf))
+            n += len(templates)
+    return n
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(description="Generate N-times-larger copies of raw_data/*.csv")
+    ap.add_argument("--scale", type=int, required=True, help="Copies of every table (1 = byte-equivalent of raw_data)")
+    ap.add_argument("--src", type=Path, default=RAW_DIR, help="Source folder (default: raw_data)")
+    ap.add_argument("--out", type=Path, default=None, help="Output folder (default: synthetic_data/x<scale>)")
+    ap.add_argument("--fixed", nargs="*", default=[], help="Tables kept at 1x (lookup tables, e.g. payment_methods)")
+    return ap.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    if args.scale < 1:
+        raise SystemExit("--scale must be >= 1")
+    out_dir = args.out or OUT_ROOT / f"x{args.scale}"
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    paths = sorted(p for p in args.src.glob("*.csv") if p.is_file())
+    if not paths:
+        raise SystemExit(f"No CSV files in: {args.src}")
+
+    t0 = time.perf_counter()
+    tables = [read_raw_table(p) for p in paths]
+    spans = domain_spans(tables)
+    fixed = set(args.fixed)
+
+    print(f"=== Synthetic data x{args.scale} -> {out_dir.as_posix()} ===")
+    total = 0
+    for t in tables:
+        copies = 1 if t.name in fixed else args.scale
+        n = write_scaled_table(t, out_dir / t.path.name, copies, spans, fixed)
+        total += n
+        print(f" - {t.name:<24} rows={n:>12,}  encoding={t.encoding}")
+    print(f"Total rows: {total:,}  ({time.perf_counter() - t0:.1f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
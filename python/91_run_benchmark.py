@@ -0,0 +1,198 @@
+"""
+91_run_benchmark.py
+
+End-to-end benchmark: run every pipeline stage at 1x / 10x / 100x data and
+record wall time, rows/sec and peak RSS per stage.
+
+- Data: scale 1 uses raw_data/; other scales are generated once with
+  90_generate_synthetic_data.py into synthetic_data/x<N>/ (--regen to rebuild).
+- Each stage runs as its own subprocess; peak RSS is that child's ru_maxrss
+  from os.wait4 (worker processes it spawns are not included). Linux carries
+  the parent's RSS over fork/exec into ru_maxrss, so this script stays
+  lightweight (stdlib only, no pandas). No os.wait4 (Windows): peak_rss_mb is
+  left empty.
+- rows = source rows of the dataset at that scale (same denominator for every
+  stage, so rows/sec is comparable across stages and scales).
+- DB stages run against a separate database (--bench-db, default underwear_bench),
+  because 01_load_raw_to_postgres.py drops and recreates its target database.
+- Stage outputs go under artifacts/benchmark/x<N>/ (the repo's artifacts and
+  cleaned_data are not touched); logs under artifacts/benchmark/logs/.
+- Results are appended to artifacts/benchmark/results.csv.
+
+Usage (from repo root):
+  python python/91_run_benchmark.py
+  python python/91_run_benchmark.py --scales 1 10 --stages describe clean
+  python python/91_run_benchmark.py --no-db
+"""
+
+from __future__ import annotations
+
+import argparse
+import codecs
+import csv
+import os
+import subprocess
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+
+RAW_DIR = Path("raw_data")
+SYNTH_ROOT = Path("synthetic_data")
+BENCH_DIR = Path("artifacts/benchmark")
+RESULTS_PATH = BENCH_DIR / "results.csv"
+
+DEFAULT_SCALES = [1, 10, 100]
+STAGES = ["load_raw", "scorecard", "score", "describe", "clean", "load_clean"]
+DB_STAGES = {"load_raw", "scorecard", "score", "load_clean"}  # score reads the scorecard export
+
+RESULT_FIELDS = [
+    "run_id", "run_at", "scale", "stage", "status", "returncode",
+    "wall_s", "rows", "rows_per_s", "peak_rss_mb", "data_dir",
+]
+
+
+def stage_command(stage: str, data_dir: Path, work_dir: Path) -> List[str]:
+    py = sys.executable
+    cleaned = work_dir / "cleaned_data"
+    return {
+        "load_raw": [py, "python/01_load_raw_to_postgres.py", "--raw-dir", str(data_dir)],
+        "scorecard": [py, "python/02_generate_scorecard.py", "--out-dir", str(work_dir)],
+        "score": [
+            py, "python/03_add_score_to_scorecard.py",
+            "--src", str(work_dir / "scorecard.csv"), "--dst", str(work_dir / "scorecard_100.csv"),
+        ],
+        "describe": [py, "python/04_generate_describe_csv.py", "--input", str(data_dir), "--out", str(work_dir / "tablestats")],
+        "clean": [
+            py, "extra-i-cleaning/python/01_cleaning.py", "--no-info",
+            "--raw-dir", str(data_dir), "--out-dir", str(cleaned), "--artifact-dir", str(work_dir),
+        ],
+        "load_clean": [
+            py, "extra-ii-querying/python/01_load_cleaned_to_postgres.py",
+            "--cleaned-dir", str(cleaned), "--report", str(work_dir / "cleaning_report.csv"),
+        ],
+    }[stage]
+
+
+def count_rows(data_dir: Path) -> int:
+    """Data rows over all CSVs (physical lines - header; raw files have no embedded newlines)."""
+    total = 0
+    for p in sorted(data_dir.glob("*.csv")):
+        with open(p, "rb") as f:
+            bom = f.read(2)
+        if bom in (codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE):
+            with open(p, "r", encoding="utf-16", newline="") as f:
+                total += max(0, sum(1 for _ in f) - 1)
+        else:
+            with open(p, "rb") as f:
+                lines = sum(block.count(b"\n") for block in iter(lambda: f.read(1 << 20), b""))
+            total += max(0, lines - 1)
+    return total
+
+
+def ensure_data(scale: int, regen: bool) -> Path:
+    if scale == 1:
+        return RAW_DIR
+    out = SYNTH_ROOT / f"x{scale}"
+    if regen or not any(out.glob("*.csv")):
+        subprocess.run(
+            [sys.executable, "python/90_generate_synthetic_data.py", "--scale", str(scale), "--out", str(out)],
+            check=True,
+        )
+    return out
+
+
+def run_measured(cmd: List[str], env: Dict[str, str], log_path: Path) -> Tuple[int, float, Optional[float]]:
+    """Run one stage; returns (returncode, wall seconds, child peak RSS in MB or None without os.wait4)."""
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(log_path, "w", encoding="utf-8") as log:
+        t0 = time.perf_counter()
+        proc = subprocess.Popen(cmd, stdout=log, stderr=subprocess.STDOUT, env=env)
+        if not hasattr(os, "wait4"):  # Windows
+            proc.wait()
+            return proc.returncode, time.perf_counter() - t0, None
+        _, status, usage = os.wait4(proc.pid, 0)
+        wall = time.perf_counter() - t0
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    # ru_maxrss: bytes on macOS, KB on Linux
+    rss_mb = usage.ru_maxrss / (1024 * 1024) if sys.platform == "darwin" else usage.ru_maxrss / 1024
+    return proc.returncode, wall, rss_mb
+
+
+def append_results(rows: List[dict], path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    new_file = not path.exists()
+    with open(path, "a", encoding="utf-8", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+        if new_file:
+            w.writeheader()
+        w.writerows(rows)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(description="Benchmark every pipeline stage at several data scales")
+    ap.add_argument("--scales", type=int, nargs="+", default=DEFAULT_SCALES, help="Data scales (default: 1 10 100)")
+    ap.add_argument("--stages", nargs="+", default=STAGES, choices=STAGES, help="Stages to run (in pipeline order)")
+    ap.add_argument("--no-db", action="store_true", help="Skip stages that need Postgres")
+    ap.add_argument("--bench-db", default="underwear_bench", help="Database used (and recreated) by DB stages")
+    ap.add_argument("--regen", action="store_true", help="Regenerate synthetic data even if present")
+    ap.add_argument("--results", type=Path, default=RESULTS_PATH, help="Results CSV (appended)")
+    return ap.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    stages = [s for s in STAGES if s in args.stages and not (args.no_db and s in DB_STAGES)]
+    if not args.no_db and "score" in stages and "scorecard" not in stages:
+        print("[WARN] score without scorecard reads a previous benchmark scorecard.csv")
+
+    env = dict(os.environ)
+    env["PGDATABASE"] = args.bench_db  # pgdb.py target
+    env["PGDB"] = args.bench_db  # legacy alias: would conflict with a PGDB left in .env
+    env.pop("DATABASE_URL", None)
+
+    run_id = uuid.uuid4().hex[:8]
+    run_at = time.strftime("%Y-%m-%dT%H:%M:%S")
+    results: List[dict] = []
+    failed = False
+
+    print(f"=== Benchmark run {run_id}: scales={args.scales} stages={stages} ===")
+    for scale in args.scales:
+        data_dir = ensure_data(scale, args.regen)
+        rows = count_rows(data_dir)
+        work_dir = BENCH_DIR / f"x{scale}"
+        work_dir.mkdir(parents=True, exist_ok=True)
+        print(f"\n--- x{scale}: {data_dir.as_posix()} ({rows:,} rows)")
+
+        for stage in stages:
+            cmd = stage_command(stage, data_dir, work_dir)
+            rc, wall, rss_mb = run_measured(cmd, env, BENCH_DIR / "logs" / f"x{scale}_{stage}.log")
+            status = "ok" if rc == 0 else "failed"
+            failed |= rc != 0
+            results.append(
+                {
+                    "run_id": run_id,
+                    "run_at": run_at,
+                    "scale": scale,
+                    "stage": stage,
+                    "status": status,
+                    "returncode": rc,
+                    "wall_s": round(wall, 3),
+                    "rows": rows,
+                    "rows_per_s": round(rows / wall, 1) if wall > 0 else "",
+                    "peak_rss_mb": round(rss_mb, 1) if rss_mb is not None else "",
+                    "data_dir": data_dir.as_posix(),
+                }
+            )
+            rss_txt = f"{rss_mb:7.1f} MB" if rss_mb is not None else "    n/a"
+            print(f"  {stage:<11} {status:<6} wall={wall:8.2f}s  rows/s={rows / wall if wall else 0:>12,.0f}  peak_rss={rss_txt}")
+
+    append_results(results, args.results)
+    print(f"\nResults appended to: {args.results.as_posix()}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,453 @@
+"""
+cli.py
+
+One entry point for the pipeline steps, cheap to start.
+
+  python python/cli.py <command> [script args ...]
+
+Commands (the arguments after the command go to the script unchanged; `<command> --help` shows them):
+  load-raw     python/01_load_raw_to_postgres.py
+  scorecard    python/02_generate_scorecard.py
+  score        python/03_add_score_to_scorecard.py
+  describe     python/04_generate_describe_csv.py
+  dict         python/05_generate_tabledictionaries.py
+  clean        extra-i-cleaning/python/01_cleaning.py
+  load-clean   extra-ii-querying/python/01_load_cleaned_to_postgres.py
+
+Lazy imports:
+- This file imports the stdlib only. A command imports its own script (and, through it,
+  pandas / psycopg / SQLAlchemy) when it runs, so `score` never loads pandas and
+  `cli.py --help` loads nothing at all.
+- The script's main(argv) runs in this process: one interpreter start instead of one per step.
+
+Warm worker (optional):
+  python python/cli.py serve --detach     # start it in the background
+  python python/cli.py scorecard          # now runs inside the worker
+  python python/cli.py status | stop
+- The worker imports every step module (plus pandas / numpy / SQLAlchemy) once, keeps the
+  SQLAlchemy engines of pgdb.sqlalchemy_engine() and parks psycopg connections between
+  commands (pgdb.reuse_connections), so a re-run pays neither imports nor connection setup.
+- While artifacts/cli/worker.json names a live worker, every command is sent to it with the
+  caller's cwd, environment and arguments; its stdout / stderr and exit code come back.
+  `--local` (before the command) runs in-process anyway. An unreachable worker is ignored.
+- Commands run one at a time (cwd / env / stdout are per process). A step script that changed
+  on disk is reloaded; changes to the shared helpers (pgdb, instrument, csv_reader) need a
+  `stop` + `serve`.
+- The worker listens on 127.0.0.1 only; clients authenticate with the random key stored in
+  worker.json (readable by the owner only).
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PY_DIR = os.path.join(REPO_ROOT, "python")
+WORKER_STATE = os.path.join(REPO_ROOT, "artifacts", "cli", "worker.json")
+WORKER_LOG = os.path.join(REPO_ROOT, "artifacts", "cli", "worker.log")
+
+# command -> (script, one-line help); scripts are repo-relative
+COMMANDS = {
+    "load-raw": ("python/01_load_raw_to_postgres.py", "Rebuild the database, load raw_data/*.csv, create stg views"),
+    "scorecard": ("python/02_generate_scorecard.py", "Run the scorecard SQL pack, export artifacts/scorecard.csv"),
+    "score": ("python/03_add_score_to_scorecard.py", "Add dq_score_0_100 -> artifacts/scorecard_100.csv"),
+    "describe": ("python/04_generate_describe_csv.py", "describe() stats per CSV -> artifacts/tablestats/"),
+    "dict": ("python/05_generate_tabledictionaries.py", "Value dictionaries -> artifacts/tabledictionaries/"),
+    "clean": ("extra-i-cleaning/python/01_cleaning.py", "Clean raw_data/*.csv -> extra-i-cleaning/cleaned_data/"),
+    "load-clean": ("extra-ii-querying/python/01_load_cleaned_to_postgres.py", "Load cleaned CSVs into clean.*"),
+}
+
+# commands that drop / recreate the target database: parked connections would block them
+DROPS_DATABASE = {"load-raw"}
+
+WARM_IMPORTS = ["numpy", "pandas", "psycopg", "sqlalchemy"]
+
+_LOADED = {}  # module name -> script mtime at import
+
+
+def usage() -> str:
+    lines = [
+        "usage: python python/cli.py [--local] <command> [args ...]",
+        "       python python/cli.py serve [--detach] [--port N] [--max-idle N] [--no-preload]",
+        "       python python/cli.py status | stop",
+        "",
+        "commands:",
+    ]
+    lines += [f"  {name:<11} {text}" for name, (_, text) in COMMANDS.items()]
+    return "\n".join(lines)
+
+
+# -------------------------
+# In-process run (lazy import of the step module)
+# -------------------------
+def load_step(name: str):
+    """Import the script of a command as a module (by file stem, so worker processes can re-import it)."""
+    import importlib
+
+    script = os.path.join(REPO_ROOT, COMMANDS[name][0])
+    folder = os.path.dirname(script)
+    stem = os.path.splitext(os.path.basename(script))[0]
+    for path in (folder, PY_DIR):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+
+    mtime = os.stat(script).st_mtime_ns
+    mod = sys.modules.get(stem)
+    if mod is None:
+        mod = importlib.import_module(stem)
+    elif _LOADED.get(stem) != mtime:
+        mod = importlib.reload(mod)
+    _LOADED[stem] = mtime
+    return mod
+
+
+def exit_code(code) -> int:
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code
+    print(code, file=sys.stderr)
+    return 1
+
+
+def run_local(name: str, args: list) -> int:
+    mod = load_step(name)
+    saved_argv = sys.argv
+    sys.argv = [COMMANDS[name][0], *args]
+    try:
+        return exit_code(mod.main(list(args)))
+    except SystemExit as e:
+        return exit_code(e.code)
+    finally:
+        sys.argv = saved_argv
+
+
+# -------------------------
+# Worker state
+# -------------------------
+def read_state():
+    import json
+
+    try:
+        with open(WORKER_STATE, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_state(state: dict) -> None:
+    import json
+
+    os.makedirs(os.path.dirname(WORKER_STATE), exist_ok=True)
+    tmp = WORKER_STATE + ".tmp"
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp, WORKER_STATE)
+
+
+def remove_state(pid: int) -> None:
+    state = read_state()
+    if state and state.get("pid") == pid:
+        try:
+            os.remove(WORKER_STATE)
+        except OSError:
+            pass
+
+
+def worker_client(state: dict):
+    """Connection to the worker, or None when it is not reachable (stale worker.json)."""
+    from multiprocessing.connection import AuthenticationError, Client
+
+    try:
+        return Client(("127.0.0.1", int(state["port"])), authkey=bytes.fromhex(state["authkey"]))
+    except (OSError, AuthenticationError, KeyError, ValueError):
+        return None
+
+
+# -------------------------
+# Client side
+# -------------------------
+def run_remote(conn, name: str, args: list) -> int:
+    conn.send({"op": "run", "cmd": name, "args": list(args), "cwd": os.getcwd(), "env": dict(os.environ)})
+    while True:
+        try:
+            kind, payload = conn.recv()
+        except EOFError:
+            print("[cli] worker closed the connection (see artifacts/cli/worker.log)", file=sys.stderr)
+            return 1
+        if kind == "out":
+            sys.stdout.write(payload)
+            sys.stdout.flush()
+        elif kind == "err":
+            sys.stderr.write(payload)
+            sys.stderr.flush()
+        elif kind == "rc":
+            return int(payload)
+
+
+def cmd_status() -> int:
+    state = read_state()
+    conn = worker_client(state) if state else None
+    if conn is None:
+        print("worker: not running")
+        return 1
+    with conn:
+        conn.send({"op": "status"})
+        info = conn.recv()
+    print(f"worker: pid {info['pid']} on 127.0.0.1:{state['port']}, up {info['uptime_s']:.0f}s")
+    print(f"  commands served: {info['served']}  parked connections: {info['idle_connections']}")
+    print(f"  step modules: {', '.join(info['modules']) or '-'}")
+    return 0
+
+
+def cmd_stop() -> int:
+    state = read_state()
+    conn = worker_client(state) if state else None
+    if conn is None:
+        print("worker: not running")
+        if state:
+            remove_state(state.get("pid"))
+        return 0
+    with conn:
+        conn.send({"op": "stop"})
+        conn.recv()
+    print(f"worker: stopped (pid {state['pid']})")
+    return 0
+
+
+# -------------------------
+# Worker side
+# -------------------------
+class _Stream:
+    """File-like object that forwards writes to the client; a gone client is ignored."""
+
+    def __init__(self, conn, kind: str) -> None:
+        self.conn = conn
+        self.kind = kind
+        self.alive = True
+
+    def write(self, text: str) -> int:
+        if text and self.alive:
+            try:
+                self.conn.send((self.kind, text))
+            except OSError:
+                self.alive = False
+        return len(text)
+
+    def flush(self) -> None:
+        pass
+
+    def isatty(self) -> bool:
+        return False
+
+
+def serve_one(conn, msg: dict) -> int:
+    """Run one command with the client's cwd / env / argv; output goes back over `conn`."""
+    import contextlib
+    import traceback
+
+    name = msg["cmd"]
+    saved_cwd = os.getcwd()
+    saved_env = dict(os.environ)
+    out, err = _Stream(conn, "out"), _Stream(conn, "err")
+    rc = 1
+    try:
+        os.chdir(msg["cwd"])
+        os.environ.clear()
+        os.environ.update(msg["env"])
+        pgdb = sys.modules.get("pgdb")
+        if pgdb is not None:
+            pgdb.clear_config_cache()  # PG* / .env may differ from the previous caller
+            if name in DROPS_DATABASE:
+                pgdb.close_idle_connections()
+                pgdb.dispose_engines()
+        with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+            try:
+                rc = run_local(name, msg["args"])
+            except Exception:
+                traceback.print_exc()
+                rc = 1
+    finally:
+        os.chdir(saved_cwd)
+        os.environ.clear()
+        os.environ.update(saved_env)
+    return rc
+
+
+def preload(max_idle: int) -> None:
+    import importlib
+
+    for mod in WARM_IMPORTS:
+        try:
+            importlib.import_module(mod)
+        except ImportError:
+            pass
+    for name in COMMANDS:
+        try:
+            load_step(name)
+        except (ImportError, SystemExit) as e:
+            print(f"[worker] {name}: not preloaded ({e})", flush=True)
+    import pgdb
+
+    pgdb.reuse_connections(max_idle)
+
+
+def cmd_serve(argv: list) -> int:
+    import argparse
+
+    ap = argparse.ArgumentParser(prog="cli.py serve", description="Keep modules and DB connections warm")
+    ap.add_argument("--port", type=int, default=0, help="TCP port on 127.0.0.1 (0 = any free port)")
+    ap.add_argument("--max-idle", type=int, default=4, help="Parked psycopg connections per conninfo (0 = none)")
+    ap.add_argument("--no-preload", action="store_true", help="Import step modules on first use instead of at start")
+    ap.add_argument("--detach", action="store_true", help="Start the worker in the background and return")
+    args = ap.parse_args(argv)
+
+    state = read_state()
+    if state and worker_client(state) is not None:
+        print(f"worker: already running (pid {state['pid']}, port {state['port']})")
+        return 0
+
+    if args.detach:
+        return detach([a for a in argv if a != "--detach"])
+
+    import secrets
+    import time
+    from multiprocessing.connection import AuthenticationError, Listener
+
+    started = time.time()
+    if args.no_preload:
+        sys.path.insert(0, PY_DIR)
+        import pgdb
+
+        pgdb.reuse_connections(args.max_idle)
+    else:
+        preload(args.max_idle)
+
+    authkey = secrets.token_bytes(32)
+    listener = Listener(("127.0.0.1", args.port), authkey=authkey)
+    port = listener.address[1]
+    pid = os.getpid()
+    write_state({"pid": pid, "port": port, "authkey": authkey.hex(), "started_at": started})
+    print(f"[worker] pid {pid} listening on 127.0.0.1:{port} (ready in {time.time() - started:.2f}s)", flush=True)
+
+    served = 0
+    try:
+        while True:
+            try:
+                conn = listener.accept()
+            except (AuthenticationError, OSError):
+                continue
+            with conn:
+                try:
+                    msg = conn.recv()
+                except (EOFError, OSError):
+                    continue
+                op = msg.get("op")
+                if op == "stop":
+                    conn.send("bye")
+                    break
+                if op == "status":
+                    import pgdb
+
+                    conn.send({
+                        "pid": pid,
+                        "uptime_s": time.time() - started,
+                        "served": served,
+                        "idle_connections": pgdb.idle_connection_count(),
+                        "modules": sorted(_LOADED),
+                    })
+                    continue
+                if op == "run" and msg.get("cmd") in COMMANDS:
+                    t0 = time.perf_counter()
+                    rc = serve_one(conn, msg)
+                    served += 1
+                    print(f"[worker] {msg['cmd']} {' '.join(msg['args'])} -> rc={rc} ({time.perf_counter() - t0:.2f}s)", flush=True)
+                    try:
+                        conn.send(("rc", rc))
+                    except OSError:
+                        pass
+    except KeyboardInterrupt:
+        pass
+    finally:
+        listener.close()
+        remove_state(pid)
+        pgdb = sys.modules.get("pgdb")
+        if pgdb is not None:
+            pgdb.close_idle_connections()
+            pgdb.dispose_engines()
+    print("[worker] stopped", flush=True)
+    return 0
+
+
+def detach(serve_argv: list) -> int:
+    import subprocess
+    import time
+
+    os.makedirs(os.path.dirname(WORKER_LOG), exist_ok=True)
+    kwargs = {}
+    if os.name == "nt":
+        kwargs["creationflags"] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        kwargs["start_new_session"] = True
+    with open(WORKER_LOG, "a", encoding="utf-8") as log:
+        proc = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "serve", *serve_argv],
+            stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT, cwd=REPO_ROOT, **kwargs,
+        )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        state = read_state()
+        if state and state.get("pid") == proc.pid:
+            print(f"worker: started (pid {proc.pid}, port {state['port']}); log: artifacts/cli/worker.log")
+            return 0
+        if proc.poll() is not None:
+            break
+        time.sleep(0.05)
+    print("worker: did not start, see artifacts/cli/worker.log", file=sys.stderr)
+    return 1
+
+
+# -------------------------
+# Main
+# -------------------------
+def main(argv=None) -> int:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    local = False
+    while argv and argv[0].startswith("-"):
+        flag = argv.pop(0)
+        if flag in ("-h", "--help"):
+            print(usage())
+            return 0
+        if flag == "--local":
+            local = True
+            continue
+        print(f"unknown option: {flag}\n\n{usage()}", file=sys.stderr)
+        return 2
+    if not argv:
+        print(usage(), file=sys.stderr)
+        return 2
+
+    name, args = argv[0], argv[1:]
+    if name == "serve":
+        return cmd_serve(args)
+    if name == "status":
+        return cmd_status()
+    if name == "stop":
+        return cmd_stop()
+    if name not in COMMANDS:
+        print(f"unknown command: {name}\n\n{usage()}", file=sys.stderr)
+        return 2
+
+    if not local and os.path.exists(WORKER_STATE):
+        state = read_state()
+        conn = worker_client(state) if state else None
+        if conn is not None:
+            with conn:
+                return run_remote(conn, name, args)
+    return run_local(name, args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
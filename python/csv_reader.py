@@ -0,0 +1,383 @@
+"""
+csv_reader.py
+
+Shared raw-CSV reader (used by 04_generate_describe_csv.py and extra-i-cleaning/python/01_cleaning.py).
+
+- Encoding is settled once, up front: BOM first, else the first candidate that
+  decodes a bounded prefix. No "try a full parse per encoding" loop.
+- Non UTF-8 sources (UTF-16 from Kaggle: customers/employees) are transcoded to
+  UTF-8 in a stream, block by block, so the parser only ever sees UTF-8.
+- Parsing uses pyarrow's multithreaded CSV reader when pyarrow is installed
+  (explicit column types for columns the caller pins), else the pandas C parser.
+
+- Chunked reading (read_csv_chunks) gives every chunk the dtypes read_csv_fast gives the
+  whole file: a first streaming pass (scan_csv) settles the column types for the whole
+  file, so a column's type never depends on which rows a chunk happened to hold.
+
+Usage:
+  from csv_reader import read_csv_fast
+  df, enc = read_csv_fast(Path("raw_data/customers.csv"), string_columns=lambda c: c.endswith("Date"))
+
+  scan = scan_csv(path, string_columns=is_date)
+  for chunk in read_csv_chunks(path, 200_000, scan=scan):
+      ...
+"""
+
+from __future__ import annotations
+
+import io
+import codecs
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+ENCODING_CANDIDATES = ["utf-8", "utf-8-sig", "cp1252", "latin1"]
+
+# Bytes decoded to settle the encoding (no full pass)
+ENCODING_PROBE_BYTES = 1 << 20
+
+# Transcoding / pyarrow block size
+BLOCK_SIZE = 1 << 22
+
+# Rows per chunk of scan_csv's pass when pyarrow is not installed
+SCAN_CHUNK_ROWS = 200_000
+
+# Same tokens pandas treats as NULL by default (so both engines agree)
+NULL_VALUES = [
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan",
+    "1.#IND", "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+]
+
+
+# -------------------------
+# Encoding
+# -------------------------
+def detect_encoding_by_bom(csv_path: Path) -> Optional[str]:
+    with open(csv_path, "rb") as f:
+        first4 = f.read(4)
+
+    if first4.startswith(b"\xef\xbb\xbf"):
+        return "utf-8-sig"
+    if first4.startswith(b"\xff\xfe\x00\x00") or first4.startswith(b"\x00\x00\xfe\xff"):
+        return "utf-32"
+    if first4.startswith(b"\xff\xfe") or first4.startswith(b"\xfe\xff"):
+        return "utf-16"
+    return None
+
+
+def sniff_encoding(
+    csv_path: Path,
+    probe_bytes: int = ENCODING_PROBE_BYTES,
+    candidates: Optional[List[str]] = None,
+) -> str:
+    """
+    BOM first, else the first candidate that decodes a bounded prefix.
+    Note: latin1 decodes anything, so it is the natural last resort.
+    """
+    enc = detect_encoding_by_bom(csv_path)
+    if enc:
+        return enc
+
+    with open(csv_path, "rb") as f:
+        head = f.read(probe_bytes)
+    for e in candidates or ENCODING_CANDIDATES:
+        try:
+            # incremental decoder: a multi-byte char cut at the probe edge is not an error
+            codecs.getincrementaldecoder(e)().decode(head, final=False)
+            return e
+        except UnicodeDecodeError:
+            continue
+    return (candidates or ENCODING_CANDIDATES)[-1]
+
+
+class Utf8Transcoder(io.RawIOBase):
+    """
+    Read-only binary stream: decodes `raw` with `encoding` block by block and
+    yields UTF-8 bytes (BOM dropped). Memory is bounded by one block.
+    """
+
+    def __init__(self, raw: BinaryIO, encoding: str, block_size: int = BLOCK_SIZE):
+        super().__init__()
+        self._raw = raw
+        self._decoder = codecs.getincrementaldecoder(encoding)()
+        self._block_size = block_size
+        self._buf = b""
+        self._eof = False
+        self._first = True
+
+    def readable(self) -> bool:
+        return True
+
+    def _fill(self) -> None:
+        while not self._buf and not self._eof:
+            block = self._raw.read(self._block_size)
+            self._eof = not block
+            text = self._decoder.decode(block, final=self._eof)
+            if self._first and text:
+                text = text.lstrip("\ufeff")
+                self._first = False
+            self._buf = text.encode("utf-8")
+
+    def readinto(self, b) -> int:
+        self._fill()
+        n = min(len(b), len(self._buf))
+        b[:n] = self._buf[:n]
+        self._buf = self._buf[n:]
+        return n
+
+    def close(self) -> None:
+        try:
+            self._raw.close()
+        finally:
+            super().close()
+
+
+def open_utf8(csv_path: Path, encoding: str) -> BinaryIO:
+    """Binary UTF-8 stream over the file: plain file for utf-8, streaming transcoder otherwise."""
+    raw = open(csv_path, "rb")
+    name = codecs.lookup(encoding).name
+    if name == "utf-8":
+        return raw
+    if name == "utf-8-sig":
+        if raw.read(3) != codecs.BOM_UTF8:
+            raw.seek(0)
+        return raw
+    return io.BufferedReader(Utf8Transcoder(raw, encoding), buffer_size=BLOCK_SIZE)
+
+
+def read_header(csv_path: Path, encoding: str) -> List[str]:
+    import csv
+
+    with open(csv_path, "r", encoding=encoding, newline="") as f:
+        return next(csv.reader(f), [])
+
+
+# -------------------------
+# Parsing
+# -------------------------
+def _pyarrow_csv():
+    try:
+        import pyarrow as pa
+        import pyarrow.csv as pacsv
+    except ImportError:
+        return None, None
+    return pa, pacsv
+
+
+def read_csv_fast(
+    csv_path: Path,
+    *,
+    encoding: Optional[str] = None,
+    column_types: Optional[Dict[str, str]] = None,
+    string_columns: Optional[Callable[[str], bool]] = None,
+    use_pyarrow: bool = True,
+) -> Tuple[pd.DataFrame, str]:
+    """
+    Read one CSV in a single pass.
+    - encoding: sniffed (sniff_encoding) when not given
+    - column_types: explicit {column: "string"|"int64"|"float64"|"bool"}
+    - string_columns: predicate; matching columns are read as text (e.g. *Date,
+      so the parser never guesses dates on our behalf)
+    Other columns are type-inferred. Returns (df, encoding).
+    """
+    enc = encoding or sniff_encoding(csv_path)
+    header = read_header(csv_path, enc)
+
+    types: Dict[str, str] = {}
+    if string_columns is not None:
+        types.update({c: "string" for c in header if string_columns(c)})
+    types.update(column_types or {})
+
+    pa, pacsv = _pyarrow_csv() if use_pyarrow else (None, None)
+    if pa is None:
+        df = pd.read_csv(
+            csv_path,
+            encoding=enc,
+            low_memory=False,
+            dtype={c: (str if t == "string" else t) for c, t in types.items()} or None,
+        )
+        return df, enc
+
+    with open_utf8(csv_path, enc) as stream:
+        table = pacsv.read_csv(
+            stream,
+            read_options=pacsv.ReadOptions(use_threads=True, block_size=BLOCK_SIZE),
+            convert_options=_convert_options(pacsv, {c: pa.type_for_alias(t) for c, t in types.items()}),
+        )
+    return table.to_pandas(), enc
+
+
+def _convert_options(pacsv, column_types: Dict[str, Any]):
+    return pacsv.ConvertOptions(
+        column_types=column_types,
+        null_values=NULL_VALUES,
+        strings_can_be_null=True,
+        quoted_strings_can_be_null=True,
+    )
+
+
+# -------------------------
+# Chunked reading (same dtypes as read_csv_fast on the whole file)
+# -------------------------
+@dataclass
+class CsvScan:
+    """Result of scan_csv: whole-file column types (+ value counts of the columns asked for)."""
+
+    path: Path
+    encoding: str
+    engine: str  # "pyarrow" | "pandas" (the engine read_csv_fast would use)
+    types: Dict[str, Any]  # pyarrow DataType, or numpy dtype for the pandas engine
+    nullable: Set[str] = field(default_factory=set)  # columns holding at least one NULL
+    value_counts: Dict[str, pd.Series] = field(default_factory=dict)
+
+
+# Arrow infers null -> int64 -> bool -> date32 -> time32 -> timestamp[s] -> timestamp[ns] -> double -> string
+# and widens a column while reading; these are the widenings between two blocks' types.
+_ARROW_TEMPORAL_RANK = {"date32[day]": 0, "timestamp[s]": 1, "timestamp[ns]": 2}
+
+
+def _widen_arrow(pa, a, b):
+    if a == b or pa.types.is_null(b):
+        return a
+    if pa.types.is_null(a):
+        return b
+    names = {str(a), str(b)}
+    if names == {"int64", "double"}:
+        return pa.float64()
+    if names <= set(_ARROW_TEMPORAL_RANK):
+        return max(a, b, key=lambda t: _ARROW_TEMPORAL_RANK[str(t)])
+    # anything else (e.g. int64 + bool: arrow would pick bool only when every int is 0/1)
+    return pa.string()
+
+
+def _widen_pandas(a, b):
+    """pandas: an int column with a NULL in any chunk is float64; mixed kinds are text."""
+    if a == b:
+        return a
+    if {a.kind, b.kind} <= {"i", "f"}:
+        return np.dtype("float64")
+    return np.dtype(object)
+
+
+def _add_counts(acc: Dict[str, pd.Series], name: str, counts: pd.Series) -> None:
+    prev = acc.get(name)
+    acc[name] = counts if prev is None else prev.add(counts, fill_value=0).astype("int64")
+
+
+def scan_csv(
+    csv_path: Path,
+    *,
+    encoding: Optional[str] = None,
+    string_columns: Optional[Callable[[str], bool]] = None,
+    count_values: Optional[Callable[[str], bool]] = None,
+    use_pyarrow: bool = True,
+) -> CsvScan:
+    """
+    One streaming pass (memory: one block) that settles what read_csv_fast would infer
+    for the whole file: each block is type-inferred with the same parser and options,
+    and the block types are widened the way the whole-file read widens them.
+    count_values: predicate; matching columns get their non-NULL value counts
+    (e.g. date columns, so a format can be chosen on the whole column up front).
+    """
+    enc = encoding or sniff_encoding(csv_path)
+    header = read_header(csv_path, enc)
+    forced = {c for c in header if string_columns is not None and string_columns(c)}
+    counted = [c for c in header if count_values is not None and count_values(c)]
+    pa, pacsv = _pyarrow_csv() if use_pyarrow else (None, None)
+    scan = CsvScan(Path(csv_path), enc, "pandas" if pa is None else "pyarrow", {})
+
+    if pa is None:
+        reader = pd.read_csv(
+            csv_path, encoding=enc, low_memory=False, chunksize=SCAN_CHUNK_ROWS,
+            dtype={c: str for c in forced} or None,
+        )
+        for chunk in reader:
+            for c in header:
+                scan.types[c] = _widen_pandas(scan.types[c], chunk[c].dtype) if c in scan.types else chunk[c].dtype
+            for c in counted:
+                _add_counts(scan.value_counts, c, chunk[c].value_counts())
+        scan.types = {c: (np.dtype(object) if c in forced else t) for c, t in scan.types.items()}
+        return scan
+
+    import pyarrow.compute as pc
+
+    as_text = _convert_options(pacsv, {c: pa.string() for c in header})
+    infer = _convert_options(pacsv, {c: pa.string() for c in forced})
+    scan.types = {c: pa.null() for c in header}
+    with open_utf8(csv_path, enc) as stream:
+        reader = pacsv.open_csv(
+            stream,
+            read_options=pacsv.ReadOptions(use_threads=True, block_size=BLOCK_SIZE),
+            convert_options=as_text,
+        )
+        for batch in reader:
+            # the block's own inference: its text re-parsed with read_csv_fast's options
+            buf = io.BytesIO()
+            pacsv.write_csv(batch, buf)
+            buf.seek(0)
+            block = pacsv.read_csv(buf, convert_options=infer)
+            for c, t in zip(block.column_names, block.schema.types):
+                scan.types[c] = _widen_arrow(pa, scan.types[c], t)
+            for c in header:
+                if batch.column(c).null_count:
+                    scan.nullable.add(c)
+            for c in counted:
+                vc = pc.value_counts(batch.column(c).drop_null())
+                counts = pd.Series(
+                    vc.field("counts").to_numpy(zero_copy_only=False).astype("int64"),
+                    index=pd.Index(vc.field("values").to_pylist(), dtype=object),
+                )
+                _add_counts(scan.value_counts, c, counts)
+    return scan
+
+
+def read_csv_chunks(csv_path: Path, chunksize: int, *, scan: Optional[CsvScan] = None) -> Iterator[pd.DataFrame]:
+    """
+    `chunksize`-row DataFrames whose dtypes (and so their CSV text) match what
+    read_csv_fast gives the whole file; scan: a scan_csv result for this file
+    (pass it to reuse the string_columns / value counts of that pass).
+    """
+    scan = scan or scan_csv(csv_path)
+    if scan.engine == "pandas":
+        dtypes = {c: (str if t == np.dtype(object) else t) for c, t in scan.types.items()}
+        yield from pd.read_csv(csv_path, encoding=scan.encoding, dtype=dtypes, chunksize=chunksize)
+        return
+
+    pa, pacsv = _pyarrow_csv()
+    # whole-file to_pandas: an int / bool column with a NULL anywhere is float64 / object
+    widen = {}
+    for c, t in scan.types.items():
+        if c in scan.nullable and pa.types.is_integer(t):
+            widen[c] = "float64"
+        elif c in scan.nullable and pa.types.is_boolean(t):
+            widen[c] = object
+
+    def to_frame(batches: list) -> pd.DataFrame:
+        df = pa.Table.from_batches(batches).to_pandas()
+        for c, dt in widen.items():
+            if df[c].dtype != dt:
+                df[c] = df[c].astype(dt)
+        return df
+
+    with open_utf8(csv_path, scan.encoding) as stream:
+        reader = pacsv.open_csv(
+            stream,
+            read_options=pacsv.ReadOptions(use_threads=True, block_size=BLOCK_SIZE),
+            convert_options=_convert_options(pacsv, dict(scan.types)),
+        )
+        pending: list = []
+        rows = 0
+        for batch in reader:
+            pending.append(batch)
+            rows += batch.num_rows
+            while rows >= chunksize:
+                table = pa.Table.from_batches(pending)
+                yield to_frame(table.slice(0, chunksize).to_batches())
+                pending = table.slice(chunksize).to_batches()
+                rows -= chunksize
+        if rows:
+            yield to_frame(pending)
@@ -0,0 +1,303 @@
+"""
+instrument.py
+
+Shared per-stage instrumentation (stdlib only).
+
+Each `with run.stage(...)` block records one JSON line:
+- wall / CPU seconds, rows, bytes read, rows/sec
+- RSS at the end and peak RSS of the stage (Linux: VmHWM is reset when a
+  stage starts with no other stage running; elsewhere process peak so far)
+- optional Postgres deltas over the stage (pass `pg=<connection>`):
+  pg_stat_database (buffer hits/reads, tuples, temp bytes) and, when the
+  extension is installed, pg_stat_statements totals (calls, exec time,
+  shared block hits/reads). Postgres flushes these counters at transaction
+  end, so deltas are exact only around committed work.
+
+Records go to artifacts/runlog/runs.jsonl (DQ_RUNLOG overrides the path,
+DQ_RUNLOG=0 disables). Once the file passes DQ_RUNLOG_MAX_MB (default 20) it is
+rotated to runs.jsonl.1 (the previous .1 is dropped), so the log keeps at most
+about twice the cap. DQ_RUN_ID groups the steps of one pipeline run
+(00_run_pipeline.py sets it for its subprocesses).
+
+Usage:
+  from instrument import RunLog
+
+  run = RunLog("01_load_raw_to_postgres")
+  with run.stage("load raw.orders", pg=con) as st:
+      ...
+      st.rows = len(df)
+      st.bytes_read = path.stat().st_size
+  run.print_summary()
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+import uuid
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+
+RUNLOG_PATH = Path("artifacts/runlog/runs.jsonl")
+RUNLOG_MAX_MB = 20.0
+
+_PROC_STATUS = Path("/proc/self/status")
+_PROC_CLEAR_REFS = Path("/proc/self/clear_refs")
+
+
+# -------------------------
+# Memory
+# -------------------------
+def reset_peak_rss() -> bool:
+    """
+    Linux only: reset VmHWM so the next reading is the peak of what runs after this call.
+    False when the reset did not take (no /proc, or a kernel / sandbox that accepts the
+    write and ignores it): peak_rss_mb() is then the process high-water mark.
+    """
+    try:
+        _PROC_CLEAR_REFS.write_text("5")
+    except OSError:
+        return False
+    hwm, rss = _proc_status_mb("VmHWM:"), _proc_status_mb("VmRSS:")
+    return hwm is not None and rss is not None and hwm <= rss + 1.0
+
+
+def _proc_status_mb(key: str) -> Optional[float]:
+    try:
+        for line in _PROC_STATUS.read_text().splitlines():
+            if line.startswith(key):
+                return round(int(line.split()[1]) / 1024, 2)
+    except OSError:
+        pass
+    return None
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process (VmHWM, else ru_maxrss; None on Windows)."""
+    v = _proc_status_mb("VmHWM:")
+    if v is not None:
+        return v
+    try:
+        import resource
+    except ImportError:
+        return None
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, KiB on Linux/BSD
+    return round(maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024), 2)
+
+
+def rss_mb() -> Optional[float]:
+    return _proc_status_mb("VmRSS:")
+
+
+# -------------------------
+# Postgres counters
+# -------------------------
+PG_DB_SQL = """
+select blks_hit, blks_read, tup_returned, tup_fetched, tup_inserted, tup_updated,
+       tup_deleted, temp_bytes, xact_commit
+from pg_stat_database where datname = current_database()
+"""
+PG_DB_COLS = [
+    "blks_hit", "blks_read", "tup_returned", "tup_fetched", "tup_inserted", "tup_updated",
+    "tup_deleted", "temp_bytes", "xact_commit",
+]
+
+# The view exists but errors when the library is not preloaded: check both up front
+# (a failed query would abort the caller's open transaction).
+PG_HAS_PGSS_SQL = """
+select to_regclass('pg_stat_statements') is not null
+   and current_setting('shared_preload_libraries') like '%pg_stat_statements%'
+"""
+PG_PGSS_SQL = """
+select coalesce(sum(calls), 0), coalesce(sum(total_exec_time), 0),
+       coalesce(sum(shared_blks_hit), 0), coalesce(sum(shared_blks_read), 0)
+from pg_stat_statements where dbid = (select oid from pg_database where datname = current_database())
+"""
+PG_PGSS_COLS = ["calls", "exec_ms", "shared_blks_hit", "shared_blks_read"]
+
+
+def _pg_fetchone(conn: Any, sql: str) -> tuple:
+    """psycopg connection or SQLAlchemy Connection."""
+    if hasattr(conn, "exec_driver_sql"):
+        return tuple(conn.exec_driver_sql(sql).fetchone())
+    with conn.cursor() as cur:
+        cur.execute(sql)
+        return tuple(cur.fetchone())
+
+
+def pg_snapshot(conn: Any, with_pgss: bool) -> Dict[str, float]:
+    _pg_fetchone(conn, "select pg_stat_clear_snapshot()")  # else counters are frozen inside a transaction
+    snap = dict(zip(PG_DB_COLS, (float(v or 0) for v in _pg_fetchone(conn, PG_DB_SQL))))
+    if with_pgss:
+        snap.update({f"pgss_{k}": float(v or 0) for k, v in zip(PG_PGSS_COLS, _pg_fetchone(conn, PG_PGSS_SQL))})
+    return snap
+
+
+def pg_has_pgss(conn: Any) -> bool:
+    try:
+        return bool(_pg_fetchone(conn, PG_HAS_PGSS_SQL)[0])
+    except Exception:
+        return False
+
+
+# -------------------------
+# Run log
+# -------------------------
+@dataclass
+class StageRecord:
+    run_id: str
+    script: str
+    stage: str
+    parent: Optional[str] = None
+    started_at: str = ""
+    status: str = "ok"
+    error: Optional[str] = None
+    wall_s: float = 0.0
+    cpu_s: float = 0.0
+    rows: Optional[int] = None
+    bytes_read: Optional[int] = None
+    rows_per_s: Optional[float] = None
+    rss_mb: Optional[float] = None
+    peak_rss_mb: Optional[float] = None
+    pg: Optional[Dict[str, float]] = None
+    attrs: Dict[str, Any] = field(default_factory=dict)
+
+
+class RunLog:
+    def __init__(self, script: str, path: Optional[Path] = None, run_id: Optional[str] = None):
+        env_path = os.environ.get("DQ_RUNLOG", "")
+        self.enabled = env_path != "0"
+        self.path = path or (Path(env_path) if env_path and env_path != "0" else RUNLOG_PATH)
+        self.max_bytes = int(float(os.environ.get("DQ_RUNLOG_MAX_MB") or RUNLOG_MAX_MB) * 1024 * 1024)
+        self.script = script
+        self.run_id = run_id or os.environ.get("DQ_RUN_ID") or uuid.uuid4().hex[:12]
+        self.records: List[StageRecord] = []
+        self._local = threading.local()  # per-thread stage stack (parent of nested stages)
+        self._lock = threading.Lock()
+        self._active = 0
+        self._pgss: Dict[int, bool] = {}
+
+    @property
+    def _stack(self) -> List[str]:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    @contextmanager
+    def stage(self, name: str, *, pg: Any = None, rows: Optional[int] = None,
+              bytes_read: Optional[int] = None, **attrs: Any) -> Iterator[StageRecord]:
+        rec = StageRecord(
+            run_id=self.run_id,
+            script=self.script,
+            stage=name,
+            parent=self._stack[-1] if self._stack else None,
+            started_at=time.strftime("%Y-%m-%dT%H:%M:%S"),
+            rows=rows,
+            bytes_read=bytes_read,
+            attrs=dict(attrs),
+        )
+        with self._lock:
+            if self._active == 0:  # peak RSS is per process: only reset when no stage is running
+                reset_peak_rss()
+            self._active += 1
+            self.records.append(rec)
+
+        pg_before: Optional[Dict[str, float]] = None
+        if pg is not None:
+            pgss = self._pgss.setdefault(id(pg), pg_has_pgss(pg))
+            try:
+                pg_before = pg_snapshot(pg, pgss)
+            except Exception:
+                pg_before = None
+
+        self._stack.append(name)
+        t0, c0 = time.perf_counter(), time.process_time()
+        try:
+            yield rec
+        except BaseException as e:
+            rec.status = "error"
+            rec.error = "".join(traceback.format_exception_only(type(e), e)).strip()
+            raise
+        finally:
+            rec.wall_s = round(time.perf_counter() - t0, 4)
+            rec.cpu_s = round(time.process_time() - c0, 4)
+            self._stack.pop()
+            with self._lock:
+                self._active -= 1
+            rec.rss_mb = rss_mb()
+            # nested stages / worker records may have reset VmHWM: the stage peak is the max
+            peaks = [peak_rss_mb()] + [r.peak_rss_mb for r in self.records if r.parent == name]
+            rec.peak_rss_mb = max((v for v in peaks if v is not None), default=None)
+            if rec.rows is not None and rec.wall_s > 0:
+                rec.rows_per_s = round(rec.rows / rec.wall_s, 1)
+            if pg_before is not None and rec.status == "ok":
+                try:
+                    after = pg_snapshot(pg, self._pgss[id(pg)])
+                    rec.pg = {k: round(after[k] - pg_before.get(k, 0.0), 3) for k in after}
+                except Exception:
+                    rec.pg = None
+            self._write(rec)
+
+    def record(self, name: str, *, parent: Optional[str] = None, **fields: Any) -> StageRecord:
+        """Log a stage measured elsewhere (e.g. in a worker process): StageRecord fields, rest -> attrs."""
+        known = set(StageRecord.__dataclass_fields__)
+        rec = StageRecord(
+            run_id=self.run_id,
+            script=self.script,
+            stage=name,
+            parent=parent,
+            started_at=time.strftime("%Y-%m-%dT%H:%M:%S"),
+            **{k: v for k, v in fields.items() if k in known},
+        )
+        rec.attrs.update({k: v for k, v in fields.items() if k not in known})
+        if rec.rows is not None and rec.wall_s and rec.rows_per_s is None:
+            rec.rows_per_s = round(rec.rows / rec.wall_s, 1)
+        with self._lock:
+            self.records.append(rec)
+        self._write(rec)
+        return rec
+
+    def _write(self, rec: StageRecord) -> None:
+        if not self.enabled:
+            return
+        line = json.dumps(asdict(rec), ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._rotate()
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+    def _rotate(self) -> None:
+        """Move a log over the size cap to <name>.1; a concurrent process may have won the race."""
+        try:
+            if self.max_bytes > 0 and self.path.stat().st_size >= self.max_bytes:
+                self.path.replace(self.path.with_name(self.path.name + ".1"))
+        except OSError:
+            pass
+
+    def print_summary(self) -> None:
+        """Compact table of this process' stages (nested stages indented)."""
+        if not self.records:
+            return
+        print(f"\n=== Run {self.run_id} ({self.script}) ===")
+        print(f"{'stage':<40} {'status':<6} {'wall_s':>8} {'cpu_s':>8} {'rows':>11} {'rows/s':>11} {'peak_mb':>8} {'blk_hit%':>8}")
+        for r in self.records:
+            name = ("  " if r.parent else "") + r.stage
+            hit = ""
+            if r.pg:
+                hits, reads = r.pg.get("blks_hit", 0), r.pg.get("blks_read", 0)
+                if hits + reads > 0:
+                    hit = f"{100 * hits / (hits + reads):.1f}"
+            print(
+                f"{name[:40]:<40} {r.status:<6} {r.wall_s:>8.2f} {r.cpu_s:>8.2f} "
+                f"{'' if r.rows is None else f'{r.rows:,}':>11} {'' if r.rows_per_s is None else f'{r.rows_per_s:,.0f}':>11} "
+                f"{'' if r.peak_rss_mb is None else f'{r.peak_rss_mb:.1f}':>8} {hit:>8}"
+            )
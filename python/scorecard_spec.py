@@ -0,0 +1,62 @@
+"""
+scorecard_spec.py
+
+What the scorecard SQL pack checks, for the scripts that recompute it outside
+the pack (DuckDB, NumPy, shards) or query around it (recon buckets, FK exception
+rows, index advisor).
+
+The maps are parsed from the values lists of sql/10_scorecard/*.sql, so the SQL
+stays the single source:
+- PK_COLS          02_pk_dupes.sql       table -> suspected PK column
+- DATE_COLS        03_date_range.sql     table -> date columns
+- NUM_COLS         04_negative_flags.sql table -> numeric columns checked for negatives
+- FK_RELATIONSHIPS 05_fk_orphans.sql     (child_table, child_fk_col, parent_table, parent_pk_col)
+
+Usage:
+  from scorecard_spec import FK_RELATIONSHIPS, PK_COLS
+"""
+
+from __future__ import annotations
+
+import re
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+
+SCORECARD_SQL_DIR = Path(__file__).resolve().parents[1] / "sql" / "10_scorecard"
+PK_SQL = SCORECARD_SQL_DIR / "02_pk_dupes.sql"
+DATE_SQL = SCORECARD_SQL_DIR / "03_date_range.sql"
+NUM_SQL = SCORECARD_SQL_DIR / "04_negative_flags.sql"
+FK_SQL = SCORECARD_SQL_DIR / "05_fk_orphans.sql"
+
+_PK_ROW = re.compile(r"\(\s*'(\w+)',\s*'(\w+)'\s*\)")
+_COLS_ROW = re.compile(r"\(\s*'(\w+)',\s*array\[([^\]]*)\]\s*\)")
+_FK_ROW = re.compile(r"\(\s*'(\w+)',\s*'(\w+)',\s*'(\w+)',\s*'(\w+)'\s*\)")
+
+
+def _values_rows(pattern: "re.Pattern[str]", path: Path) -> List[Tuple[str, ...]]:
+    rows = pattern.findall(path.read_text(encoding="utf-8"))
+    if not rows:
+        raise ValueError(f"No values list found in {path}")
+    return rows
+
+
+def pk_cols(path: Path = PK_SQL) -> Dict[str, str]:
+    """The (table, pk) values list of 02_pk_dupes.sql."""
+    return dict(_values_rows(_PK_ROW, path))
+
+
+def table_cols(path: Path) -> Dict[str, List[str]]:
+    """The (table, array[columns]) values list of 03_date_range.sql / 04_negative_flags.sql."""
+    return {t: re.findall(r"'(\w+)'", cols) for t, cols in _values_rows(_COLS_ROW, path)}
+
+
+def fk_relationships(path: Path = FK_SQL) -> List[Tuple[str, str, str, str]]:
+    """The (child, fk, parent, pk) values list of 05_fk_orphans.sql."""
+    return _values_rows(_FK_ROW, path)
+
+
+PK_COLS: Dict[str, str] = pk_cols()
+DATE_COLS: Dict[str, List[str]] = table_cols(DATE_SQL)
+NUM_COLS: Dict[str, List[str]] = table_cols(NUM_SQL)
+FK_RELATIONSHIPS: List[Tuple[str, str, str, str]] = fk_relationships()
@@ -40,4 +40,46 @@ create table if not exists dq.fk_orphans_detail (
   checked_at  timestamptz not null default now(),
 
   primary key (child_schema, child_table, child_fk_col, parent_schema, parent_table, parent_pk_col)
-);
\ No newline at end of file
+);
+
+-- Statements generated by the DO blocks (01..05), kept for EXPLAIN / plan regression checks.
+-- Captured only when the session sets dq.capture_sql to a run id
+-- (python/02_generate_scorecard.py --explain); otherwise dq.capture_sql() is a no-op.
+-- 02 deletes the rows of earlier runs once a capture ends (last run only).
+create table if not exists dq.captured_sql (
+  run_id      text not null,
+  label       text not null,
+  sql_text    text not null,
+  captured_at timestamptz not null default now(),
+
+  primary key (run_id, label)
+);
+
+create or replace function dq.capture_sql(p_label text, p_sql text)
+returns void
+language plpgsql
+as $$
+declare
+  v_run text := nullif(current_setting('dq.capture_sql', true), '');
+begin
+  if v_run is not null then
+    insert into dq.captured_sql(run_id, label, sql_text)
+    values (v_run, p_label, p_sql)
+    on conflict (run_id, label) do update
+      set sql_text = excluded.sql_text,
+          captured_at = now();
+  end if;
+end $$;
+
+-- Table scope of the per-table / per-relationship checks (01..05).
+-- Unset or empty dq.only_tables = every table; else a comma list of table names
+-- (python/02_generate_scorecard.py --tables, python/11_watch_raw_data.py).
+-- FK checks run when the child or the parent table is in scope.
+create or replace function dq.in_scope(p_table text)
+returns boolean
+language sql
+stable
+as $$
+  select coalesce(btrim(current_setting('dq.only_tables', true)), '') = ''
+      or p_table = any(string_to_array(replace(current_setting('dq.only_tables', true), ' ', ''), ','));
+$$;
@@ -28,6 +28,8 @@ begin
       and table_type = 'VIEW'
     order by table_name
   loop
+    if not dq.in_scope(r.table_name) then continue; end if;
+
     select string_agg(
              format('count(*) filter (where %I is null)', column_name),
              ' + '
@@ -70,6 +72,7 @@ begin
       r.table_schema, r.table_name
     );
 
+    perform dq.capture_sql(format('01_nulls %s.%s', r.table_schema, r.table_name), sql);
     execute sql;
   end loop;
 end $$;
\ No newline at end of file
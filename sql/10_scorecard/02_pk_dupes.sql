@@ -31,6 +31,7 @@ begin
       select 1 from information_schema.tables
       where table_schema = t_schema and table_name = t_name
     ) then continue; end if;
+    if not dq.in_scope(t_name) then continue; end if;
 
     update dq.scorecard_table
     set suspected_pk = pk_col, updated_at = now()
@@ -74,6 +75,7 @@ begin
       t_schema, t_name
     );
 
+    perform dq.capture_sql(format('02_pk_dupes %s.%s', t_schema, t_name), sql);
     execute sql;
   end loop;
 end $$;
\ No newline at end of file
@@ -95,6 +95,9 @@ begin
     ) then
       continue;
     end if;
+    if not dq.in_scope(m.table_name) then
+      continue;
+    end if;
 
     -- Build a list of dq.try_parse_date(col) expressions: dq.try_parse_date(col1), dq.try_parse_date(col2) ...
     select string_agg(format('dq.try_parse_date(%I)', c), ', ')
@@ -127,6 +130,7 @@ begin
       t_schema, m.table_name
     );
 
+    perform dq.capture_sql(format('03_date_range %s.%s', t_schema, m.table_name), sql);
     execute sql;
   end loop;
 end $$;
@@ -35,6 +35,7 @@ begin
       select 1 from information_schema.tables
       where table_schema = t_schema and table_name = m.table_name
     ) then continue; end if;
+    if not dq.in_scope(m.table_name) then continue; end if;
 
     select string_agg(format('(dq.try_parse_numeric(%I) < 0)', c), ' OR ')
     into any_neg_expr
@@ -58,6 +59,7 @@ begin
       t_schema, m.table_name
     );
 
+    perform dq.capture_sql(format('04_negative_flags %s.%s', t_schema, m.table_name), sql);
     execute sql;
   end loop;
 end $$;
\ No newline at end of file
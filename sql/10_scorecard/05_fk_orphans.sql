@@ -68,6 +68,9 @@ begin
       ('inventory_transactions', 'purchase_order_id',  'purchase_orders',  'purchase_order_id')
     ) as x(child_table, child_fk_col, parent_table, parent_pk_col)
   loop
+    if not (dq.in_scope(rel.child_table) or dq.in_scope(rel.parent_table)) then
+      continue;
+    end if;
 
     -- One query returns all metrics for this relationship
     sql := format($q$
@@ -111,6 +114,10 @@ begin
       rel.parent_table             -- %5
     );
 
+    perform dq.capture_sql(
+      format('05_fk_orphans %s.%s -> %s.%s', rel.child_table, rel.child_fk_col, rel.parent_table, rel.parent_pk_col),
+      sql
+    );
     execute sql into base_rows, null_fk_rows, orphan_raw, orphan_norm, fixable;
 
     -- Upsert detail row